@@ -0,0 +1,45 @@
+import argparse
+import sys
+import time
+
+from vnpy.trader.constant import Exchange
+
+from synthetic import make_tick_dataframe
+from strategies import TickDynamicBollChannelStrategy
+from tick_backtest_runner import run_backtest
+from tick_bars import BAR_RESOLUTIONS, bars_from_store, df_to_bars
+from tick_store import TickStore
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="tick 聚合为 K 线的耗时、数据量，以及逐 tick 与 K 线模式回放耗时对比")
+    arg_parser.add_argument("--ticks", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    store = TickStore.from_dataframe(make_tick_dataframe(args.ticks), "AL2405", Exchange.SHFE)
+    start = store.datetime[0].item()
+    end = store.datetime[-1].item()
+
+    begin = time.perf_counter()
+    run_backtest("AL2405", start, end, TickDynamicBollChannelStrategy, {}, history_data=store, output=lambda msg: None)
+    tick_cost = time.perf_counter() - begin
+    print(f"tick 数量: {len(store):,}（{store.nbytes / 1024 ** 2:.1f}MB），逐 tick 回放 {tick_cost:.3f}s")
+
+    for resolution in BAR_RESOLUTIONS:
+        begin = time.perf_counter()
+        df = bars_from_store(store, resolution)
+        aggregate_cost = time.perf_counter() - begin
+        bars = df_to_bars(df, "AL2405", Exchange.SHFE, resolution)
+
+        begin = time.perf_counter()
+        run_backtest("AL2405", start, end, TickDynamicBollChannelStrategy, {}, history_data=bars, output=lambda msg: None,
+                     interval=resolution)
+        bar_cost = time.perf_counter() - begin
+        print(f"{resolution}: {len(df):,} 根K线（tick 的 1/{len(store) / max(len(df), 1):,.0f}，"
+              f"{df.memory_usage(index=False).sum() / 1024 ** 2:.2f}MB），聚合 {aggregate_cost:.3f}s，"
+              f"K 线模式回放 {bar_cost:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
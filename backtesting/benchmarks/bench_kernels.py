@@ -0,0 +1,49 @@
+import argparse
+import sys
+import time
+
+from vnpy.trader.constant import Exchange
+
+from synthetic import make_tick_dataframe
+from bench_vector_backtest import same_statistics, trade_keys
+from kernels import KERNEL_STRATEGIES, NUMBA_AVAILABLE, run_kernel_backtest
+from tick_backtest_runner import run_backtest
+from tick_store import TickStore
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="编译内核与事件驱动回测的 ticks/s 对比")
+    arg_parser.add_argument("--ticks", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    df = make_tick_dataframe(args.ticks)
+    store = TickStore.from_dataframe(df, "AL2405", Exchange.SHFE)
+    start = store.datetime[0].item()
+    end = store.datetime[-1].item()
+    engine_settings = {"vt_symbol": "AL2405.SHFE", "start": start, "end": end}
+
+    print(f"tick 数量: {len(store)}，numba: {'已启用' if NUMBA_AVAILABLE else '未安装（纯 Python 回退）'}")
+    failed = False
+    for strategy_class in KERNEL_STRATEGIES:
+        # 先在少量数据上运行一次，排除 JIT 编译耗时
+        run_kernel_backtest(strategy_class, {}, store[:1000], engine_settings)
+
+        begin = time.perf_counter()
+        event_engine, _, event_stats = run_backtest(
+            "AL2405", start, end, strategy_class, {}, history_data=store, output=lambda msg: None
+        )
+        event_speed = len(store) / (time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        kernel_engine, _, kernel_stats = run_kernel_backtest(strategy_class, {}, store, engine_settings)
+        kernel_speed = len(store) / (time.perf_counter() - begin)
+
+        ok = trade_keys(event_engine) == trade_keys(kernel_engine) and same_statistics(event_stats, kernel_stats)
+        failed |= not ok
+        print(f"{strategy_class.__name__}: 成交 {len(event_engine.trades)} 笔，结果{'一致' if ok else '不一致'} | "
+              f"事件驱动 {event_speed:,.0f} ticks/s，内核 {kernel_speed:,.0f} ticks/s，加速 {kernel_speed / event_speed:.0f}x")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
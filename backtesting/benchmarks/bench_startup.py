@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# GUI 冷启动基准：python -X importtime 统计 tick_backtest_gui 导入阶段最耗时的模块，
+# 并在新进程中测量从启动解释器到主窗口显示（show 返回）、到策略加载完成可以回测的时间
+BACKTESTING_DIR = Path(__file__).resolve().parent.parent
+
+# 启动阶段（窗口显示之前）不应导入的重模块，它们都应在第一次用到时才导入
+LAZY_MODULES = ["pandas", "talib", "matplotlib", "dolphindb", "plotly", "numba", "vnpy_ctastrategy"]
+
+# 默认预算：从启动解释器到主窗口显示（秒）
+DEFAULT_WINDOW_BUDGET = 1.0
+
+WINDOW_SCRIPT = f"""
+import json, sys, time
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+from tick_backtest_gui import BacktestGUI
+
+app = QApplication(sys.argv)
+gui = BacktestGUI()
+gui.show()
+shown = time.time()
+loaded = [name for name in {LAZY_MODULES!r} if name in sys.modules]
+
+def poll():
+    # 窗口显示后事件循环中延迟加载策略，加载完成即可开始回测
+    if gui.strategy_classes is None:
+        QTimer.singleShot(5, poll)
+        return
+    print(json.dumps({{"shown": shown, "ready": time.time(), "loaded": loaded}}))
+    gui.close()
+    app.quit()
+
+QTimer.singleShot(0, poll)
+app.exec()
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    # 没有图形界面的服务器上用 offscreen 平台插件
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def import_times(module: str = "tick_backtest_gui") -> list:
+    # 返回 [(累计微秒, 自身微秒, 缩进层级, 模块名)]，按 -X importtime 的输出顺序
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKTESTING_DIR, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def measure_window() -> dict:
+    begin = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", WINDOW_SCRIPT],
+        cwd=BACKTESTING_DIR, env=child_env(), capture_output=True, text=True, timeout=120
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip())
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"window": report["shown"] - begin, "ready": report["ready"] - begin, "loaded": report["loaded"]}
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="GUI 启动耗时基准（导入耗时 + 首个窗口显示时间）")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="测量次数，取最快一次")
+    arg_parser.add_argument("--top", type=int, default=10, help="列出导入耗时最长的前 N 个直接依赖")
+    arg_parser.add_argument("--budget", type=float, default=DEFAULT_WINDOW_BUDGET, help="首个窗口显示时间预算（秒）")
+    args = arg_parser.parse_args()
+
+    rows = min((import_times() for _ in range(args.repeat)), key=lambda r: r[-1][0])
+    total = rows[-1][0]
+    print(f"import tick_backtest_gui: {total / 1e6:.3f}s")
+    # 只列 tick_backtest_gui 的直接依赖（紧挨在它之前、缩进一层的行），耗时包含各自的下层导入；
+    # 更早的顶层行是解释器启动时 site 的导入
+    first = len(rows) - 1
+    while first > 0 and rows[first - 1][2] > 0:
+        first -= 1
+    direct = sorted((row for row in rows[first:-1] if row[2] == 1), reverse=True)[:args.top]
+    for cumulative_us, _, _, name in direct:
+        print(f"  {cumulative_us / 1e6:7.3f}s  {name}")
+
+    runs = [measure_window() for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["window"])
+    print(f"启动到主窗口显示: {best['window']:.3f}s（预算 {args.budget:.3f}s）")
+    print(f"启动到策略加载完成: {min(run['ready'] for run in runs):.3f}s")
+
+    failed = False
+    if best["loaded"]:
+        print(f"窗口显示前已导入重模块: {', '.join(best['loaded'])}")
+        failed = True
+    if best["window"] > args.budget:
+        print("超出启动预算")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import argparse
+import time
+
+from dateutil import parser
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+
+from synthetic import make_tick_dataframe
+from dolphindb_tick_feed import df_to_ticks
+
+
+def legacy_df_to_ticks(df, symbol, exchange):
+    # 原 load_tick_data 中的逐行转换实现，作为对照基线
+    ticks = []
+    for _, row in df.iterrows():
+        time_str = str(row["time"])
+        dt = parser.parse(time_str)
+        tick = TickData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt,
+            name=symbol,
+            last_price=row["current"],
+            high_price=row["high"],
+            low_price=row["low"],
+            volume=row["volume"],
+            turnover=row["money"],
+            ask_price_1=row["a1_p"],
+            ask_volume_1=row["a1_v"],
+            bid_price_1=row["b1_p"],
+            bid_volume_1=row["b1_v"],
+            gateway_name="DDB"
+        )
+        ticks.append(tick)
+    return ticks
+
+
+def measure(func, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        ticks = func(df, "AL", Exchange.SHFE)
+        best = min(best, time.perf_counter() - begin)
+    return ticks, len(df) / best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="DataFrame -> TickData 转换速度对比")
+    arg_parser.add_argument("--ticks", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    df = make_tick_dataframe(args.ticks)
+
+    old_ticks, old_speed = measure(legacy_df_to_ticks, df, 1)
+    new_ticks, new_speed = measure(df_to_ticks, df, args.repeat)
+
+    # 两种实现的结果必须一致
+    assert old_ticks == new_ticks, "向量化转换结果与逐行转换不一致"
+
+    print(f"tick 数量: {len(df)}")
+    print(f"iterrows 逐行转换: {old_speed:,.0f} ticks/s")
+    print(f"向量化批量转换:   {new_speed:,.0f} ticks/s")
+    print(f"加速比: {new_speed / old_speed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from vnpy.trader.constant import Exchange
+
+from synthetic import make_tick_dataframe
+from dolphindb_tick_feed import df_to_ticks
+from tick_store import TickStore
+
+
+def measure(func, df):
+    # 构建耗时单独计时（tracemalloc 会显著拖慢分配）；内存只统计容器本身（python 与 NumPy 分配），不含 DataFrame
+    begin = time.perf_counter()
+    data = func(df)
+    cost = time.perf_counter() - begin
+    del data
+
+    gc.collect()
+    tracemalloc.start()
+    data = func(df)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, current, cost
+
+
+def replay_speed(data):
+    # 只遍历生成 tick，不经过回测引擎
+    begin = time.perf_counter()
+    count = 0
+    for _ in data:
+        count += 1
+    return count / (time.perf_counter() - begin)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="TickData 列表与列式 TickStore 内存占用对比")
+    arg_parser.add_argument("--ticks", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    df = make_tick_dataframe(args.ticks)
+
+    ticks, list_bytes, list_cost = measure(lambda d: df_to_ticks(d, "AL2405", Exchange.SHFE), df)
+    list_speed = replay_speed(ticks)
+    del ticks
+
+    store, store_bytes, store_cost = measure(lambda d: TickStore.from_dataframe(d, "AL2405", Exchange.SHFE), df)
+    store_speed = replay_speed(store)
+
+    print(f"tick 数量: {len(df)}")
+    print(f"TickData 列表: {list_bytes / 1024 ** 2:,.1f} MB（{list_bytes / len(df):.0f} 字节/条），"
+          f"构建 {list_cost:.2f}s，遍历 {list_speed:,.0f} ticks/s")
+    print(f"TickStore:     {store_bytes / 1024 ** 2:,.1f} MB（{store_bytes / len(df):.0f} 字节/条），"
+          f"构建 {store_cost:.2f}s，遍历 {store_speed:,.0f} ticks/s")
+    print(f"内存节省: {list_bytes / store_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import math
+import sys
+import time
+
+from vnpy.trader.constant import Exchange
+
+from synthetic import make_tick_dataframe
+from tick_backtest_runner import run_backtest
+from tick_store import TickStore
+from vector_backtest import VECTOR_STRATEGIES, run_vector_backtest
+
+# 对照用的参数组合，覆盖默认参数、更频繁交易的设置，以及快均线窗口长于慢均线（开始交易时快均线窗口未满）的设置
+SETTINGS = [
+    {},
+    {"fast_window": 20, "slow_window": 100, "min_trade_interval": 60, "window": 100, "dev_multiplier": 1.5},
+    {"fast_window": 3000, "slow_window": 20, "min_trade_interval": 60, "window": 50, "dev_multiplier": 2.5},
+]
+
+
+def trade_keys(engine) -> list:
+    return [(t.datetime, t.direction, t.offset, t.price, t.volume) for t in engine.get_all_trades()]
+
+
+def same_statistics(left: dict, right: dict) -> bool:
+    for key, value in left.items():
+        other = right[key]
+        if isinstance(value, float) and isinstance(other, float):
+            if not (math.isclose(value, other, rel_tol=1e-9, abs_tol=1e-6) or (math.isnan(value) and math.isnan(other))):
+                return False
+        elif value != other:
+            return False
+    return left.keys() == right.keys()
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="向量化回测与事件驱动回测的结果核对和速度对比")
+    arg_parser.add_argument("--ticks", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    df = make_tick_dataframe(args.ticks)
+    store = TickStore.from_dataframe(df, "AL2405", Exchange.SHFE)
+    start = store.datetime[0].item()
+    end = store.datetime[-1].item()
+    engine_settings = {"vt_symbol": "AL2405.SHFE", "start": start, "end": end}
+
+    failed = False
+    for strategy_class in VECTOR_STRATEGIES:
+        for setting in SETTINGS:
+            setting = {key: value for key, value in setting.items() if key in strategy_class.parameters}
+
+            begin = time.perf_counter()
+            event_engine, _, event_stats = run_backtest(
+                "AL2405", start, end, strategy_class, setting, history_data=store, output=lambda msg: None
+            )
+            event_cost = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            vector_engine, _, vector_stats = run_vector_backtest(strategy_class, setting, store, engine_settings)
+            vector_cost = time.perf_counter() - begin
+
+            ok = trade_keys(event_engine) == trade_keys(vector_engine) and same_statistics(event_stats, vector_stats)
+            failed |= not ok
+            print(f"{strategy_class.__name__} {setting or '默认参数'}: "
+                  f"成交 {len(event_engine.trades)} 笔，结果{'一致' if ok else '不一致'} | "
+                  f"事件驱动 {len(store) / event_cost:,.0f} ticks/s，向量化 {len(store) / vector_cost:,.0f} ticks/s，"
+                  f"加速 {event_cost / vector_cost:.0f}x")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+from vnpy.trader.constant import Exchange
+
+from synthetic import make_tick_dataframe
+from dolphindb_tick_feed import df_to_ticks
+from tick_backtest_runner import STRATEGIES, create_engine, run_backtesting
+
+# 默认回归阈值：吞吐下降或峰值内存上升超过 20% 视为回归
+DEFAULT_THRESHOLD = 0.2
+
+
+def reset_peak_rss() -> None:
+    # Linux 上可以清零进程的峰值内存记录（VmHWM），使统计只覆盖计时阶段，不含生成模拟数据时的峰值
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # Linux 上 ru_maxrss 单位为 KB，macOS 为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+def replay(ticks, strategy_class):
+    engine = create_engine("AL2405.SHFE", ticks[0].datetime, ticks[-1].datetime)
+    engine.output = lambda msg: None
+    engine.add_strategy(strategy_class, {})
+    run_backtesting(engine, ticks)
+    return engine
+
+
+def make_ticks(n_ticks: int) -> list:
+    return df_to_ticks(make_tick_dataframe(n_ticks), "AL2405", Exchange.SHFE)
+
+
+def run_stage(stage: str, n_ticks: int, repeat: int) -> dict:
+    # 在独立进程中运行，峰值内存只反映本阶段（Linux 上不含生成模拟数据等准备工作）；计时取 repeat 次中最快的一次
+    # setup 在每次计时前执行，不计入耗时
+    setup = None
+    if stage == "conversion":
+        df = make_tick_dataframe(n_ticks)
+
+        def func():
+            df_to_ticks(df, "AL2405", Exchange.SHFE)
+    elif stage.startswith("replay:"):
+        ticks = make_ticks(n_ticks)
+        strategy_class = STRATEGIES[stage.partition(":")[2]]
+
+        def func():
+            replay(ticks, strategy_class)
+    else:
+        # 先回放一次得到逐日结果，tick 列表随即释放
+        engine = replay(make_ticks(n_ticks), STRATEGIES["TickDynamicBollChannelStrategy"])
+        if stage == "calculate_result":
+            def setup():
+                # calculate_result 会把成交累加进逐日结果，重复计时前先复位
+                for daily_result in engine.daily_results.values():
+                    daily_result.__init__(daily_result.date, daily_result.close_price)
+
+            func = engine.calculate_result
+        else:
+            engine.calculate_result()
+
+            def func():
+                engine.calculate_statistics(output=False)
+
+    reset_peak_rss()
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+
+    return {"seconds": best, "ticks_per_second": n_ticks / best, "peak_rss_mb": peak_rss_mb()}
+
+
+def stage_names() -> list:
+    return ["conversion"] + [f"replay:{name}" for name in STRATEGIES] + ["calculate_result", "calculate_statistics"]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    # 返回回归的阶段说明；基线中没有的阶段忽略
+    regressions = []
+    for stage, result in results.items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        if result["ticks_per_second"] < base["ticks_per_second"] * (1 - threshold):
+            regressions.append(
+                f"{stage}: 吞吐 {result['ticks_per_second']:,.0f} ticks/s，基线 {base['ticks_per_second']:,.0f} ticks/s"
+            )
+        if result["peak_rss_mb"] and base.get("peak_rss_mb") and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{stage}: 峰值内存 {result['peak_rss_mb']:,.0f} MB，基线 {base['peak_rss_mb']:,.0f} MB")
+    return regressions
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="tick 回测流程分阶段基准测试（模拟数据，无需 DolphinDB）")
+    arg_parser.add_argument("--ticks", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--stage", action="append", help="只运行指定阶段，可重复：" + ", ".join(stage_names()))
+    arg_parser.add_argument("--save", help="把本次结果保存为 JSON 基线")
+    arg_parser.add_argument("--baseline", help="与 JSON 基线对比，出现回归时返回非零退出码")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值（比例）")
+    args = arg_parser.parse_args()
+
+    stages = args.stage or stage_names()
+    results = {}
+    for stage in stages:
+        # 每个阶段一个新进程，峰值内存互不影响
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            result = executor.submit(run_stage, stage, args.ticks, args.repeat).result()
+        results[stage] = result
+        rss = f"{result['peak_rss_mb']:,.0f} MB" if result["peak_rss_mb"] else "n/a"
+        print(f"{stage:<45} {result['seconds']:8.3f}s {result['ticks_per_second']:>14,.0f} ticks/s  峰值内存 {rss}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "ticks": args.ticks,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"基线已保存至 {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("ticks") != args.ticks:
+            print(f"注意：基线 tick 数为 {baseline.get('ticks')}，本次为 {args.ticks}")
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"回归 {line}")
+        if regressions:
+            return 1
+        print("未发现回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# benchmarks 目录下的脚本需要直接导入 backtesting 目录中的模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# 上期所日盘交易时段（不含夜盘），每 500ms 一笔快照
+SESSIONS = [((9, 0), (10, 15)), ((10, 30), (11, 30)), ((13, 30), (15, 0))]
+TICK_INTERVAL_MS = 500
+
+
+def session_times(day: datetime, ticks_per_day: int) -> np.ndarray:
+    times = []
+    for (h1, m1), (h2, m2) in SESSIONS:
+        begin = np.datetime64(day.replace(hour=h1, minute=m1))
+        end = np.datetime64(day.replace(hour=h2, minute=m2))
+        times.append(np.arange(begin, end, np.timedelta64(TICK_INTERVAL_MS, "ms")))
+    times = np.concatenate(times).astype("datetime64[ms]")
+    return times[:ticks_per_day]
+
+
+def make_tick_dataframe(
+    n_ticks: int = 100_000,
+    ticks_per_day: int = 20_000,
+    start: datetime = datetime(2024, 4, 1),
+    contract: str = "AL2405.XSGE",
+    symbol: str = "AL",
+    base_price: float = 19_000,
+    pricetick: float = 5,
+    seed: int = 0
+) -> pd.DataFrame:
+    # 生成与 future_ticks 表同结构的模拟 tick 数据：价格为最小变动价位整数倍的随机游走
+    rng = np.random.default_rng(seed)
+
+    times = []
+    day = start
+    while sum(len(t) for t in times) < n_ticks:
+        if day.weekday() < 5:
+            times.append(session_times(day, ticks_per_day))
+        day += timedelta(days=1)
+    times = np.concatenate(times)[:n_ticks]
+
+    steps = rng.choice([-1, 0, 0, 0, 1], size=n_ticks) * pricetick
+    price = base_price + np.cumsum(steps)
+    spread = rng.integers(1, 3, size=n_ticks) * pricetick
+
+    # 成交量、成交额为当日累计值
+    day_index = times.astype("datetime64[D]")
+    last_volume = rng.integers(0, 20, size=n_ticks).astype(float)
+    volume = pd.Series(last_volume).groupby(day_index).cumsum().to_numpy()
+    money = pd.Series(last_volume * price * 5).groupby(day_index).cumsum().to_numpy()
+    day_high = pd.Series(price).groupby(day_index).cummax().to_numpy()
+    day_low = pd.Series(price).groupby(day_index).cummin().to_numpy()
+
+    return pd.DataFrame({
+        "time": times.astype("datetime64[ns]"),
+        "current": price.astype(float),
+        "high": day_high.astype(float),
+        "low": day_low.astype(float),
+        "volume": volume,
+        "money": money,
+        "a1_v": rng.integers(1, 50, size=n_ticks).astype(float),
+        "a1_p": (price + spread).astype(float),
+        "b1_v": rng.integers(1, 50, size=n_ticks).astype(float),
+        "b1_p": (price - pricetick).astype(float),
+        "contract": contract,
+        "symbol": symbol,
+    })
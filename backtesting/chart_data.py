@@ -0,0 +1,101 @@
+# 图表数据准备：在回测线程中把逐日结果整理成 matplotlib 可直接使用的数组，界面线程只更新已有图元并重绘；
+# 点数远多于画布像素宽度时降采样：净值用 LTTB（保持曲线形状），回撤和盈亏用每段最小/最大值（不丢失极值）
+import numpy as np
+
+# 画布宽度未知时的默认点数，以及点数下限
+DEFAULT_POINTS = 2000
+MIN_POINTS = 200
+HIST_BINS = 50
+
+GREEN = (0.0, 0.5, 0.0, 1.0)
+RED = (1.0, 0.0, 0.0, 1.0)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets：首尾两点保留，中间按下标等分为 threshold - 2 段，每段选出与
+    # 上一个选中点、下一段均值点构成三角形面积最大的点；返回选中点的下标
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # 各段均值，末尾追加最后一个点作为最后一段的“下一段”
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(y: np.ndarray, buckets: int) -> np.ndarray:
+    # 按下标等分为 buckets 段，每段保留最小值和最大值所在的点（以及首尾两点），返回按下标排序的下标
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # 先按段、再按值排序，每段的第一个和最后一个即最小值和最大值
+    order = np.lexsort((y, bucket))
+    return np.unique(np.concatenate((order[edges[:-1]], order[edges[1:] - 1], [0, n - 1])))
+
+
+def chart_points(width: int = 0) -> int:
+    # width 为画布像素宽度，每个像素最多保留约一个点
+    return max(int(width), MIN_POINTS) if width else DEFAULT_POINTS
+
+
+def prepare_chart_data(df, width: int = 0, intraday=None) -> dict:
+    # intraday 为 intraday_equity 返回的逐 tick 序列（已按画布宽度降采样），画在净值和回撤图上
+    from matplotlib.dates import date2num
+
+    points = chart_points(width)
+    x = date2num(np.asarray(df.index, dtype="datetime64[us]"))
+    balance = df["balance"].to_numpy(dtype=float)
+    drawdown = df["drawdown"].to_numpy(dtype=float)
+    net_pnl = df["net_pnl"].to_numpy(dtype=float)
+
+    index = lttb(x, balance, points)
+    balance_x, balance_y = x[index], balance[index]
+
+    # 回撤填充区域：曲线与 0 轴围成的多边形
+    index = min_max(drawdown, points // 2)
+    drawdown_verts = np.concatenate((
+        np.column_stack((x[index], drawdown[index])),
+        np.column_stack((x[index][::-1], np.zeros(len(index))))
+    ))
+
+    # 每日盈亏画成竖线段（一个 LineCollection），颜色按正负整体生成
+    index = min_max(net_pnl, points // 2)
+    pnl_segments = np.zeros((len(index), 2, 2))
+    pnl_segments[:, :, 0] = x[index, None]
+    pnl_segments[:, 1, 1] = net_pnl[index]
+    pnl_colors = np.where((net_pnl[index] >= 0)[:, None], GREEN, RED)
+
+    # 直方图用全部数据统计
+    hist_counts, hist_edges = np.histogram(net_pnl[np.isfinite(net_pnl)], bins=HIST_BINS)
+
+    chart = {
+        "days": len(df),
+        "xlim": (x[0], x[-1]),
+        "balance": (balance_x, balance_y),
+        "drawdown": drawdown_verts,
+        "drawdown_range": (float(drawdown.min()), 0.0),
+        "pnl_segments": pnl_segments,
+        "pnl_colors": pnl_colors,
+        "pnl_range": (min(float(net_pnl.min()), 0.0), max(float(net_pnl.max()), 0.0)),
+        "hist": (hist_counts, hist_edges),
+    }
+    if intraday is not None and len(intraday):
+        intraday_x = date2num(intraday["datetime"].to_numpy(dtype="datetime64[us]"))
+        chart["intraday_balance"] = (intraday_x, intraday["balance"].to_numpy(dtype=float))
+        chart["intraday_drawdown"] = (intraday_x, intraday["drawdown"].to_numpy(dtype=float))
+    return chart
@@ -1,50 +1,457 @@
-import dolphindb as ddb
-from datetime import datetime
-from vnpy.trader.object import TickData
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from collections import deque
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
 from vnpy.trader.constant import Exchange
-from dateutil import parser
+from progress import ProgressTracker
+from profiling import StageTimer
+from tick_store import TickStore
+from tick_bars import BAR_RESOLUTIONS, bar_cache_key, bars_from_tick_dataframe, df_to_bars, empty_bars
+from mmap_tick_feed import write_tick_file
+
+DB_PATH = "dfs://ticks"
+TABLE_NAME = "future_ticks"
+
+# 只取 TickData 需要的列，避免 select * 把整张宽表传回本地
+TICK_COLUMNS = ["time", "current", "high", "low", "volume", "money", "a1_p", "a1_v", "b1_p", "b1_v"]
+
+# vnpy 交易所代码 -> 聚宽合约后缀（future_ticks 表 contract 列形如 AL2401.XSGE）
+EXCHANGE_SUFFIX = {
+    Exchange.SHFE: "XSGE",
+    Exchange.INE: "XINE",
+    Exchange.DCE: "XDCE",
+    Exchange.CZCE: "XZCE",
+    Exchange.CFFEX: "CCFX",
+    Exchange.GFEX: "GFEX",
+}
+
+# 合约代码直接拼进 DolphinDB 脚本的字符串常量，只允许字母和数字
+SYMBOL_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+
+def checked_symbol(symbol: str) -> str:
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        raise ValueError(f"合约代码只能包含字母和数字: {symbol!r}")
+    return symbol
+
+
+def contract_code(symbol: str, exchange: Exchange) -> str:
+    # future_ticks 表 contract 列的取值，如 AL2401.XSGE
+    if exchange not in EXCHANGE_SUFFIX:
+        raise ValueError(f"不支持的交易所: {getattr(exchange, 'value', exchange)}")
+    return f"{checked_symbol(symbol)}.{EXCHANGE_SUFFIX[exchange]}"
+
+
+def symbol_condition(symbol: str, exchange: Exchange) -> str:
+    # 带月份的合约代码（AL2401）按 contract 列过滤，纯品种代码（AL）按 symbol 列过滤
+    symbol = symbol.strip().upper()
+    if any(c.isdigit() for c in symbol):
+        return f'contract = "{contract_code(symbol, exchange)}"'
+    return f'symbol = "{checked_symbol(symbol)}"'
+
+
+def symbols_condition(symbols: list, exchange: Exchange) -> str:
+    # 组合回测一次查询多个合约：带月份的合约用 contract in [...]，纯品种代码用 symbol in [...]
+    contracts = [s for s in symbols if any(c.isdigit() for c in s)]
+    products = [s for s in symbols if s not in contracts]
+    conditions = []
+    if contracts:
+        conditions.append("contract in [" + ", ".join(f'"{contract_code(s, exchange)}"' for s in contracts) + "]")
+    if products:
+        conditions.append("symbol in [" + ", ".join(f'"{checked_symbol(s)}"' for s in products) + "]")
+    return "(" + " or ".join(conditions) + ")"
+
+
+def symbol_mask(df: pd.DataFrame, symbol: str, exchange: Exchange):
+    # 从多合约查询结果中取出 symbol 的行，与 symbol_condition 的过滤规则一致
+    if any(c.isdigit() for c in symbol):
+        return df["contract"] == contract_code(symbol, exchange)
+    return df["symbol"] == symbol
+
+
+def time_condition(days: list) -> str:
+    if len(days) == 1:
+        return f"date(time) = {days[0]:%Y.%m.%d}"
+    if days[-1] - days[0] == timedelta(days=len(days) - 1):
+        return f"date(time) between {days[0]:%Y.%m.%d} : {days[-1]:%Y.%m.%d}"
+    return "date(time) in [" + ", ".join(f"{day:%Y.%m.%d}" for day in days) + "]"
+
+
+def date_range(start: datetime, end: datetime) -> list:
+    # 起止日期（含）之间的每个自然日；夜盘跨零点的 tick 落在周六，因此不跳过周末
+    days = []
+    day = start.date()
+    while day <= end.date():
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def split_by_day(df: pd.DataFrame, days: list) -> dict:
+    # 按交易日切分已按时间排序的查询结果
+    if df.empty:
+        return {day: df for day in days}
+    times = df["time"].to_numpy(dtype="datetime64[ns]")
+    bounds = np.array([np.datetime64(day) for day in days] + [np.datetime64(days[-1] + timedelta(days=1))],
+                      dtype="datetime64[ns]")
+    index = np.searchsorted(times, bounds)
+    return {
+        day: df.iloc[index[i]:index[i + 1]].reset_index(drop=True)
+        for i, day in enumerate(days)
+    }
+
+
+def df_to_ticks(df, symbol: str, exchange: Exchange) -> list:
+    # 批量转换：按列取出 NumPy 数组，避免 iterrows 的逐行 Series 装箱和逐行字符串解析
+    return list(TickStore.from_dataframe(df, symbol, exchange))
+
+
+class SessionPool:
+    # 有界 DolphinDB 会话池：最多创建 size 个会话，用完归还复用；单个 session 不支持多线程同时查询
+    def __init__(self, factory, size: int = 1):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def add(self, session) -> None:
+        with self._lock:
+            self._created += 1
+        self._idle.put(session)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, session) -> None:
+        self._idle.put(session)
+
+    @contextmanager
+    def session(self):
+        session = self.acquire()
+        try:
+            yield session
+        finally:
+            self.release(session)
 
 
 class DolphinDBTickFeed:
-    def __init__(self, host='localhost', port=8848, user="admin", password="123456"):
-        self.session = ddb.session()
-        self.session.connect(host, port, user, password)
+    def __init__(self, host='localhost', port=8848, user="admin", password="123456", cache=None, session=None,
+                 max_workers: int = 1, session_factory=None, output=None, progress=None, timer=None):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.cache = cache
+        # 并发查询的交易日数，同时也是会话池的上限
+        self.max_workers = max(int(max_workers), 1)
+        # 延迟到第一次查询时再连接，数据全部命中本地缓存时可离线使用
+        self.pool = SessionPool(session_factory or self.connect, self.max_workers)
+        if session is not None:
+            self.pool.add(session)
+        # 逐日加载耗时记录，以及可选的日志输出回调和按交易日的进度回调 progress(done, total, speed, eta)
+        self.timings = []
+        self.output = output
+        self.progress = progress
+        # 查询、缓存读写、转换各阶段的耗时统计
+        self.timer = timer or StageTimer()
 
-    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
-        db_path = "dfs://ticks"
-        table_name = 'future_ticks'
-        if start == end:
-            script = f"""
-                        select * from loadTable("{db_path}", "{table_name}") 
-                        where time = {start.strftime('%Y.%m.%d')}
-                        order by time
-                        """
-        else:
-            script = f"""
-            select * from loadTable("{db_path}", "{table_name}") 
-            where time between timestamp({start.strftime('%Y.%m.%d')}) : timestamp({end.strftime('%Y.%m.%d')})
+    def connect(self):
+        # 只在需要查询时才导入 dolphindb，全部命中本地缓存或只读 tick 文件时不加载
+        import dolphindb as ddb
+
+        session = ddb.session()
+        session.connect(self.host, self.port, self.user, self.password)
+        return session
+
+    def build_query(self, symbol: str, exchange: Exchange, days: list) -> str:
+        columns = ", ".join(TICK_COLUMNS)
+        # 合约条件下推到服务端，只传回所选合约的数据
+        return f"""
+            select {columns} from loadTable("{DB_PATH}", "{TABLE_NAME}")
+            where {time_condition(days)}, {symbol_condition(symbol, exchange)}
             order by time
             """
-        df = self.session.run(script)
-        ticks = []
-        for _, row in df.iterrows():
-            time_str = str(row["time"])
-            dt = parser.parse(time_str)
-            tick = TickData(
-                symbol=symbol,
-                exchange=exchange,
-                datetime=dt,
-                name=symbol,
-                last_price=row["current"],
-                high_price=row["high"],
-                low_price=row["low"],
-                volume=row["volume"],
-                turnover=row["money"],
-                ask_price_1=row["a1_p"],
-                ask_volume_1=row["a1_v"],
-                bid_price_1=row["b1_p"],
-                bid_volume_1=row["b1_v"],
-                gateway_name="DDB"
+
+    def build_portfolio_query(self, symbols: list, exchange: Exchange, days: list) -> str:
+        # 多带 contract、symbol 两列，用于在本地按合约拆分
+        columns = ", ".join(TICK_COLUMNS + ["contract", "symbol"])
+        return f"""
+            select {columns} from loadTable("{DB_PATH}", "{TABLE_NAME}")
+            where {time_condition(days)}, {symbols_condition(symbols, exchange)}
+            order by time
+            """
+
+    def build_bar_query(self, symbol: str, exchange: Exchange, days: list, resolution: str) -> str:
+        # K 线聚合下推到服务端，只传回 K 线；规则与 tick_bars.aggregate_bars 一致：
+        # 按自然日取累计成交量/成交额的增量（当日第一笔为 0，累计值回落时取累计值本身），再按 bar(time, 周期) 分桶
+        return f"""
+            select first(current) as open, max(current) as high, min(current) as low, last(current) as close,
+                   sum(iif(dv < 0, volume, dv)) as volume, sum(iif(dm < 0, money, dm)) as money
+            from (
+                select time, current, volume, money,
+                       nullFill(deltas(volume), 0) as dv, nullFill(deltas(money), 0) as dm
+                from loadTable("{DB_PATH}", "{TABLE_NAME}")
+                where {time_condition(days)}, {symbol_condition(symbol, exchange)}, current > 0
+                context by date(time) csort time
             )
-            ticks.append(tick)
-        return ticks
+            group by bar(time, {BAR_RESOLUTIONS[resolution]}s) as time
+            order by time
+            """
+
+    def query_days(self, symbol: str, exchange: Exchange, days: list) -> pd.DataFrame:
+        return self.run_query(self.build_query(symbol, exchange, days), days)
+
+    def run_query(self, script: str, days: list, unit: str = "条tick") -> pd.DataFrame:
+        begin = time.perf_counter()
+        with self.pool.session() as session:
+            df = session.run(script)
+        cost = time.perf_counter() - begin
+        self.timer.add("DolphinDB查询", cost)
+        self.timer.count("查询行数", len(df))
+
+        label = f"{days[0]}" if len(days) == 1 else f"{days[0]}~{days[-1]}"
+        self.timings.append({"day": label, "rows": len(df), "seconds": cost})
+        if self.output:
+            self.output(f"{label} 加载 {len(df)} {unit}，耗时 {cost:.2f}s")
+        return df
+
+    def fetch_days(self, symbol: str, exchange: Exchange, days: list, on_done=None) -> dict:
+        # 串行时一次查询全部日期；并发时拆成逐日查询，分摊到会话池中的多个会话上
+        # on_done(n)：已完成查询的交易日数
+        if self.max_workers <= 1 or len(days) == 1:
+            frames = split_by_day(self.query_days(symbol, exchange, days), days)
+            if on_done:
+                on_done(len(days))
+            return frames
+
+        frames = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(days))) as executor:
+            futures = {executor.submit(self.query_days, symbol, exchange, [day]): day for day in days}
+            for future in as_completed(futures):
+                frames[futures[future]] = future.result()
+                if on_done:
+                    on_done(len(frames))
+        return frames
+
+    def load_tick_dataframe(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> pd.DataFrame:
+        days = date_range(start, end)
+        tracker = ProgressTracker(len(days), self.progress) if self.progress and days else None
+        return self.load_days(symbol, exchange, days, tracker)
+
+    def load_days(self, symbol: str, exchange: Exchange, days: list, tracker: ProgressTracker = None) -> pd.DataFrame:
+        if not days:
+            return pd.DataFrame(columns=TICK_COLUMNS)
+
+        key = f"{symbol.strip().upper()}.{exchange.value}"
+        frames = {}
+        missing = []
+        with self.timer.stage("读取本地缓存"):
+            for day in days:
+                df = self.cache.get(key, day) if self.cache is not None else None
+                if df is None:
+                    missing.append(day)
+                else:
+                    frames[day] = df
+
+        cached = len(days) - len(missing)
+        if tracker:
+            tracker.update(cached, force=True)
+
+        # 只向 DolphinDB 补齐缓存中缺失的交易日
+        if missing:
+            on_done = (lambda n: tracker.update(cached + n)) if tracker else None
+            fetched = self.fetch_days(symbol, exchange, missing, on_done)
+            if self.cache is not None:
+                today = date.today()
+                with self.timer.stage("写入本地缓存"):
+                    for day, day_df in fetched.items():
+                        # 当天数据可能还不完整，不写缓存
+                        if day < today:
+                            self.cache.put(key, day, day_df)
+            frames.update(fetched)
+            if tracker:
+                tracker.update(len(days), force=True)
+
+        return self.concat_days(frames, days)
+
+    def concat_days(self, frames: dict, days: list) -> pd.DataFrame:
+        # 各交易日内部已按时间排序，按日期顺序拼接即保持整体时间顺序
+        non_empty = [frames[day] for day in days if not frames[day].empty]
+        if not non_empty:
+            return frames[days[0]]
+        if len(non_empty) == 1:
+            return non_empty[0]
+        with self.timer.stage("合并数据"):
+            return pd.concat(non_empty, ignore_index=True)
+
+    def load_portfolio_stores(self, symbols: list, exchange: Exchange, start: datetime, end: datetime) -> dict:
+        # 组合回测：多个合约缓存中缺失的交易日合并为一次查询，返回 {合约: TickStore}
+        symbols = [symbol.strip().upper() for symbol in symbols]
+        days = date_range(start, end)
+        if not days:
+            empty = pd.DataFrame(columns=TICK_COLUMNS)
+            return {symbol: TickStore.from_dataframe(empty, symbol, exchange) for symbol in symbols}
+
+        frames = {symbol: {} for symbol in symbols}
+        missing = {}
+        with self.timer.stage("读取本地缓存"):
+            for symbol in symbols:
+                key = f"{symbol}.{exchange.value}"
+                for day in days:
+                    df = self.cache.get(key, day) if self.cache is not None else None
+                    if df is None:
+                        missing.setdefault(symbol, []).append(day)
+                    else:
+                        frames[symbol][day] = df
+
+        if missing:
+            missing_days = sorted({day for symbol_days in missing.values() for day in symbol_days})
+            df = self.run_query(self.build_portfolio_query(list(missing), exchange, missing_days), missing_days)
+            today = date.today()
+            for symbol, symbol_days in missing.items():
+                symbol_df = df.loc[symbol_mask(df, symbol, exchange), TICK_COLUMNS].reset_index(drop=True)
+                fetched = split_by_day(symbol_df, missing_days)
+                for day in symbol_days:
+                    frames[symbol][day] = fetched[day]
+                    if self.cache is not None and day < today:
+                        with self.timer.stage("写入本地缓存"):
+                            self.cache.put(f"{symbol}.{exchange.value}", day, fetched[day])
+
+        stores = {}
+        for symbol in symbols:
+            df = self.concat_days(frames[symbol], days)
+            with self.timer.stage("转换为TickStore"):
+                stores[symbol] = TickStore.from_dataframe(df, symbol, exchange)
+        return stores
+
+    def load_bar_dataframe(self, symbol: str, exchange: Exchange, start: datetime, end: datetime, resolution: str,
+                           push_down: bool = True) -> pd.DataFrame:
+        # K 线按周期逐日缓存；缺失的交易日若 tick 已在本地缓存则在本地聚合，否则 push_down 时由 DolphinDB 聚合后
+        # 只传回 K 线，不 push_down 时先加载（并缓存）tick 再在本地聚合
+        symbol = symbol.strip().upper()
+        days = date_range(start, end)
+        if not days:
+            return empty_bars()
+
+        key = f"{symbol}.{exchange.value}"
+        bar_key = bar_cache_key(key, resolution)
+        frames = {}
+        missing = []
+        with self.timer.stage("读取本地缓存"):
+            for day in days:
+                df = self.cache.get(bar_key, day) if self.cache is not None else None
+                if df is None:
+                    missing.append(day)
+                else:
+                    frames[day] = df
+
+        remote = []
+        for day in missing:
+            with self.timer.stage("读取本地缓存"):
+                tick_df = self.cache.get(key, day) if self.cache is not None else None
+            if tick_df is None:
+                remote.append(day)
+                continue
+            with self.timer.stage("聚合K线"):
+                frames[day] = bars_from_tick_dataframe(tick_df, resolution)
+
+        if remote:
+            if push_down:
+                script = self.build_bar_query(symbol, exchange, remote, resolution)
+                df = self.run_query(script, remote, f"根{resolution}K线")
+            else:
+                tick_df = self.load_days(symbol, exchange, remote)
+                with self.timer.stage("聚合K线"):
+                    df = bars_from_tick_dataframe(tick_df, resolution)
+            frames.update(split_by_day(df, remote))
+
+        if self.cache is not None:
+            today = date.today()
+            with self.timer.stage("写入本地缓存"):
+                for day in missing:
+                    if day < today:
+                        self.cache.put(bar_key, day, frames[day])
+
+        self.timer.count("K线数", sum(len(frames[day]) for day in days))
+        return self.concat_days(frames, days)
+
+    def load_bars(self, symbol: str, exchange: Exchange, start: datetime, end: datetime, resolution: str,
+                  push_down: bool = True) -> list:
+        df = self.load_bar_dataframe(symbol, exchange, start, end, resolution, push_down)
+        with self.timer.stage("转换为BarData"):
+            return df_to_bars(df, symbol.strip().upper(), exchange, resolution)
+
+    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
+        df = self.load_tick_dataframe(symbol, exchange, start, end)
+        with self.timer.stage("转换为TickData"):
+            return df_to_ticks(df, symbol, exchange)
+
+    def load_tick_store(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> TickStore:
+        # 列式存储，内存占用远小于 TickData 列表，回放时才逐块生成 tick
+        df = self.load_tick_dataframe(symbol, exchange, start, end)
+        with self.timer.stage("转换为TickStore"):
+            return TickStore.from_dataframe(df, symbol, exchange)
+
+    def export_tick_file(self, symbol: str, exchange: Exchange, start: datetime, end: datetime, path):
+        # 导出为定长记录文件，多个回测进程可用 MmapTickFeed 只读映射同一份数据，不再各自查询和转换
+        return write_tick_file(path, self.load_tick_store(symbol.strip().upper(), exchange, start, end))
+
+    def load_day(self, symbol: str, exchange: Exchange, day: date):
+        df = self.load_days(symbol, exchange, [day])
+        with self.timer.stage("转换为TickData"):
+            return df_to_ticks(df, symbol, exchange)
+
+    def iter_tick_days(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
+        # 按交易日（分区）逐天查询，每次只在内存中保留一天的数据
+        days = date_range(start, end)
+        tracker = ProgressTracker(len(days), self.progress) if self.progress and days else None
+        for i, (day, ticks) in enumerate(self.prefetch_days(symbol, exchange, days)):
+            if tracker:
+                tracker.update(i + 1, force=True)
+            yield day, ticks
+
+    def prefetch_days(self, symbol: str, exchange: Exchange, days: list):
+        if self.max_workers <= 1:
+            for day in days:
+                yield day, self.load_day(symbol, exchange, day)
+            return
+
+        # 并发预取后续最多 max_workers 天，仍按日期顺序产出
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for day in days:
+                pending.append((day, executor.submit(self.load_day, symbol, exchange, day)))
+                if len(pending) >= self.max_workers:
+                    ready_day, future = pending.popleft()
+                    yield ready_day, future.result()
+            while pending:
+                ready_day, future = pending.popleft()
+                yield ready_day, future.result()
+
+    def iter_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
+        for _, ticks in self.iter_tick_days(symbol, exchange, start, end):
+            yield from ticks
+            # 查询下一天之前释放当天数据
+            del ticks
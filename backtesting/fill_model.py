@@ -0,0 +1,172 @@
+# 盘口成交模型：BacktestingEngine 默认对价可成交即全部成交，这里按对手方一档挂单量限制每个 tick 的成交量，
+# 未成交部分留在委托簿中由后续 tick 继续撮合（部分成交），并可设置委托到达交易所的延迟；同时记录 TCA（交易成本分析）数据
+from datetime import timedelta
+
+import numpy as np
+from vnpy.trader.constant import Direction, Status
+from vnpy.trader.object import TradeData
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+
+# TCA 指标的中文名称，GUI 与命令行输出共用
+TCA_TRANSLATIONS = {
+    "order_count": "委托笔数",
+    "filled_order_count": "全部成交委托数",
+    "partial_order_count": "部分成交委托数",
+    "fill_rate": "成交率(%)",
+    "average_fills": "平均成交笔数",
+    "average_fill_delay": "平均成交延迟(秒)",
+    "max_fill_delay": "最大成交延迟(秒)",
+    "shortfall_per_lot": "每手执行成本(价格)",
+    "shortfall_cost": "执行成本(金额)",
+}
+
+
+class OrderBookBacktestingEngine(BacktestingEngine):
+    # latency_ticks：委托在发出后第几个 tick 起才参与撮合（0 与默认引擎相同，即下一个 tick）
+    # latency_ms：委托发出后经过多少毫秒才参与撮合，两种延迟同时设置时都需满足
+    # volume_ratio：每个 tick 最多成交一档挂单量的比例，1 表示可吃掉整档
+    def __init__(self, latency_ticks: int = 0, latency_ms: float = 0, volume_ratio: float = 1.0):
+        super().__init__()
+        self.latency_ticks = int(latency_ticks)
+        self.latency = timedelta(milliseconds=latency_ms)
+        self.volume_ratio = volume_ratio
+        self.tick_index = 0
+        # 委托可参与撮合的最早 (tick 序号, 时间)
+        self.order_ready = {}
+        # 本方向已在同一档价格上成交的数量：盘口快照不会因回测成交而减少，价格不变时需扣除已用掉的量
+        self.consumed = {Direction.LONG: (0.0, 0.0), Direction.SHORT: (0.0, 0.0)}
+        # vt_orderid -> TCA 记录
+        self.tca = {}
+
+    def clear_data(self) -> None:
+        super().clear_data()
+        self.tick_index = 0
+        self.order_ready.clear()
+        self.consumed = {Direction.LONG: (0.0, 0.0), Direction.SHORT: (0.0, 0.0)}
+        self.tca.clear()
+
+    def send_limit_order(self, direction: Direction, offset, price: float, volume: float) -> str:
+        vt_orderid = super().send_limit_order(direction, offset, price, volume)
+        tick = self.tick
+        self.order_ready[vt_orderid] = (self.tick_index + self.latency_ticks, self.datetime + self.latency)
+
+        # 到达价：下单时的买卖一档中间价，一侧缺失时取最新价
+        if tick.ask_price_1 > 0 and tick.bid_price_1 > 0:
+            arrival = (tick.ask_price_1 + tick.bid_price_1) / 2
+        else:
+            arrival = tick.last_price
+        self.tca[vt_orderid] = {
+            "direction": direction,
+            "price": price,
+            "volume": volume,
+            "arrival": arrival,
+            "sent": self.datetime,
+            "traded": 0.0,
+            "amount": 0.0,
+            "fills": 0,
+            "last_fill": None,
+        }
+        return vt_orderid
+
+    def cancel_limit_order(self, strategy, vt_orderid: str) -> None:
+        super().cancel_limit_order(strategy, vt_orderid)
+        self.order_ready.pop(vt_orderid, None)
+
+    def cross_limit_order(self) -> None:
+        # 每个 tick 调用一次，顺带计数（不重写 new_tick，少一层调用）
+        self.tick_index += 1
+        tick = self.tick
+        ask, bid = tick.ask_price_1, tick.bid_price_1
+        # 盘口价格变化后上一档的已用量不再有效
+        if self.consumed[Direction.LONG][0] != ask:
+            self.consumed[Direction.LONG] = (ask, 0.0)
+        if self.consumed[Direction.SHORT][0] != bid:
+            self.consumed[Direction.SHORT] = (bid, 0.0)
+        if not self.active_limit_orders:
+            return
+
+        for order in list(self.active_limit_orders.values()):
+            if order.status == Status.SUBMITTING:
+                order.status = Status.NOTTRADED
+                self.strategy.on_order(order)
+
+            ready_index, ready_time = self.order_ready[order.vt_orderid]
+            if self.tick_index <= ready_index or self.datetime < ready_time:
+                continue
+
+            if order.direction == Direction.LONG:
+                if not (0 < ask <= order.price):
+                    continue
+                trade_price, book_volume = min(order.price, ask), tick.ask_volume_1
+            else:
+                if not (bid > 0 and order.price <= bid):
+                    continue
+                trade_price, book_volume = max(order.price, bid), tick.bid_volume_1
+
+            # 一档挂单量扣除本回测在该价位已成交的数量，按整手成交，不足一手时本 tick 不成交
+            level_price, used = self.consumed[order.direction]
+            volume = float(min(order.volume - order.traded, np.floor(book_volume * self.volume_ratio - used)))
+            if volume <= 0:
+                continue
+            self.consumed[order.direction] = (level_price, used + volume)
+
+            order.traded += volume
+            if order.traded >= order.volume:
+                order.status = Status.ALLTRADED
+                self.active_limit_orders.pop(order.vt_orderid, None)
+                self.order_ready.pop(order.vt_orderid, None)
+            else:
+                order.status = Status.PARTTRADED
+            self.strategy.on_order(order)
+
+            self.trade_count += 1
+            trade = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=trade_price,
+                volume=volume,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+
+            record = self.tca[order.vt_orderid]
+            record["traded"] += volume
+            record["amount"] += trade_price * volume
+            record["fills"] += 1
+            record["last_fill"] = self.datetime
+
+            self.strategy.pos += volume if order.direction == Direction.LONG else -volume
+            self.strategy.on_trade(trade)
+            self.trades[trade.vt_tradeid] = trade
+
+    def calculate_tca(self) -> dict:
+        # 按委托汇总：成交率、部分成交比例、成交延迟，以及相对到达价的执行成本（实施缺口，正数为不利）
+        records = list(self.tca.values())
+        traded = [r for r in records if r["traded"] > 0]
+        total_volume = sum(r["volume"] for r in records)
+        traded_volume = sum(r["traded"] for r in traded)
+
+        shortfall = 0.0
+        delays = []
+        for r in traded:
+            average_price = r["amount"] / r["traded"]
+            sign = 1 if r["direction"] == Direction.LONG else -1
+            shortfall += sign * (average_price - r["arrival"]) * r["traded"]
+            delays.append((r["last_fill"] - r["sent"]).total_seconds())
+
+        return {
+            "order_count": len(records),
+            "filled_order_count": sum(1 for r in records if r["traded"] >= r["volume"]),
+            "partial_order_count": sum(1 for r in records if 0 < r["traded"] < r["volume"]),
+            "fill_rate": traded_volume / total_volume * 100 if total_volume else 0.0,
+            "average_fills": sum(r["fills"] for r in traded) / len(traded) if traded else 0.0,
+            "average_fill_delay": float(np.mean(delays)) if delays else 0.0,
+            "max_fill_delay": max(delays) if delays else 0.0,
+            "shortfall_per_lot": shortfall / traded_volume if traded_volume else 0.0,
+            "shortfall_cost": shortfall * self.size,
+        }
+
@@ -0,0 +1,142 @@
+import math
+from collections import deque
+
+
+class RollingWindow:
+    # 定长环形缓冲区：写入新值时覆盖最旧的值，避免 list.pop(0) 的 O(n) 搬移
+    def __init__(self, size: int):
+        self.size = int(size)
+        self.values = [0.0] * self.size
+        self.index = 0
+        self.count = 0
+
+    @property
+    def inited(self) -> bool:
+        return self.count >= self.size
+
+    def push(self, value: float):
+        # 返回被挤出的旧值，窗口未满时返回 None
+        old = self.values[self.index] if self.count >= self.size else None
+        self.values[self.index] = value
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        if self.count < self.size:
+            self.count += 1
+        return old
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        # 按写入先后顺序遍历
+        if self.count < self.size:
+            return iter(self.values[:self.count])
+        return iter(self.values[self.index:] + self.values[:self.index])
+
+
+class RollingSum:
+    # O(1) 滚动求和；每写满一轮用缓冲区重新求和一次，消除浮点累计误差（均摊仍为 O(1)）
+    def __init__(self, size: int):
+        self.window = RollingWindow(size)
+        self.total = 0.0
+
+    @property
+    def inited(self) -> bool:
+        return self.window.inited
+
+    def update(self, value: float) -> float:
+        old = self.window.push(value)
+        if old is None:
+            self.total += value
+        else:
+            self.total += value - old
+
+        if self.window.index == 0:
+            self.total = sum(self.window.values)
+        return self.total
+
+
+class RollingMean(RollingSum):
+    @property
+    def mean(self) -> float:
+        if not self.window.count:
+            return 0.0
+        return self.total / self.window.count
+
+    def update(self, value: float) -> float:
+        super().update(value)
+        return self.mean
+
+
+class RollingMin:
+    # 滑动窗口最小值：单调递增队列保存 (序号, 值)，队首即窗口内最小值，每次更新均摊 O(1)
+    def __init__(self, size: int):
+        self.size = int(size)
+        self.queue = deque()
+        self.count = 0
+
+    @property
+    def inited(self) -> bool:
+        return self.count >= self.size
+
+    @property
+    def min(self) -> float:
+        return self.queue[0][1] if self.queue else math.inf
+
+    def update(self, value: float) -> float:
+        queue = self.queue
+        while queue and queue[-1][1] >= value:
+            queue.pop()
+        queue.append((self.count, value))
+        # 窗口为最近 size 个值，每次最多有一个旧值移出窗口
+        if queue[0][0] <= self.count - self.size:
+            queue.popleft()
+        self.count += 1
+        return queue[0][1]
+
+
+class RollingVariance:
+    # O(1) 滚动均值与总体方差（除以 n）：均值取自滚动和，平方偏差和 m2 按 Welford 滑窗公式增量更新
+    def __init__(self, size: int):
+        self.sum = RollingSum(size)
+        self.m2 = 0.0
+
+    @property
+    def inited(self) -> bool:
+        return self.sum.inited
+
+    @property
+    def window(self) -> RollingWindow:
+        return self.sum.window
+
+    @property
+    def mean(self) -> float:
+        count = self.window.count
+        return self.sum.total / count if count else 0.0
+
+    @property
+    def variance(self) -> float:
+        count = self.window.count
+        return max(self.m2, 0.0) / count if count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def update(self, value: float) -> float:
+        old_mean = self.mean
+        old = self.window.values[self.window.index] if self.window.inited else None
+        self.sum.update(value)
+        new_mean = self.mean
+
+        if old is None:
+            # 窗口未满：标准 Welford 增量
+            self.m2 += (value - old_mean) * (value - new_mean)
+        else:
+            # 窗口已满：新值替换最旧值
+            self.m2 += (value - old) * (value - new_mean + old - old_mean)
+
+        if self.window.index == 0:
+            self.m2 = sum((v - new_mean) ** 2 for v in self.window.values)
+        return self.variance
@@ -0,0 +1,116 @@
+# 逐 tick 盯市：vnpy 的 calculate_result 只按日结算，日内回撤看不到；这里用成交记录和 tick 价格数组，
+# 以 NumPy 累加运算计算每个 tick 的持仓、盯市资金（扣除手续费和滑点）与回撤，按块处理，临时数组大小与总 tick 数无关；
+# 每个交易日最后一个 tick 的资金与逐日结果的 balance 一致
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from vnpy.trader.constant import Direction
+
+from chart_data import DEFAULT_POINTS, min_max
+
+# 每次处理的 tick 数：每块约十几个同长度的临时数组，26 万条时峰值约 20MB，与总 tick 数无关
+EQUITY_CHUNK_SIZE = 262_144
+
+
+def trade_arrays(trades: list, times: np.ndarray, size: float, rate: float, slippage: float) -> tuple:
+    # 返回 (成交所在 tick 下标, 持仓变化, 现金变化)，按下标排序；成交时间即撮合该成交的 tick 的时间
+    trade_times = np.array([trade.datetime for trade in trades], dtype="datetime64[us]")
+    price = np.array([trade.price for trade in trades], dtype=float)
+    volume = np.array([trade.volume for trade in trades], dtype=float)
+    sign = np.array([1.0 if trade.direction == Direction.LONG else -1.0 for trade in trades])
+
+    index = np.maximum(np.searchsorted(times, trade_times, side="right") - 1, 0)
+    # 与 vnpy 逐日结算相同：手续费按成交额 * rate，滑点按手数 * 合约乘数 * slippage
+    cash = -sign * volume * price * size - price * volume * size * rate - volume * size * slippage
+    order = np.argsort(index, kind="stable")
+    return index[order], (sign * volume)[order], cash[order]
+
+
+def intraday_equity(times: np.ndarray, prices: np.ndarray, trades: list, size: float, rate: float,
+                    slippage: float, capital: float, points: int = DEFAULT_POINTS,
+                    chunk_size: int = EQUITY_CHUNK_SIZE) -> tuple:
+    # 返回 (统计指标, 降采样后的逐 tick 序列 DataFrame[datetime, balance, drawdown, pos])
+    # 序列每块按最小/最大值保留约 points 个点（资金和回撤的极值都保留），用于画图和导出
+    n = len(times)
+    times = np.asarray(times, dtype="datetime64[us]")
+    if not n:
+        return {}, pd.DataFrame(columns=["datetime", "balance", "drawdown", "pos"])
+
+    if trades:
+        trade_index, trade_pos, trade_cash = trade_arrays(trades, times, size, rate, slippage)
+    else:
+        trade_index = np.empty(0, dtype=np.int64)
+        trade_pos = trade_cash = np.empty(0)
+    buckets_per_tick = points / 2 / n
+
+    pos = cash = 0.0
+    peak = capital
+    last_price = 0.0
+    max_drawdown = max_ddpercent = 0.0
+    drawdown_index = 0
+    min_balance = np.inf
+    max_position = max_exposure = 0.0
+    samples = []
+    for begin in range(0, n, chunk_size):
+        end = min(begin + chunk_size, n)
+        # 最新价为 0 的 tick 沿用上一个有效价格
+        price = np.asarray(prices[begin:end], dtype=float)
+        valid = np.where(price > 0, np.arange(len(price)), -1)
+        np.maximum.accumulate(valid, out=valid)
+        price = np.where(valid >= 0, price[np.maximum(valid, 0)], last_price)
+        last_price = price[-1]
+
+        # 本块内的成交累加到所在 tick，再累计求和得到每个 tick 的持仓和现金
+        lo, hi = np.searchsorted(trade_index, [begin, end])
+        position = np.zeros(end - begin)
+        flow = np.zeros(end - begin)
+        np.add.at(position, trade_index[lo:hi] - begin, trade_pos[lo:hi])
+        np.add.at(flow, trade_index[lo:hi] - begin, trade_cash[lo:hi])
+        position = pos + np.cumsum(position)
+        flow = cash + np.cumsum(flow)
+
+        balance = capital + flow + position * price * size
+        high = np.maximum.accumulate(np.maximum(balance, peak))
+        drawdown = balance - high
+        ddpercent = drawdown / high * 100
+
+        i = int(np.argmin(drawdown))
+        if drawdown[i] < max_drawdown:
+            max_drawdown, drawdown_index = drawdown[i], begin + i
+        max_ddpercent = min(max_ddpercent, ddpercent.min())
+        min_balance = min(min_balance, balance.min())
+        max_position = max(max_position, np.abs(position).max())
+        max_exposure = max(max_exposure, (np.abs(position) * price).max() * size)
+
+        buckets = max(int(round((end - begin) * buckets_per_tick)), 1)
+        index = np.union1d(min_max(balance, buckets), min_max(drawdown, buckets))
+        samples.append((times[begin:end][index], balance[index], drawdown[index], position[index]))
+
+        pos, cash, peak = position[-1], flow[-1], high[-1]
+
+    statistics = {
+        "intraday_max_drawdown": float(max_drawdown),
+        "intraday_max_ddpercent": float(max_ddpercent),
+        "intraday_max_drawdown_time": times[drawdown_index].astype(datetime),
+        "intraday_min_balance": float(min_balance),
+        "intraday_max_position": float(max_position),
+        "intraday_max_exposure": float(max_exposure),
+    }
+    series = pd.DataFrame({
+        name: np.concatenate([sample[i] for sample in samples])
+        for i, name in enumerate(["datetime", "balance", "drawdown", "pos"])
+    })
+    return statistics, series
+
+
+def calculate_intraday(engine, store=None, points: int = DEFAULT_POINTS, chunk_size: int = EQUITY_CHUNK_SIZE):
+    # store 为回放用的 TickStore（默认 engine.history_data），引擎参数取自 set_parameters；
+    # 数据不是 TickStore（流式回放的生成器、K 线列表）时返回 None
+    store = engine.history_data if store is None else store
+    if not hasattr(store, "last_price"):
+        return None
+    return intraday_equity(
+        store.datetime, store.last_price, engine.get_all_trades(),
+        engine.size, engine.rate, engine.slippage, engine.capital, points, chunk_size
+    )
@@ -0,0 +1,416 @@
+# 编译型逐 tick 内核：状态依赖逐笔推进的策略（交易间隔、入场价、EMA 递推）按交易日整段处理 tick 数组，
+# 逐 tick 复现策略 on_tick 与 BacktestingEngine 的限价单撮合，返回下单意图和成交；装有 numba 时 JIT 编译，否则按纯 Python 运行
+import math
+
+import numpy as np
+from vnpy.trader.constant import Direction, Offset
+
+from tick_backtest_runner import create_engine
+from vector_backtest import backtest_results
+from strategies import DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # 未安装 numba：保持原函数，结果相同，只是没有编译加速
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# 方向与开平的数值编码
+LONG = 1.0
+SHORT = -1.0
+OPEN = 0.0
+CLOSE = 1.0
+DIRECTIONS = {LONG: Direction.LONG, SHORT: Direction.SHORT}
+OFFSETS = {OPEN: Offset.OPEN, CLOSE: Offset.CLOSE}
+
+# 最多同时挂着的未成交委托数
+MAX_PENDING = 65_536
+
+# 各内核共用的整数状态：istate[0] 为未成交委托数
+N_PENDING = 0
+
+
+@njit(cache=True)
+def cross_orders(i, offset, ask, bid, orders, n_orders, fills, n_fills):
+    # 与 BacktestingEngine.cross_limit_order 一致：按下单顺序检查挂单，对价到达委托价即全部成交，成交价取两者中更优者
+    # orders[k] = (方向, 开平, 价格, 数量)；fills[k] = (全局 tick 下标, 方向, 开平, 成交价, 数量)
+    kept = 0
+    for k in range(n_orders):
+        direction = orders[k, 0]
+        price = orders[k, 2]
+        if direction > 0 and ask[i] > 0 and price >= ask[i]:
+            trade_price = min(price, ask[i])
+        elif direction < 0 and bid[i] > 0 and price <= bid[i]:
+            trade_price = max(price, bid[i])
+        else:
+            if kept != k:
+                orders[kept, :] = orders[k, :]
+            kept += 1
+            continue
+
+        fills[n_fills, 0] = offset + i
+        fills[n_fills, 1] = direction
+        fills[n_fills, 2] = orders[k, 1]
+        fills[n_fills, 3] = trade_price
+        fills[n_fills, 4] = orders[k, 3]
+        n_fills += 1
+    return kept, n_fills
+
+
+@njit(cache=True)
+def send_order(i, offset, direction, order_offset, price, volume, pricetick, orders, n_orders, intents, n_intents):
+    # 委托价按最小变动价位取整（同 round_to），挂入未成交队列并记录下单意图
+    if n_orders >= orders.shape[0]:
+        raise ValueError("too many pending orders")
+    price = round(price / pricetick) * pricetick
+    orders[n_orders, 0] = direction
+    orders[n_orders, 1] = order_offset
+    orders[n_orders, 2] = price
+    orders[n_orders, 3] = volume
+    intents[n_intents, 0] = offset + i
+    intents[n_intents, 1] = direction
+    intents[n_intents, 2] = order_offset
+    intents[n_intents, 3] = price
+    intents[n_intents, 4] = volume
+    return n_orders + 1, n_intents + 1
+
+
+@njit(cache=True)
+def rolling_sum_update(values, total, index, count, value):
+    # 同 indicators.RollingSum.update：环形缓冲区滚动求和，每写满一轮重新求和一次
+    size = values.shape[0]
+    if count >= size:
+        total += value - values[index]
+    else:
+        total += value
+        count += 1
+    values[index] = value
+    index += 1
+    if index == size:
+        index = 0
+    if index == 0:
+        total = 0.0
+        for v in values:
+            total += v
+    return total, index, count
+
+
+@njit(cache=True)
+def double_ma_kernel(times, price, ask, bid, offset, params, fstate, istate,
+                     fast_values, slow_values, orders, intents, fills):
+    # params: fast_window, slow_window, min_trade_interval, min_price_move, contract_size, margin_rate, pricetick
+    # fstate: pos, has_traded, last_trade_time(us), last_entry_price, current_capital, fast_total, slow_total
+    # istate: n_pending, fast_index, fast_count, slow_index, slow_count
+    fast_window, slow_window = params[0], params[1]
+    interval, move, contract_size, margin_rate, pricetick = params[2], params[3], params[4], params[5], params[6]
+    pos, has_traded, last_trade, entry, capital = fstate[0], fstate[1], fstate[2], fstate[3], fstate[4]
+    fast_total, slow_total = fstate[5], fstate[6]
+    n_orders, fast_index, fast_count, slow_index, slow_count = istate[0], istate[1], istate[2], istate[3], istate[4]
+    n_intents = 0
+    n_fills = 0
+
+    for i in range(price.shape[0]):
+        if n_orders:
+            start = n_fills
+            n_orders, n_fills = cross_orders(i, offset, ask, bid, orders, n_orders, fills, n_fills)
+            for k in range(start, n_fills):
+                pos += fills[k, 1] * fills[k, 4]
+                # 同策略 on_trade：按成交金额增减 current_capital
+                capital += fills[k, 1] * fills[k, 3] * fills[k, 4] * contract_size
+
+        p = price[i]
+        fast_total, fast_index, fast_count = rolling_sum_update(fast_values, fast_total, fast_index, fast_count, p)
+        slow_total, slow_index, slow_count = rolling_sum_update(slow_values, slow_total, slow_index, slow_count, p)
+        if slow_count < slow_window:
+            continue
+
+        fast_ma = fast_total / fast_window
+        slow_ma = slow_total / slow_window
+
+        now = times[i]
+        if has_traded and (now - last_trade) / 1_000_000 < interval:
+            continue
+
+        margin_per = p * contract_size * margin_rate
+        max_lots = math.trunc(capital / margin_per)
+        if max_lots <= 0:
+            continue
+
+        if fast_ma > slow_ma and pos <= 0:
+            if entry == 0 or (p - entry) >= move:
+                n_orders, n_intents = send_order(i, offset, LONG, OPEN, p, max_lots, pricetick,
+                                                 orders, n_orders, intents, n_intents)
+                has_traded, last_trade, entry = 1.0, now, p
+        elif fast_ma < slow_ma and pos > 0:
+            if (entry - p) >= move:
+                n_orders, n_intents = send_order(i, offset, SHORT, CLOSE, p, pos, pricetick,
+                                                 orders, n_orders, intents, n_intents)
+                has_traded, last_trade = 1.0, now
+        elif fast_ma < slow_ma and pos >= 0:
+            if entry == 0 or (entry - p) >= move:
+                n_orders, n_intents = send_order(i, offset, SHORT, OPEN, p, max_lots, pricetick,
+                                                 orders, n_orders, intents, n_intents)
+                has_traded, last_trade, entry = 1.0, now, p
+        elif fast_ma > slow_ma and pos < 0:
+            if (p - entry) >= move:
+                n_orders, n_intents = send_order(i, offset, LONG, CLOSE, p, -pos, pricetick,
+                                                 orders, n_orders, intents, n_intents)
+                has_traded, last_trade = 1.0, now
+
+    fstate[0], fstate[1], fstate[2], fstate[3], fstate[4] = pos, has_traded, last_trade, entry, capital
+    fstate[5], fstate[6] = fast_total, slow_total
+    istate[0], istate[1], istate[2], istate[3], istate[4] = n_orders, fast_index, fast_count, slow_index, slow_count
+    return n_intents, n_fills
+
+
+@njit(cache=True)
+def macd_kernel(times, price, ask, bid, offset, params, fstate, istate, orders, intents, fills):
+    # params: fast_period, slow_period, signal_period, min_trade_interval, contract_size, margin_rate, pricetick, engine_capital
+    # fstate: pos, has_traded, last_trade_time(us), current_capital, ema_fast, ema_slow, ema_signal, last_price_low, last_hist_low
+    # istate: n_pending, tick_count（ema_fast 是否已初始化由 tick_count 判断）
+    alpha_fast = 2 / (params[0] + 1)
+    alpha_slow = 2 / (params[1] + 1)
+    alpha_signal = 2 / (params[2] + 1)
+    interval, contract_size, margin_rate, pricetick, engine_capital = params[3], params[4], params[5], params[6], params[7]
+    pos, has_traded, last_trade, capital = fstate[0], fstate[1], fstate[2], fstate[3]
+    ema_fast, ema_slow, ema_signal, price_low, hist_low = fstate[4], fstate[5], fstate[6], fstate[7], fstate[8]
+    n_orders, tick_count = istate[0], istate[1]
+    n_intents = 0
+    n_fills = 0
+
+    for i in range(price.shape[0]):
+        if n_orders:
+            start = n_fills
+            n_orders, n_fills = cross_orders(i, offset, ask, bid, orders, n_orders, fills, n_fills)
+            for k in range(start, n_fills):
+                pos += fills[k, 1] * fills[k, 4]
+                # 同策略 on_trade：current_capital 取引擎初始资金
+                capital = engine_capital
+
+        p = price[i]
+        now = times[i]
+        if tick_count == 0:
+            ema_fast = p
+            ema_slow = p
+            ema_signal = 0.0
+        else:
+            ema_fast = alpha_fast * p + (1 - alpha_fast) * ema_fast
+            ema_slow = alpha_slow * p + (1 - alpha_slow) * ema_slow
+        macd = ema_fast - ema_slow
+
+        if ema_signal == 0:
+            ema_signal = macd
+        else:
+            ema_signal = alpha_signal * macd + (1 - alpha_signal) * ema_signal
+        hist = macd - ema_signal
+
+        tick_count += 1
+        if tick_count < 2:
+            continue
+
+        if p < price_low:
+            price_low = p
+        if hist < hist_low:
+            hist_low = hist
+
+        if not has_traded or (now - last_trade) / 1_000_000 >= interval:
+            if p < price_low and hist > hist_low:
+                margin_per = p * contract_size * margin_rate
+                max_lots = math.trunc(capital / margin_per)
+                if max_lots > 0:
+                    n_orders, n_intents = send_order(i, offset, LONG, OPEN, p, max_lots, pricetick,
+                                                     orders, n_orders, intents, n_intents)
+                    has_traded, last_trade = 1.0, now
+                    price_low = p
+                    hist_low = hist
+
+    fstate[0], fstate[1], fstate[2], fstate[3] = pos, has_traded, last_trade, capital
+    fstate[4], fstate[5], fstate[6], fstate[7], fstate[8] = ema_fast, ema_slow, ema_signal, price_low, hist_low
+    istate[0], istate[1] = n_orders, tick_count
+    return n_intents, n_fills
+
+
+@njit(cache=True)
+def boll_kernel(times, price, ask, bid, offset, params, fstate, istate, values, orders, intents, fills):
+    # params: window, dev_multiplier, min_trade_interval, contract_size, margin_rate, pricetick, capital
+    # fstate: pos, has_traded, last_trade_time(us), current_capital, total, m2
+    # istate: n_pending, index, count
+    window, dev, interval = params[0], params[1], params[2]
+    contract_size, margin_rate, pricetick, strategy_capital = params[3], params[4], params[5], params[6]
+    pos, has_traded, last_trade, capital, total, m2 = fstate[0], fstate[1], fstate[2], fstate[3], fstate[4], fstate[5]
+    n_orders, index, count = istate[0], istate[1], istate[2]
+    n_intents = 0
+    n_fills = 0
+
+    for i in range(price.shape[0]):
+        if n_orders:
+            start = n_fills
+            n_orders, n_fills = cross_orders(i, offset, ask, bid, orders, n_orders, fills, n_fills)
+            for k in range(start, n_fills):
+                pos += fills[k, 1] * fills[k, 4]
+                # 同策略 on_trade：current_capital 恢复为初始资金参数
+                capital = strategy_capital
+
+        p = price[i]
+        now = times[i]
+
+        # 同 indicators.RollingVariance.update
+        old_mean = total / count if count else 0.0
+        inited = count >= window
+        old = values[index]
+        total, index, count = rolling_sum_update(values, total, index, count, p)
+        new_mean = total / count
+        if inited:
+            m2 += (p - old) * (p - new_mean + old - old_mean)
+        else:
+            m2 += (p - old_mean) * (p - new_mean)
+        if index == 0:
+            m2 = 0.0
+            for v in values:
+                m2 += (v - new_mean) ** 2
+
+        if count < window:
+            continue
+
+        mean = new_mean
+        std = math.sqrt(max(m2, 0.0) / count)
+        upper = mean + dev * std
+        lower = mean - dev * std
+
+        if has_traded and (now - last_trade) / 1_000_000 < interval:
+            continue
+
+        margin_per = p * contract_size * margin_rate
+        max_lots = math.trunc(capital / margin_per)
+        if max_lots <= 0:
+            continue
+
+        if p > upper and pos <= 0:
+            n_orders, n_intents = send_order(i, offset, LONG, OPEN, p, max_lots, pricetick,
+                                             orders, n_orders, intents, n_intents)
+            has_traded, last_trade = 1.0, now
+        elif p < lower and pos >= 0:
+            n_orders, n_intents = send_order(i, offset, SHORT, OPEN, p, max_lots, pricetick,
+                                             orders, n_orders, intents, n_intents)
+            has_traded, last_trade = 1.0, now
+
+    fstate[0], fstate[1], fstate[2], fstate[3], fstate[4], fstate[5] = pos, has_traded, last_trade, capital, total, m2
+    istate[0], istate[1], istate[2] = n_orders, index, count
+    return n_intents, n_fills
+
+
+class KernelStrategy:
+    # 持有跨交易日延续的内核状态；run_day 处理一天的 tick 数组，返回当天的下单意图和成交（N x 5 数组）
+    strategy_class = None
+
+    def __init__(self, setting: dict, engine):
+        for name in self.strategy_class.parameters:
+            setattr(self, name, setting.get(name, getattr(self.strategy_class, name)))
+        self.pricetick = engine.pricetick
+        self.engine_capital = engine.capital
+        self.orders = np.zeros((MAX_PENDING, 4))
+
+    def run_day(self, times, price, ask, bid, offset: int) -> tuple:
+        n = len(price)
+        intents = np.empty((n, 5))
+        fills = np.empty((int(self.istate[N_PENDING]) + n, 5))
+        n_intents, n_fills = self.kernel(times, price, ask, bid, offset, intents, fills)
+        return intents[:n_intents], fills[:n_fills]
+
+
+class DoubleMaKernel(KernelStrategy):
+    strategy_class = DynamicTickDoubleMaStrategy
+
+    def __init__(self, setting: dict, engine):
+        super().__init__(setting, engine)
+        self.params = np.array([
+            self.fast_window, self.slow_window, self.min_trade_interval, self.min_price_move,
+            self.contract_size, self.margin_rate, self.pricetick
+        ], dtype=float)
+        self.fstate = np.array([0, 0, 0, 0, self.capital, 0, 0], dtype=float)
+        self.istate = np.zeros(5, dtype=np.int64)
+        self.fast_values = np.zeros(self.fast_window)
+        self.slow_values = np.zeros(self.slow_window)
+
+    def kernel(self, times, price, ask, bid, offset, intents, fills):
+        return double_ma_kernel(times, price, ask, bid, offset, self.params, self.fstate, self.istate,
+                                self.fast_values, self.slow_values, self.orders, intents, fills)
+
+
+class MacdKernel(KernelStrategy):
+    strategy_class = MacdDivergenceTickStrategy
+
+    def __init__(self, setting: dict, engine):
+        super().__init__(setting, engine)
+        self.params = np.array([
+            self.fast_period, self.slow_period, self.signal_period, self.min_trade_interval,
+            self.contract_size, self.margin_rate, self.pricetick, self.engine_capital
+        ], dtype=float)
+        self.fstate = np.array([0, 0, 0, self.capital, 0, 0, 0, np.inf, np.inf], dtype=float)
+        self.istate = np.zeros(2, dtype=np.int64)
+
+    def kernel(self, times, price, ask, bid, offset, intents, fills):
+        return macd_kernel(times, price, ask, bid, offset, self.params, self.fstate, self.istate,
+                           self.orders, intents, fills)
+
+
+class BollKernel(KernelStrategy):
+    strategy_class = TickDynamicBollChannelStrategy
+
+    def __init__(self, setting: dict, engine):
+        super().__init__(setting, engine)
+        self.params = np.array([
+            self.window, self.dev_multiplier, self.min_trade_interval,
+            self.contract_size, self.margin_rate, self.pricetick, self.capital
+        ], dtype=float)
+        self.fstate = np.array([0, 0, 0, self.capital, 0, 0], dtype=float)
+        self.istate = np.zeros(3, dtype=np.int64)
+        self.values = np.zeros(self.window)
+
+    def kernel(self, times, price, ask, bid, offset, intents, fills):
+        return boll_kernel(times, price, ask, bid, offset, self.params, self.fstate, self.istate,
+                           self.values, self.orders, intents, fills)
+
+
+KERNEL_STRATEGIES = {
+    DynamicTickDoubleMaStrategy: DoubleMaKernel,
+    MacdDivergenceTickStrategy: MacdKernel,
+    TickDynamicBollChannelStrategy: BollKernel,
+}
+
+
+def day_bounds(store) -> list:
+    days = store.datetime.astype("datetime64[D]")
+    starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1]))) if len(days) else np.array([], int)
+    ends = np.concatenate((starts[1:], [len(days)]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def run_kernel_backtest(strategy_class, setting: dict, store, engine_settings: dict):
+    # 逐交易日调用编译内核，成交汇总后逐日盯市；返回 (engine, daily_df, statistics)，与事件驱动回测结果一致
+    if strategy_class not in KERNEL_STRATEGIES:
+        raise ValueError(f"{strategy_class.__name__} 没有编译内核")
+
+    engine = create_engine(**engine_settings)
+    engine.output = lambda msg: None
+    strategy = KERNEL_STRATEGIES[strategy_class](setting, engine)
+    times = store.datetime.astype("datetime64[us]").astype(np.int64)
+
+    trades = []
+    for start, end in day_bounds(store):
+        _, fills = strategy.run_day(
+            times[start:end],
+            np.ascontiguousarray(store.last_price[start:end]),
+            np.ascontiguousarray(store.ask_price_1[start:end]),
+            np.ascontiguousarray(store.bid_price_1[start:end]),
+            start
+        )
+        for index, direction, offset, price, volume in fills.tolist():
+            trades.append((int(index), DIRECTIONS[direction], OFFSETS[offset], price, volume))
+    return backtest_results(engine, store, trades)
@@ -0,0 +1,62 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_LOG_DIR = Path(__file__).resolve().parent / "logs"
+# 等待界面取走的日志条数上限：回放快于界面刷新时丢弃较早的积压（文件中仍完整保留），内存不随回放长度增长
+DEFAULT_MAX_PENDING = 5000
+
+# 日志级别沿用 logging 的数值，便于按级别过滤
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+
+class LogBuffer:
+    # 线程安全的日志缓冲：工作线程只做追加，界面定时器批量取走再刷新到视图；
+    # 每条日志同时完整写入日志文件，视图侧可以放心截断
+    def __init__(self, path=None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.pending = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.path = Path(path) if path else None
+        self.file = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def for_session(cls, log_dir=DEFAULT_LOG_DIR):
+        return cls(Path(log_dir) / f"backtest_{datetime.now():%Y%m%d_%H%M%S}.log")
+
+    def write(self, msg, level: int = logging.INFO) -> None:
+        line = f"{logging.getLevelName(level)}\t{msg}"
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append((level, line))
+            if self.file:
+                self.file.write(f"{datetime.now()}\t{line}\n")
+
+    def drain(self) -> list:
+        # 取走当前积压的全部日志 [(level, line)]；积压超过上限丢弃过日志时，开头附一条提示
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+            if self.file:
+                self.file.flush()
+        if dropped:
+            lines.insert(0, (logging.WARNING, f"WARNING\t日志积压过多，省略了 {dropped} 条较早的日志，完整日志见 {self.path}"))
+        return lines
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,77 @@
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from vnpy.trader.constant import Exchange
+
+from tick_store import TICK_FIELDS, TickStore
+
+# 定长记录格式：一条 tick 一条记录，文件即 .npy 数组，可被多个进程只读映射、共享同一份页缓存
+TICK_DTYPE = np.dtype([("datetime", "datetime64[us]")] + [(name, "f8") for name in TICK_FIELDS])
+
+
+def meta_path(path: Path) -> Path:
+    # 合约信息写在同名 .json 中
+    return path.with_suffix(".json")
+
+
+def write_tick_file(path, store: TickStore) -> Path:
+    path = Path(path).with_suffix(".npy")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    records = np.empty(len(store), dtype=TICK_DTYPE)
+    records["datetime"] = store.datetime
+    for name, array in store.columns().items():
+        records[name] = array
+
+    # 先写临时文件再改名，正在映射旧文件的进程不受影响
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, records)
+    os.replace(tmp_path, path)
+
+    with open(meta_path(path), "w", encoding="utf-8") as f:
+        json.dump({"symbol": store.symbol, "exchange": store.exchange.value, "count": len(store)}, f)
+    return path
+
+
+def open_tick_file(path) -> TickStore:
+    # 只读内存映射：打开文件几乎没有开销，数据在回放时按需从页缓存读入
+    path = Path(path).with_suffix(".npy")
+    with open(meta_path(path), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    records = np.load(path, mmap_mode="r")
+    if records.dtype != TICK_DTYPE:
+        raise ValueError(f"{path} 不是 tick 文件，记录格式为 {records.dtype}")
+    return TickStore(
+        meta["symbol"],
+        Exchange(meta["exchange"]),
+        records["datetime"],
+        **{name: records[name] for name in TICK_FIELDS}
+    )
+
+
+class MmapTickFeed:
+    # 从 DolphinDBTickFeed.export_tick_file 导出的文件读取 tick，接口与 DolphinDBTickFeed 的加载方法一致
+    def __init__(self, path):
+        self.path = Path(path)
+        self.store = open_tick_file(self.path)
+
+    def load_tick_store(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> TickStore:
+        store = self.store
+        if symbol.strip().upper() != store.symbol.upper() or exchange != store.exchange:
+            raise ValueError(f"{self.path} 中是 {store.symbol}.{store.exchange.value} 的数据，不是 {symbol}.{exchange.value}")
+
+        # 与 DolphinDB 查询一致按自然日取数（含结束日），返回共享映射内存的切片视图
+        bounds = np.array([start.date(), end.date() + timedelta(days=1)], dtype="datetime64[us]")
+        begin, stop = np.searchsorted(store.datetime, bounds)
+        return store[begin:stop]
+
+    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> list:
+        return list(self.load_tick_store(symbol, exchange, start, end))
+
+    def iter_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime):
+        return iter(self.load_tick_store(symbol, exchange, start, end))
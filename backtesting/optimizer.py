@@ -0,0 +1,135 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import isnan, prod
+from multiprocessing import get_context
+from pathlib import Path
+
+from vnpy.trader.optimize import OptimizationSetting
+
+from mmap_tick_feed import open_tick_file
+from tick_backtest_runner import create_engine
+from kernels import KERNEL_STRATEGIES, run_kernel_backtest
+from vector_backtest import VECTOR_STRATEGIES, run_vector_backtest
+
+# 可作为优化目标的统计指标（calculate_statistics 的键），均为越大越好
+OPTIMIZATION_TARGETS = [
+    "sharpe_ratio", "total_return", "annual_return", "total_net_pnl",
+    "return_drawdown_ratio", "ewm_sharpe", "max_ddpercent"
+]
+
+# 工作进程内共享的 tick 数据：通过进程池 initializer 每个进程只传入一次，而不是随每个任务序列化；
+# 传入 tick 文件路径时各进程只读映射同一个文件，共享一份页缓存
+_history_data = None
+
+
+def target_key(result: tuple) -> tuple:
+    # 按目标值从高到低排序的键：nan（如没有成交时的 sharpe_ratio）与任何值比较都为假，排序结果不确定，显式排在最后
+    return not isnan(result[1]), result[1]
+
+
+def init_worker(history_data) -> None:
+    global _history_data
+    if isinstance(history_data, (str, Path)):
+        history_data = open_tick_file(history_data)
+    _history_data = history_data
+
+
+def fast_backtest(strategy_class):
+    # 快速回测实现：优先向量化回测，其次逐 tick 编译内核，都不支持时返回 None
+    if strategy_class in VECTOR_STRATEGIES:
+        return run_vector_backtest
+    if strategy_class in KERNEL_STRATEGIES:
+        return run_kernel_backtest
+    return None
+
+
+def evaluate(strategy_class, setting: dict, engine_settings: dict, target_name: str, vectorized: bool = False,
+             history_data=None) -> tuple:
+    # vectorized 为 True 时使用快速回测（见 fast_backtest），结果与事件驱动回测一致，用于大范围初筛
+    # history_data 默认为进程内共享的数据，也可传入其切片（如滚动窗口）
+    _, _, statistics = backtest(strategy_class, setting, engine_settings, vectorized, history_data)
+    return setting, statistics[target_name], statistics
+
+
+def backtest(strategy_class, setting: dict, engine_settings: dict, vectorized: bool = False, history_data=None):
+    # 返回 (engine, daily_df, statistics)
+    if history_data is None:
+        history_data = _history_data
+    if vectorized:
+        if engine_settings.get("fill_model") is not None:
+            raise ValueError("快速回测按对价全部成交，不支持盘口成交模型")
+        run = fast_backtest(strategy_class)
+        if run is None:
+            raise ValueError(f"{strategy_class.__name__} 不支持快速回测")
+        return run(strategy_class, setting, history_data, engine_settings)
+
+    engine = create_engine(**engine_settings)
+    engine.output = lambda msg: None
+    engine.add_strategy(strategy_class, setting)
+    engine.history_data = history_data
+
+    engine.run_backtesting()
+    df = engine.calculate_result() if engine.daily_results else None
+    statistics = engine.calculate_statistics(output=False)
+    return engine, df, statistics
+
+
+def grid_settings(optimization_setting: OptimizationSetting) -> list:
+    return optimization_setting.generate_settings()
+
+
+def random_settings(optimization_setting: OptimizationSetting, count: int, seed=None) -> list:
+    # 从参数网格中无放回随机抽取 count 组，不展开整个网格
+    params = optimization_setting.params
+    if count >= prod(len(values) for values in params.values()):
+        return optimization_setting.generate_settings()
+
+    rng = random.Random(seed)
+    seen = set()
+    settings = []
+    while len(settings) < count:
+        combo = tuple(rng.choice(values) for values in params.values())
+        if combo in seen:
+            continue
+        seen.add(combo)
+        settings.append(dict(zip(params.keys(), combo)))
+    return settings
+
+
+def run_optimization(
+    strategy_class,
+    settings: list,
+    history_data,
+    engine_settings: dict,
+    target_name: str,
+    max_workers: int = None,
+    callback=None,
+    vectorized: bool = False
+) -> list:
+    # 多进程并行回测每组参数，结果按目标值从高到低排序，元素为 (setting, target_value, statistics)
+    if not settings:
+        return []
+    max_workers = min(max_workers or os.cpu_count(), len(settings))
+
+    # 结果按提交顺序存放，排序稳定，目标值相同时保持 settings 中的先后，与各任务完成的先后无关
+    results = [None] * len(settings)
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers,
+        mp_context=get_context("spawn"),
+        initializer=init_worker,
+        initargs=(history_data,)
+    ) as executor:
+        futures = {
+            executor.submit(evaluate, strategy_class, setting, engine_settings, target_name, vectorized): i
+            for i, setting in enumerate(settings)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if callback:
+                callback(done, len(settings))
+
+    results.sort(reverse=True, key=target_key)
+    return results
@@ -0,0 +1,144 @@
+# 组合回测：多个合约的 tick 按时间归并为一条流，一次回放同时驱动多个策略实例（每个实例一个 BacktestingEngine），
+# 分别计算各策略的逐日盯市，再按日期汇总为组合结果
+import heapq
+import traceback
+from datetime import datetime
+from operator import attrgetter
+
+import pandas as pd
+from vnpy.trader.constant import Exchange
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+
+from progress import ProgressTracker
+from profiling import StageTimer, load_stage
+from tick_backtest_runner import create_engine
+
+# 逐日结果中可按日期直接相加的列
+SUM_COLUMNS = ["trade_count", "turnover", "commission", "slippage", "trading_pnl", "holding_pnl", "total_pnl", "net_pnl"]
+
+
+def merge_ticks(streams):
+    # 每个合约的 tick 流各自按时间有序，用堆做 k 路归并，每条 tick 只需 O(log k)；时间相同时按流的顺序输出
+    return heapq.merge(*streams, key=attrgetter("datetime"))
+
+
+def load_stores(data_feed, symbols: list, exchange: Exchange, start: datetime, end: datetime) -> dict:
+    # DolphinDBTickFeed 一次查询全部合约；其他数据源（如 MmapTickFeed）逐个合约加载
+    if hasattr(data_feed, "load_portfolio_stores"):
+        return data_feed.load_portfolio_stores(symbols, exchange, start, end)
+    return {symbol: data_feed.load_tick_store(symbol, exchange, start, end) for symbol in symbols}
+
+
+def create_portfolio_engines(legs: list, start: datetime, end: datetime, exchange: Exchange = Exchange.SHFE,
+                             symbol_settings: dict = None, output=print, **engine_settings) -> list:
+    # legs: [(合约, 策略类, 参数)]，同一合约可以挂多个策略；symbol_settings 按合约覆盖合约乘数、最小变动价位等
+    # 返回 [(名称, engine)]
+    symbol_settings = symbol_settings or {}
+    engines = []
+    names = set()
+    for symbol, strategy_class, setting in legs:
+        settings = {**engine_settings, **symbol_settings.get(symbol, {})}
+        engine = create_engine(f"{symbol}.{exchange.value}", start, end, **settings)
+        name = f"{strategy_class.__name__}@{symbol}"
+        if name in names:
+            name = f"{name}#{len(engines) + 1}"
+        names.add(name)
+        engine.output = lambda msg, name=name: output(f"[{name}] {msg}")
+        engine.add_strategy(strategy_class, setting)
+        engines.append((name, engine))
+    return engines
+
+
+def run_portfolio(engines: list, streams: list, total: int = None, progress=None, check_every: int = 10_000) -> int:
+    # 与 run_backtesting 相同的回放流程：归并后的每条 tick 只分发给交易该合约的引擎
+    # 某个策略抛出异常时只终止该策略，其余继续回放；返回回放的 tick 数
+    handlers = {}
+    for name, engine in engines:
+        engine.strategy.on_init()
+        engine.strategy.inited = True
+        engine.strategy.on_start()
+        engine.strategy.trading = True
+        handlers.setdefault(engine.vt_symbol, []).append(engine)
+        engine.output("开始回放历史数据")
+
+    tracker = ProgressTracker(total, progress) if progress else None
+    count = 0
+    next_check = check_every
+    for tick in merge_ticks(streams):
+        for engine in handlers.get(tick.vt_symbol, ()):
+            try:
+                engine.new_tick(tick)
+            except Exception:
+                engine.output("触发异常，该策略回测终止")
+                engine.output(traceback.format_exc())
+                handlers[tick.vt_symbol] = [e for e in handlers[tick.vt_symbol] if e is not engine]
+        count += 1
+        if count == next_check:
+            next_check += check_every
+            if tracker:
+                tracker.update(count)
+
+    if tracker:
+        tracker.update(count, force=True)
+    for engines_of_symbol in handlers.values():
+        for engine in engines_of_symbol:
+            engine.strategy.on_stop()
+            engine.output(f"历史数据回放结束，共回放 {count} 条tick")
+    return count
+
+
+def aggregate_results(results: dict, capital: float):
+    # 各策略的逐日盈亏按日期相加（某合约当天无行情按 0 计），资金为各策略资金之和，
+    # 统计指标复用 BacktestingEngine.calculate_statistics，键与单策略回测一致
+    frames = [df[SUM_COLUMNS] for df, _ in results.values() if df is not None and not df.empty]
+    df = pd.concat(frames).groupby(level=0).sum().sort_index() if frames else None
+
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.capital = capital
+    return df, engine.calculate_statistics(df, output=False)
+
+
+def portfolio_results(engines: list, timer: StageTimer = None):
+    # 返回 ({名称: (daily_df, statistics)}, 组合 daily_df, 组合 statistics)
+    timer = timer or StageTimer()
+    results = {}
+    with timer.stage("逐日盯市"):
+        for name, engine in engines:
+            # 回放期间没有收到任何 tick 的引擎没有逐日结果
+            results[name] = engine.calculate_result() if engine.daily_results else None
+    with timer.stage("统计指标"):
+        for name, engine in engines:
+            results[name] = (results[name], engine.calculate_statistics(results[name], output=False))
+        df, statistics = aggregate_results(results, sum(engine.capital for _, engine in engines))
+    return results, df, statistics
+
+
+def run_portfolio_backtest(
+    legs: list,
+    start: datetime,
+    end: datetime,
+    exchange: Exchange = Exchange.SHFE,
+    data_feed=None,
+    stores: dict = None,
+    output=print,
+    timer: StageTimer = None,
+    progress=None,
+    symbol_settings: dict = None,
+    **engine_settings
+):
+    # 加载数据（多合约一次查询）-> 归并回放 -> 各策略逐日盯市 -> 组合汇总
+    # 返回 (engines, {名称: (daily_df, statistics)}, 组合 daily_df, 组合 statistics)
+    timer = timer or StageTimer()
+    symbols = list(dict.fromkeys(symbol for symbol, _, _ in legs))
+    if stores is None:
+        with load_stage(timer, data_feed):
+            stores = load_stores(data_feed, symbols, exchange, start, end)
+        output(f"成功加载 {sum(len(stores[symbol]) for symbol in symbols)} 条tick数据（{len(symbols)} 个合约）")
+
+    engines = create_portfolio_engines(legs, start, end, exchange, symbol_settings, output, **engine_settings)
+    streams = [stores[symbol] for symbol in symbols]
+    with timer.stage("回放"):
+        timer.count("回放tick数", run_portfolio(engines, streams, sum(len(s) for s in streams), progress))
+    results, df, statistics = portfolio_results(engines, timer)
+    return engines, results, df, statistics
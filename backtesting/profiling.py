@@ -0,0 +1,104 @@
+import cProfile
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent / "logs"
+
+
+class StageTimer:
+    # 分阶段计时与计数：同名阶段累加耗时和次数，按首次出现的顺序输出；可在多个线程中使用
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - begin)
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self.lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += calls
+
+    def count(self, name: str, value=1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: "StageTimer") -> None:
+        for name, stage in other.stages.items():
+            self.add(name, stage["seconds"], stage["calls"])
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def rows(self) -> list:
+        total = sum(stage["seconds"] for stage in self.stages.values())
+        return [
+            {
+                "stage": name,
+                "seconds": stage["seconds"],
+                "calls": stage["calls"],
+                "percent": stage["seconds"] / total * 100 if total else 0.0,
+            }
+            for name, stage in self.stages.items()
+        ]
+
+    def report(self) -> str:
+        lines = [f"{row['stage']}: {row['seconds']:.3f}s（{row['percent']:.1f}%，{row['calls']} 次）" for row in self.rows()]
+        lines += [f"{name}: {value:,}" for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+    def export(self, path) -> None:
+        # 按后缀导出为 JSON 或 CSV
+        path = Path(path)
+        if path.suffix.lower() == ".json":
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"stages": self.rows(), "counters": self.counters}, f, ensure_ascii=False, indent=2)
+            return
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "seconds", "calls", "percent"])
+            for row in self.rows():
+                writer.writerow([row["stage"], f"{row['seconds']:.6f}", row["calls"], f"{row['percent']:.2f}"])
+            for name, value in self.counters.items():
+                writer.writerow([name, "", value, ""])
+
+
+def load_stage(timer: StageTimer, data_feed, name: str = "加载数据"):
+    # 数据源（DolphinDBTickFeed）与调用方共用同一个 timer 时，查询、缓存读写、转换等子阶段已由数据源记录，
+    # 不再记外层的加载阶段，避免同一段时间重复计入、各阶段占比之和超过 100%
+    if getattr(data_feed, "timer", None) is timer:
+        return nullcontext()
+    return timer.stage(name)
+
+
+def profile_path(name: str, profile_dir=DEFAULT_PROFILE_DIR) -> Path:
+    return Path(profile_dir) / f"{name}_{datetime.now():%Y%m%d_%H%M%S}.prof"
+
+
+@contextmanager
+def profiled(path=None):
+    # path 为 None 时不做任何事；否则用 cProfile 分析当前线程，结束后写入 path（可用 snakeviz / pstats 查看）
+    if path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
@@ -0,0 +1,37 @@
+import time
+
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_progress(label: str, done: int, total, speed: float, eta, unit: str = "条") -> str:
+    if total:
+        return f"{label} {done:,}/{total:,} {unit} | {speed:,.0f} {unit}/s | 剩余 {format_eta(eta)}"
+    return f"{label} {done:,} {unit} | {speed:,.0f} {unit}/s"
+
+
+class ProgressTracker:
+    # 进度统计：已完成数/总数、速度、预计剩余时间；回调按时间间隔节流，total 未知时 eta 为 None
+    def __init__(self, total, callback, min_interval: float = 0.5):
+        self.total = total
+        self.callback = callback
+        self.min_interval = min_interval
+        self.begin = time.perf_counter()
+        self.last_report = 0.0
+
+    def update(self, done: int, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.min_interval:
+            return
+        self.last_report = now
+
+        elapsed = now - self.begin
+        speed = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total and speed > 0:
+            eta = max(self.total - done, 0) / speed
+        self.callback(done, self.total, speed, eta)
@@ -0,0 +1,140 @@
+# 回测结果缓存：逐日结果 DataFrame、统计指标、成交记录（以及逐 tick 盯市序列、交易成本分析）按内容摘要保存到磁盘，
+# 键由策略类源码、策略与引擎依赖的本项目模块源码、策略参数、引擎设置（set_parameters 的字段和成交模型参数）
+# 与 tick 数据内容摘要共同决定，任何一项变化都不会命中；重启界面后重复同一回测直接读取结果，跳过回放。
+# 按文件大小做 LRU 淘汰
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+from pathlib import Path
+
+from tick_cache import evict_lru
+
+PROJECT_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULT_CACHE_DIR = PROJECT_DIR / "result_cache"
+DEFAULT_RESULT_MAX_BYTES = 1024 ** 3  # 默认缓存上限 1GB
+
+# 回放、结算或缓存内容的格式变化时修改版本号，旧缓存全部失效
+RESULT_CACHE_VERSION = 1
+
+# 除策略和引擎所在的模块外，回放和逐 tick 盯市的代码也决定回测结果
+RESULT_MODULES = ["tick_backtest_runner", "intraday_equity"]
+
+# from X import ... / import X, Y as Z
+IMPORT_PATTERN = re.compile(r"^[ \t]*(?:from[ \t]+(\w+)[\w.]*[ \t]+import|import[ \t]+([\w., \t]+))", re.MULTILINE)
+
+# 计入缓存键的引擎属性：set_parameters 设置的字段，以及盘口成交模型的延迟和可吃单比例
+ENGINE_FIELDS = [
+    "vt_symbol", "interval", "start", "end", "rate", "slippage", "size", "pricetick", "capital",
+    "mode", "risk_free", "annual_days", "half_life", "latency_ticks", "latency", "volume_ratio",
+]
+
+
+def strategy_source(strategy_class) -> str:
+    # 策略类及其父类的源码（vnpy 的 CtaTemplate 不计入）；策略定义在本项目以外的模块时也能区分
+    return "\n".join(
+        inspect.getsource(cls) for cls in strategy_class.__mro__
+        if cls is not object and not cls.__module__.startswith("vnpy")
+    )
+
+
+def module_path(name: str):
+    # 本项目（backtesting 目录下）的模块文件，vnpy 等第三方模块返回 None
+    path = PROJECT_DIR / f"{name.split('.')[0]}.py"
+    return path if path.exists() else None
+
+
+def imported_modules(path: Path) -> set:
+    # 源码中全部 import 的顶层模块名，包括函数内的延迟导入；按行匹配，比解析语法树快一个数量级
+    names = set()
+    for module, modules in IMPORT_PATTERN.findall(path.read_text(encoding="utf-8")):
+        names.update([module] if module else (name.split()[0].split(".")[0] for name in modules.split(",")))
+    return names
+
+
+def source_digest(classes: list) -> str:
+    # classes（策略类、引擎类及其父类）所在的本项目模块、RESULT_MODULES，以及它们直接或间接导入的本项目模块，
+    # 按文件名排序后对源码求摘要：修改指标、成交模型等任何依赖代码后旧结果都不会命中
+    pending = [module_path(cls.__module__) for cls in classes] + [module_path(name) for name in RESULT_MODULES]
+    paths = set()
+    while pending:
+        path = pending.pop()
+        if path is None or path in paths:
+            continue
+        paths.add(path)
+        pending.extend(module_path(name) for name in imported_modules(path))
+
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def result_key(strategies: list, engine, data):
+    # strategies 为 [(策略类, 参数)]；数据没有内容摘要（流式回放的生成器、K 线列表）或取不到策略源码时不缓存，返回 None
+    if not hasattr(data, "fingerprint"):
+        return None
+    try:
+        sources = [strategy_source(strategy_class) for strategy_class, _ in strategies]
+    except (OSError, TypeError):
+        return None
+
+    content = {
+        "version": RESULT_CACHE_VERSION,
+        "engine": type(engine).__name__,
+        "sources": source_digest(
+            [cls for strategy_class, _ in strategies for cls in strategy_class.__mro__] + list(type(engine).__mro__)
+        ),
+        "settings": {name: getattr(engine, name) for name in ENGINE_FIELDS if hasattr(engine, name)},
+        "strategies": [[source, params] for source, (_, params) in zip(sources, strategies)],
+        "data": data.fingerprint(),
+    }
+    # 枚举、时间等不能直接序列化为 JSON 的值用 str 表示
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    # 每个回测结果一个 pickle 文件，文件名即缓存键
+    def __init__(self, root=DEFAULT_RESULT_CACHE_DIR, max_bytes: int = DEFAULT_RESULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.pkl"
+
+    def get(self, key: str):
+        path = self.path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # 文件损坏或其中的类已不存在，视为未命中
+            path.unlink(missing_ok=True)
+            return None
+        # 读取即视为访问，刷新 mtime 供 LRU 淘汰使用
+        os.utime(path)
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        path = self.path(key)
+
+        # 先写临时文件再改名，避免中断后留下损坏的缓存
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        evict_lru(self.root, self.max_bytes, "*.pkl")
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.root.glob("*.pkl"))
+
+    def clear(self) -> None:
+        for path in self.root.glob("*.pkl"):
+            path.unlink(missing_ok=True)
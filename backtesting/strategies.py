@@ -1,6 +1,18 @@
 from datetime import datetime
-from vnpy.trader.object import TickData
+from vnpy.trader.object import BarData, TickData
 from vnpy_ctastrategy.template import CtaTemplate
+from indicators import RollingSum, RollingVariance
+
+
+def bar_to_tick(bar: BarData) -> TickData:
+    # K 线模式回测：以 K 线收盘价作为最新价，三个策略沿用逐 tick 的信号逻辑（窗口长度等参数按 K 线根数计）
+    return TickData(
+        symbol=bar.symbol,
+        exchange=bar.exchange,
+        datetime=bar.datetime,
+        gateway_name=bar.gateway_name,
+        last_price=bar.close_price
+    )
 
 
 class DynamicTickDoubleMaStrategy(CtaTemplate):
@@ -22,7 +34,9 @@ class DynamicTickDoubleMaStrategy(CtaTemplate):
 
     def __init__(self, engine, strategy_name, vt_symbol, setting):
         super().__init__(engine, strategy_name, vt_symbol, setting)
-        self.prices: list[float] = []
+        # 环形缓冲区上的滚动和，每个 tick O(1) 更新
+        self.fast_sum = RollingSum(self.fast_window)
+        self.slow_sum = RollingSum(self.slow_window)
         self.last_trade_dt: datetime = datetime.min
         self.last_entry_price: float = 0
         self.current_capital: float = self.capital
@@ -38,18 +52,16 @@ class DynamicTickDoubleMaStrategy(CtaTemplate):
 
     def on_tick(self, tick: TickData):
         price = tick.last_price
-        self.prices.append(price)
-        max_len = max(self.fast_window, self.slow_window)
-        if len(self.prices) > max_len:
-            self.prices.pop(0)
+        self.fast_sum.update(price)
+        self.slow_sum.update(price)
 
         # 指标未准备好
-        if len(self.prices) < self.slow_window:
+        if not self.slow_sum.inited:
             return
 
         # 计算快慢均线
-        self.fast_ma = sum(self.prices[-self.fast_window:]) / self.fast_window
-        self.slow_ma = sum(self.prices[-self.slow_window:]) / self.slow_window
+        self.fast_ma = self.fast_sum.total / self.fast_window
+        self.slow_ma = self.slow_sum.total / self.slow_window
 
         # 时间过滤
         now = tick.datetime
@@ -87,6 +99,9 @@ class DynamicTickDoubleMaStrategy(CtaTemplate):
                 self.cover(price, abs(pos))
                 self.last_trade_dt = now
 
+    def on_bar(self, bar: BarData):
+        self.on_tick(bar_to_tick(bar))
+
     def on_trade(self, trade):
         # 更新策略持仓收益到 current_capital
         pnl = trade.price * trade.volume * self.contract_size
@@ -133,8 +148,9 @@ class MacdDivergenceTickStrategy(CtaTemplate):
         self.ema_slow = None
         self.ema_signal = None
 
-        self.price_history: list[float] = []
-        self.hist_history: list[float] = []
+        # 背离检测只用到运行中的最低点，历史序列仅用于判断是否已收到两个 tick，
+        # 因此只保留计数，内存不随回测长度增长
+        self.tick_count: int = 0
 
         self.last_trade_dt: datetime = datetime.min
         self.last_price_low: float = float('inf')
@@ -178,12 +194,9 @@ class MacdDivergenceTickStrategy(CtaTemplate):
         self.signal = self.ema_signal
         self.histogram = hist
 
-        # 收集历史用于背离检测
-        self.price_history.append(price)
-        self.hist_history.append(hist)
-
         # 初始累积
-        if len(self.price_history) < 2:
+        self.tick_count += 1
+        if self.tick_count < 2:
             return
 
         # 最低点更新
@@ -206,12 +219,15 @@ class MacdDivergenceTickStrategy(CtaTemplate):
                     self.last_price_low = price
                     self.last_hist_low = hist
 
+    def on_bar(self, bar: BarData):
+        self.on_tick(bar_to_tick(bar))
+
     def on_trade(self, trade):
         # 更新资金
         pnl = (trade.price - trade.price) * trade.volume * self.contract_size
         # 多单 pnl = 0 here for simplicity; 后续可累加交易盈亏
         # 更新 current_capital 需调用引擎统计
-        self.current_capital = self.engine.capital
+        self.current_capital = self.cta_engine.capital
         self.put_event()
 
     def on_order(self, order):
@@ -242,7 +258,8 @@ class TickDynamicBollChannelStrategy(CtaTemplate):
     def __init__(self, cta_engine, strategy_name, vt_symbol, setting):
         super().__init__(cta_engine, strategy_name, vt_symbol, setting)
 
-        self.prices: list[float] = []
+        # 滚动均值/方差，每个 tick O(1) 更新
+        self.boll = RollingVariance(self.window)
         self.last_trade_dt: datetime = datetime.min
         self.current_capital: float = self.capital
 
@@ -260,18 +277,15 @@ class TickDynamicBollChannelStrategy(CtaTemplate):
         now = tick.datetime
 
         # 1. 更新价格序列
-        self.prices.append(price)
-        if len(self.prices) > self.window:
-            self.prices.pop(0)
+        self.boll.update(price)
 
         # 2. 数据不足
-        if len(self.prices) < self.window:
+        if not self.boll.inited:
             return
 
         # 3. 计算布林通道
-        self.mean = sum(self.prices) / self.window
-        variance = sum((p - self.mean) ** 2 for p in self.prices) / self.window
-        std = variance ** 0.5
+        self.mean = self.boll.mean
+        std = self.boll.std
         self.upper = self.mean + self.dev_multiplier * std
         self.lower = self.mean - self.dev_multiplier * std
 
@@ -298,6 +312,9 @@ class TickDynamicBollChannelStrategy(CtaTemplate):
             self.short(price, max_lots)
             self.last_trade_dt = now
 
+    def on_bar(self, bar: BarData):
+        self.on_tick(bar_to_tick(bar))
+
     def on_trade(self, trade):
         # 更新资金（使用引擎计算后的最新 equity）
         self.current_capital = self.capital
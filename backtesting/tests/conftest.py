@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 测试直接导入 backtesting 目录中的模块，以及 benchmarks 中生成模拟 tick 数据的 synthetic
+BACKTESTING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKTESTING_DIR / "benchmarks"))
+sys.path.insert(0, str(BACKTESTING_DIR))
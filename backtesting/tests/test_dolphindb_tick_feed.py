@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+from vnpy.trader.constant import Exchange
+
+from dolphindb_tick_feed import symbol_condition, symbol_mask, symbols_condition
+
+
+def test_symbol_conditions():
+    assert symbol_condition(" al2405 ", Exchange.SHFE) == 'contract = "AL2405.XSGE"'
+    assert symbol_condition("AL", Exchange.SHFE) == 'symbol = "AL"'
+    assert symbols_condition(["AL2405", "CU"], Exchange.SHFE) == '(contract in ["AL2405.XSGE"] or symbol in ["CU"])'
+
+
+@pytest.mark.parametrize("symbol", ['AL2405" or 1==1 or "', "AL 2405", "", "AL2405.XSGE"])
+def test_symbol_with_script_characters_is_rejected(symbol):
+    with pytest.raises(ValueError, match="字母和数字"):
+        symbol_condition(symbol, Exchange.SHFE)
+    with pytest.raises(ValueError, match="字母和数字"):
+        symbols_condition(["CU2405", symbol], Exchange.SHFE)
+
+
+def test_unsupported_exchange_is_named():
+    with pytest.raises(ValueError, match="LME"):
+        symbol_condition("AL2405", Exchange.LME)
+    with pytest.raises(ValueError, match="LME"):
+        symbols_condition(["AL2405"], Exchange.LME)
+    with pytest.raises(ValueError, match="LME"):
+        symbol_mask(pd.DataFrame({"contract": ["AL2405.XSGE"]}), "AL2405", Exchange.LME)
@@ -0,0 +1,151 @@
+import math
+import random
+
+import pytest
+from vnpy.trader.constant import Exchange
+
+from indicators import RollingMin, RollingSum, RollingVariance, RollingWindow
+from strategies import DynamicTickDoubleMaStrategy, TickDynamicBollChannelStrategy
+from synthetic import make_tick_dataframe
+from tick_backtest_runner import run_backtest
+from tick_store import TickStore
+
+
+class ListDoubleMaStrategy(DynamicTickDoubleMaStrategy):
+    # 改用滚动指标之前的实现：价格列表 + 每个 tick 重新求和
+    def __init__(self, engine, strategy_name, vt_symbol, setting):
+        super().__init__(engine, strategy_name, vt_symbol, setting)
+        self.prices = []
+
+    def on_tick(self, tick):
+        price = tick.last_price
+        self.prices.append(price)
+        if len(self.prices) > max(self.fast_window, self.slow_window):
+            self.prices.pop(0)
+        if len(self.prices) < self.slow_window:
+            return
+
+        self.fast_ma = sum(self.prices[-self.fast_window:]) / self.fast_window
+        self.slow_ma = sum(self.prices[-self.slow_window:]) / self.slow_window
+
+        now = tick.datetime
+        if (now - self.last_trade_dt).total_seconds() < self.min_trade_interval:
+            return
+
+        pos = self.pos
+        max_lots = int(self.current_capital / (price * self.contract_size * self.margin_rate))
+        if max_lots <= 0:
+            return
+
+        if self.fast_ma > self.slow_ma and pos <= 0:
+            if self.last_entry_price == 0 or (price - self.last_entry_price) >= self.min_price_move:
+                self.buy(price, max_lots)
+                self.last_trade_dt = now
+                self.last_entry_price = price
+        elif self.fast_ma < self.slow_ma and pos > 0:
+            if (self.last_entry_price - price) >= self.min_price_move:
+                self.sell(price, pos)
+                self.last_trade_dt = now
+        elif self.fast_ma < self.slow_ma and pos >= 0:
+            if self.last_entry_price == 0 or (self.last_entry_price - price) >= self.min_price_move:
+                self.short(price, max_lots)
+                self.last_trade_dt = now
+                self.last_entry_price = price
+        elif self.fast_ma > self.slow_ma and pos < 0:
+            if (price - self.last_entry_price) >= self.min_price_move:
+                self.cover(price, abs(pos))
+                self.last_trade_dt = now
+
+
+class ListBollChannelStrategy(TickDynamicBollChannelStrategy):
+    def __init__(self, cta_engine, strategy_name, vt_symbol, setting):
+        super().__init__(cta_engine, strategy_name, vt_symbol, setting)
+        self.prices = []
+
+    def on_tick(self, tick):
+        price = tick.last_price
+        now = tick.datetime
+        self.prices.append(price)
+        if len(self.prices) > self.window:
+            self.prices.pop(0)
+        if len(self.prices) < self.window:
+            return
+
+        self.mean = sum(self.prices) / self.window
+        std = (sum((p - self.mean) ** 2 for p in self.prices) / self.window) ** 0.5
+        self.upper = self.mean + self.dev_multiplier * std
+        self.lower = self.mean - self.dev_multiplier * std
+
+        if (now - self.last_trade_dt).total_seconds() < self.min_trade_interval:
+            return
+
+        max_lots = int(self.current_capital / (price * self.contract_size * self.margin_rate))
+        if max_lots <= 0:
+            return
+
+        pos = self.pos
+        if price > self.upper and pos <= 0:
+            self.buy(price, max_lots)
+            self.last_trade_dt = now
+        elif price < self.lower and pos >= 0:
+            self.short(price, max_lots)
+            self.last_trade_dt = now
+
+
+@pytest.fixture(scope="module")
+def store():
+    df = make_tick_dataframe(30_000, ticks_per_day=10_000)
+    # 买一卖一都取最新价，按最新价挂出的限价单下一个 tick 即可成交，使两种实现都产生足够多的成交
+    df["a1_p"] = df["b1_p"] = df["current"]
+    return TickStore.from_dataframe(df, "AL2405", Exchange.SHFE)
+
+
+def trade_list(strategy_class, setting, store):
+    engine, _, _ = run_backtest("AL2405", None, None, strategy_class, setting, history_data=store,
+                                output=lambda msg: None)
+    return [(t.datetime, t.direction, t.offset, t.price, t.volume) for t in engine.get_all_trades()]
+
+
+@pytest.mark.parametrize("reference, strategy_class, setting", [
+    (ListDoubleMaStrategy, DynamicTickDoubleMaStrategy, {}),
+    (ListDoubleMaStrategy, DynamicTickDoubleMaStrategy, {"fast_window": 20, "slow_window": 100, "min_trade_interval": 60}),
+    # 快均线窗口长于慢均线：开始交易时快均线窗口未满
+    (ListDoubleMaStrategy, DynamicTickDoubleMaStrategy, {"fast_window": 300, "slow_window": 50, "min_trade_interval": 60}),
+    (ListBollChannelStrategy, TickDynamicBollChannelStrategy, {}),
+    (ListBollChannelStrategy, TickDynamicBollChannelStrategy, {"window": 100, "dev_multiplier": 1.5, "min_trade_interval": 60}),
+])
+def test_same_trades_as_list_implementation(store, reference, strategy_class, setting):
+    expected = trade_list(reference, setting, store)
+    assert expected
+    assert trade_list(strategy_class, setting, store) == expected
+
+
+def test_rolling_window_order():
+    window = RollingWindow(3)
+    assert [window.push(v) for v in (1, 2, 3, 4)] == [None, None, None, 1]
+    assert list(window) == [2, 3, 4]
+
+
+def test_rolling_sum_and_variance_match_direct_computation():
+    rng = random.Random(0)
+    values = [19_000 + rng.randint(-50, 50) * 5 for _ in range(1000)]
+    rolling_sum = RollingSum(50)
+    variance = RollingVariance(50)
+    for i, value in enumerate(values):
+        rolling_sum.update(value)
+        variance.update(value)
+        recent = values[max(i - 49, 0):i + 1]
+        mean = sum(recent) / len(recent)
+        assert rolling_sum.total == pytest.approx(sum(recent), abs=1e-6)
+        assert variance.mean == pytest.approx(mean, abs=1e-9)
+        assert variance.std == pytest.approx(math.sqrt(sum((v - mean) ** 2 for v in recent) / len(recent)), abs=1e-6)
+
+
+@pytest.mark.parametrize("size", [1, 7, 50])
+def test_rolling_min_matches_window_minimum(size):
+    rng = random.Random(size)
+    values = [rng.randint(-20, 20) for _ in range(500)]
+    rolling_min = RollingMin(size)
+    for i, value in enumerate(values):
+        assert rolling_min.inited == (i >= size)
+        assert rolling_min.update(value) == min(values[max(i - size + 1, 0):i + 1])
@@ -0,0 +1,65 @@
+import pytest
+from vnpy.trader.constant import Exchange
+
+import kernels
+from kernels import NUMBA_AVAILABLE, run_kernel_backtest
+from strategies import DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy
+from synthetic import make_tick_dataframe
+from tick_backtest_runner import run_backtest
+from tick_store import TickStore
+
+KEY_STATISTICS = [
+    "end_balance", "total_net_pnl", "max_drawdown", "total_trade_count",
+    "total_commission", "total_slippage", "total_turnover", "sharpe_ratio",
+]
+
+
+@pytest.fixture(scope="module")
+def store():
+    df = make_tick_dataframe(30_000, ticks_per_day=10_000)
+    return TickStore.from_dataframe(df, "AL2405", Exchange.SHFE)
+
+
+@pytest.fixture(params=["njit", "python"])
+def jit(request, monkeypatch):
+    if request.param == "njit":
+        if not NUMBA_AVAILABLE:
+            pytest.skip("未安装 numba")
+    else:
+        # 关闭编译：内核及其调用的辅助函数全部换成原始 Python 函数（内核按模块全局名调用辅助函数）
+        for name, value in vars(kernels).items():
+            if hasattr(value, "py_func"):
+                monkeypatch.setattr(kernels, name, value.py_func)
+    return request.param
+
+
+def run_both(strategy_class, setting, store):
+    start = store.datetime[0].item()
+    end = store.datetime[-1].item()
+    event_engine, _, event_stats = run_backtest("AL2405", start, end, strategy_class, setting,
+                                                history_data=store, output=lambda msg: None)
+    kernel_engine, _, kernel_stats = run_kernel_backtest(
+        strategy_class, setting, store, {"vt_symbol": "AL2405.SHFE", "start": start, "end": end}
+    )
+    return event_engine, event_stats, kernel_engine, kernel_stats
+
+
+def trade_keys(engine) -> list:
+    return [(t.datetime, t.direction, t.offset, t.price, t.volume) for t in engine.get_all_trades()]
+
+
+@pytest.mark.parametrize("strategy_class, setting", [
+    (DynamicTickDoubleMaStrategy, {"fast_window": 20, "slow_window": 100, "min_trade_interval": 60}),
+    (TickDynamicBollChannelStrategy, {}),
+    (TickDynamicBollChannelStrategy, {"window": 100, "dev_multiplier": 1.5, "min_trade_interval": 60}),
+    # MACD 背离在原有逻辑下不会成交，只核对两边同样没有成交、统计一致
+    (MacdDivergenceTickStrategy, {}),
+])
+def test_kernel_matches_event_engine(store, jit, strategy_class, setting):
+    event_engine, event_stats, kernel_engine, kernel_stats = run_both(strategy_class, setting, store)
+
+    if strategy_class is not MacdDivergenceTickStrategy:
+        assert event_engine.trades
+    assert trade_keys(kernel_engine) == trade_keys(event_engine)
+    for key in KEY_STATISTICS:
+        assert kernel_stats[key] == pytest.approx(event_stats[key], rel=1e-9, abs=1e-6, nan_ok=True), key
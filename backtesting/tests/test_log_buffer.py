@@ -0,0 +1,21 @@
+import logging
+
+from log_buffer import LogBuffer
+
+
+def test_pending_is_bounded_and_file_is_complete(tmp_path):
+    buffer = LogBuffer(tmp_path / "backtest.log", max_pending=100)
+    for i in range(250):
+        buffer.write(f"line {i}")
+
+    lines = buffer.drain()
+    assert len(lines) == 101
+    assert lines[0][0] == logging.WARNING and "150" in lines[0][1]
+    assert [line for _, line in lines[1:]] == [f"INFO\tline {i}" for i in range(150, 250)]
+
+    # 计数已清零，下一批不再提示
+    buffer.write("line 250")
+    assert buffer.drain() == [(logging.INFO, "INFO\tline 250")]
+
+    buffer.close()
+    assert len((tmp_path / "backtest.log").read_text(encoding="utf-8").splitlines()) == 251
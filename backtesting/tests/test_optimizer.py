@@ -0,0 +1,20 @@
+import random
+
+from optimizer import target_key
+
+
+def test_nan_targets_rank_last():
+    nan = float("nan")
+    results = [({"i": i}, value, {}) for i, value in enumerate([nan, 1.5, nan, -2.0, 3.0, 1.5, nan])]
+    for seed in range(20):
+        shuffled = results[:]
+        random.Random(seed).shuffle(shuffled)
+        shuffled.sort(reverse=True, key=target_key)
+        assert [value for _, value, _ in shuffled[:4]] == [3.0, 1.5, 1.5, -2.0]
+        assert all(value != value for _, value, _ in shuffled[4:])
+
+
+def test_equal_targets_keep_submit_order():
+    results = [({"i": i}, value, {}) for i, value in enumerate([1.0, 2.0, 1.0, float("nan"), 2.0])]
+    results.sort(reverse=True, key=target_key)
+    assert [setting["i"] for setting, _, _ in results] == [1, 4, 0, 2, 3]
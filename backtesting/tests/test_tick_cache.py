@@ -0,0 +1,122 @@
+import re
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+from vnpy.trader.constant import Exchange
+
+from dolphindb_tick_feed import TICK_COLUMNS, DolphinDBTickFeed
+from synthetic import make_tick_dataframe
+import tick_cache
+from tick_cache import TickCache
+
+# 2024-04-01 ~ 04-04 四个交易日，每天 500 条
+TICKS = make_tick_dataframe(2000, ticks_per_day=500)
+START = datetime(2024, 4, 1)
+END = datetime(2024, 4, 4, 23, 59, 59)
+
+
+class FakeSession:
+    # 代替 DolphinDB 会话：记录每次查询涉及的交易日，按查询条件中的日期返回模拟数据
+    def __init__(self, df=TICKS):
+        self.df = df
+        self.queries = []
+
+    def run(self, script: str) -> pd.DataFrame:
+        days = [datetime.strptime(text, "%Y.%m.%d").date() for text in re.findall(r"\d{4}\.\d{2}\.\d{2}", script)]
+        if "between" in script:
+            days = [days[0] + timedelta(days=i) for i in range((days[1] - days[0]).days + 1)]
+        self.queries.append(days)
+        mask = self.df["time"].dt.date.isin(days)
+        return self.df.loc[mask, TICK_COLUMNS].reset_index(drop=True)
+
+
+def offline_factory():
+    raise ConnectionError("测试中不应连接 DolphinDB")
+
+
+def load(feed) -> pd.DataFrame:
+    return feed.load_tick_dataframe("AL2405", Exchange.SHFE, START, END)
+
+
+def test_cold_load_queries_missing_days_in_one_batch(tmp_path):
+    cache = TickCache(tmp_path)
+    # 预先缓存第二天，冷加载只查询其余交易日
+    cache.put("AL2405.SHFE", date(2024, 4, 2), TICKS[TICKS["time"].dt.date == date(2024, 4, 2)][TICK_COLUMNS])
+    session = FakeSession()
+    df = load(DolphinDBTickFeed(cache=cache, session=session))
+
+    assert session.queries == [[date(2024, 4, 1), date(2024, 4, 3), date(2024, 4, 4)]]
+    pd.testing.assert_frame_equal(df, TICKS[TICK_COLUMNS])
+    assert len(list(tmp_path.rglob("*.parquet"))) == 4
+
+
+def test_cold_load_queries_each_missing_day_in_parallel(tmp_path):
+    session = FakeSession()
+    feed = DolphinDBTickFeed(cache=TickCache(tmp_path), session=session, max_workers=4,
+                             session_factory=lambda: session)
+    df = load(feed)
+
+    assert sorted(session.queries) == [[date(2024, 4, day)] for day in range(1, 5)]
+    pd.testing.assert_frame_equal(df, TICKS[TICK_COLUMNS])
+
+
+def test_warm_load_issues_no_query(tmp_path):
+    load(DolphinDBTickFeed(cache=TickCache(tmp_path), session=FakeSession()))
+
+    session = FakeSession()
+    df = load(DolphinDBTickFeed(cache=TickCache(tmp_path), session=session))
+    assert session.queries == []
+    pd.testing.assert_frame_equal(df, TICKS[TICK_COLUMNS])
+
+
+def test_offline_with_populated_cache(tmp_path):
+    load(DolphinDBTickFeed(cache=TickCache(tmp_path), session=FakeSession()))
+
+    # 没有会话、连接必然失败：全部命中缓存时不连接数据库
+    feed = DolphinDBTickFeed(cache=TickCache(tmp_path), session_factory=offline_factory)
+    store = feed.load_tick_store("AL2405", Exchange.SHFE, START, END)
+    assert len(store) == len(TICKS)
+
+    # 缓存不全时才连接，离线时报错
+    with pytest.raises(ConnectionError):
+        feed.load_tick_dataframe("AL2405", Exchange.SHFE, START, END + timedelta(days=1))
+
+
+def day_frame(day: date) -> pd.DataFrame:
+    return TICKS[TICKS["time"].dt.date == day][TICK_COLUMNS]
+
+
+def test_file_evicted_during_get_is_a_miss(tmp_path, monkeypatch):
+    cache = TickCache(tmp_path)
+    cache.put("AL2405.SHFE", date(2024, 4, 1), day_frame(date(2024, 4, 1)))
+
+    def evicted(path):
+        # 读取后、刷新 mtime 前文件被其他线程的写入淘汰
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(tick_cache.os, "utime", evicted)
+    assert cache.get("AL2405.SHFE", date(2024, 4, 1)) is None
+    assert cache.get("AL2405.SHFE", date(2024, 4, 2)) is None
+
+
+def test_put_scans_only_when_over_limit(tmp_path, monkeypatch):
+    scans = []
+    evict_lru = tick_cache.evict_lru
+    monkeypatch.setattr(tick_cache, "evict_lru", lambda *args: scans.append(args) or evict_lru(*args))
+
+    days = [date(2024, 4, day) for day in range(1, 5)]
+    probe = TickCache(tmp_path / "probe")
+    probe.put("AL2405.SHFE", days[0], day_frame(days[0]))
+    # 上限约为两天的数据量：前两次写入不扫描，之后超限时淘汰最早的交易日
+    cache = TickCache(tmp_path / "cache", max_bytes=int(probe.total * 2.5))
+    for day in days[:2]:
+        cache.put("AL2405.SHFE", day, day_frame(day))
+    assert scans == []
+
+    for day in days[2:]:
+        cache.put("AL2405.SHFE", day, day_frame(day))
+    assert scans
+    assert cache.total == cache.size() <= cache.max_bytes
+    assert cache.get("AL2405.SHFE", days[0]) is None
+    assert cache.get("AL2405.SHFE", days[-1]) is not None
@@ -0,0 +1,48 @@
+import pytest
+from vnpy.trader.constant import Exchange
+
+from strategies import DynamicTickDoubleMaStrategy, TickDynamicBollChannelStrategy
+from synthetic import make_tick_dataframe
+from tick_backtest_runner import run_backtest
+from tick_store import TickStore
+from vector_backtest import run_vector_backtest
+
+# 核对的统计指标：资金、回撤、成交笔数、手续费和滑点
+KEY_STATISTICS = [
+    "end_balance", "total_net_pnl", "max_drawdown", "total_trade_count",
+    "total_commission", "total_slippage", "total_turnover", "sharpe_ratio",
+]
+
+
+@pytest.fixture(scope="module")
+def store():
+    df = make_tick_dataframe(60_000, ticks_per_day=20_000)
+    return TickStore.from_dataframe(df, "AL2405", Exchange.SHFE)
+
+
+def trade_keys(engine) -> list:
+    return [(t.datetime, t.direction, t.price, t.volume) for t in engine.get_all_trades()]
+
+
+@pytest.mark.parametrize("strategy_class, setting", [
+    (DynamicTickDoubleMaStrategy, {}),
+    (DynamicTickDoubleMaStrategy, {"fast_window": 20, "slow_window": 100, "min_trade_interval": 60}),
+    # 快均线窗口长于慢均线：开始交易时快均线窗口未满
+    (DynamicTickDoubleMaStrategy, {"fast_window": 3000, "slow_window": 20, "min_trade_interval": 60}),
+    (TickDynamicBollChannelStrategy, {}),
+    (TickDynamicBollChannelStrategy, {"window": 100, "dev_multiplier": 1.5, "min_trade_interval": 60}),
+])
+def test_vector_backtest_matches_event_engine(store, strategy_class, setting):
+    start = store.datetime[0].item()
+    end = store.datetime[-1].item()
+    event_engine, _, event_stats = run_backtest("AL2405", start, end, strategy_class, setting,
+                                                history_data=store, output=lambda msg: None)
+    vector_engine, _, vector_stats = run_vector_backtest(
+        strategy_class, setting, store, {"vt_symbol": "AL2405.SHFE", "start": start, "end": end}
+    )
+
+    # 没有成交时核对不出任何差异
+    assert event_engine.trades
+    assert trade_keys(vector_engine) == trade_keys(event_engine)
+    for key in KEY_STATISTICS:
+        assert vector_stats[key] == pytest.approx(event_stats[key], rel=1e-9, abs=1e-6, nan_ok=True), key
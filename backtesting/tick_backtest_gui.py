@@ -1,27 +1,28 @@
+import logging
+import os
 import sys
+import time
+from collections import deque
 from datetime import datetime
-import numpy as np
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib
-matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 黑体
-matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
 from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                QLabel, QLineEdit, QDateTimeEdit, QPushButton, QCheckBox,
                                QGroupBox, QFormLayout, QProgressBar, QTabWidget, QTableWidget,
                                QTableWidgetItem, QScrollArea, QSplitter, QTextEdit, QSizePolicy,
-                               QComboBox, QStackedWidget, QHeaderView)
+                               QComboBox, QStackedWidget, QHeaderView, QDialog, QFileDialog)
 from PySide6.QtCore import Qt, QDateTime, QThread, Signal, QObject
-from PySide6.QtGui import QDoubleValidator, QIntValidator, QFont
-from vnpy.trader.constant import Interval, Exchange
-from vnpy_ctabacktester.engine import BacktestingEngine
-from vnpy_ctastrategy.base import BacktestingMode
-from dolphindb_tick_feed import DolphinDBTickFeed
-from strategies import DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy
-import plotly.graph_objects as go
+from PySide6.QtGui import QDoubleValidator, QIntValidator, QFont, QTextCursor
+from vnpy.trader.constant import Exchange
+from progress import format_eta, format_progress
+from log_buffer import LogBuffer, LOG_LEVELS
+from profiling import StageTimer, profile_path, profiled
 from config import *
 
+# 启动时只导入 PySide6 和轻量模块，窗口先显示出来；pandas/talib（vnpy 策略与回测引擎）、matplotlib、
+# dolphindb、numba（优化器的编译内核）、plotly 都在第一次用到时才在函数内导入
+# 策略下拉框的显示名称，与 load_strategies 返回的策略类一一对应
+STRATEGY_NAMES = ["动态双均线策略", "MACD背离策略", "布林通道策略"]
+
 STAT_TRANSLATIONS = {
     'start_date': '开始日期',
     'end_date': '结束日期',
@@ -49,11 +50,27 @@ STAT_TRANSLATIONS = {
     'return_std': '收益率标准差',
     'sharpe_ratio': '夏普比率',
     'ewm_sharpe': '指数加权夏普',
-    'return_drawdown_ratio': '收益回撤比'
+    'return_drawdown_ratio': '收益回撤比',
+    'intraday_max_drawdown': '逐tick最大回撤',
+    'intraday_max_ddpercent': '逐tick最大回撤百分比',
+    'intraday_max_drawdown_time': '逐tick最大回撤时间',
+    'intraday_min_balance': '逐tick最低资金',
+    'intraday_max_position': '最大持仓手数',
+    'intraday_max_exposure': '最大持仓市值'
 }
 
+# 日志视图最多保留的行数（完整日志写入文件），以及批量刷新间隔
+MAX_LOG_LINES = 5000
+LOG_FLUSH_INTERVAL_MS = 200
+
+
+def load_strategies():
+    from strategies import DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy
+    return [DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy]
+
 
 def create_balance_fig(df):
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=df.index, y=df["balance"],
@@ -71,6 +88,7 @@ def create_balance_fig(df):
 
 
 def create_drawdown_fig(df):
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=df.index, y=df["drawdown"],
@@ -90,6 +108,8 @@ def create_drawdown_fig(df):
 
 
 def create_daily_pnl_fig(df):
+    import numpy as np
+    import plotly.graph_objects as go
     colors = np.where(df["net_pnl"] >= 0, 'green', 'red')
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -108,6 +128,7 @@ def create_daily_pnl_fig(df):
 
 
 def create_pnl_distribution_fig(df):
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Histogram(
         x=df["net_pnl"],
@@ -125,59 +146,431 @@ def create_pnl_distribution_fig(df):
     return fig
 
 
+def tick_count(history_data):
+    # 组合数据为 {合约: TickStore}
+    if isinstance(history_data, dict):
+        return sum(len(store) for store in history_data.values())
+    return len(history_data)
+
+
+def padded(low, high, ratio=0.05):
+    # 坐标范围两端各留出 5%；只有一个值时上下各留 1，避免范围为零
+    if high <= low:
+        return low - 1, high + 1
+    margin = (high - low) * ratio
+    return low - margin, high + margin
+
+
+def log_tca(log_buffer, engine, name=""):
+    # 盘口成交模型的交易成本分析写入日志
+    if hasattr(engine, "calculate_tca"):
+        write_tca(log_buffer, engine.calculate_tca(), name)
+
+
+def write_tca(log_buffer, tca, name=""):
+    from fill_model import TCA_TRANSLATIONS
+    lines = "\n".join(f"{TCA_TRANSLATIONS[key]}: {value:,.4g}" for key, value in tca.items())
+    log_buffer.write(f"{name} 交易成本分析:\n{lines}".strip())
+
+
 class DataLoader(QThread):
-    progress = Signal(int)
-    finished = Signal(list)
+    progress = Signal(int, str)
+    finished = Signal(object)
     error = Signal(str)
 
-    def __init__(self, data_feed, symbol, exchange, start, end):
+    def __init__(self, data_feed, symbols, exchange, start, end, log_buffer, timer, profile_file=None):
         super().__init__()
         self.data_feed = data_feed
-        self.symbol = symbol
+        self.log_buffer = log_buffer
+        # 查询、缓存、转换各阶段耗时；profile_file 不为空时用 cProfile 分析加载过程
+        self.timer = timer
+        self.profile_file = profile_file
+        # 多个合约时一次查询全部合约，结果为 {合约: TickStore}
+        self.symbols = symbols
         self.exchange = exchange
         self.start_time = start
         self.end_time = end
 
     def run(self):
         try:
-            ticks = self.data_feed.load_tick_data(
-                symbol=self.symbol,
-                exchange=self.exchange,
-                start=self.start_time,
-                end=self.end_time
-            )
+            # 逐日加载耗时从查询线程转发到界面日志
+            self.data_feed.output = self.log_buffer.write
+            self.data_feed.progress = self.report_progress
+            self.data_feed.timer = self.timer
+            with profiled(self.profile_file):
+                if len(self.symbols) == 1:
+                    ticks = self.data_feed.load_tick_store(
+                        symbol=self.symbols[0],
+                        exchange=self.exchange,
+                        start=self.start_time,
+                        end=self.end_time
+                    )
+                else:
+                    from portfolio import load_stores
+                    ticks = load_stores(self.data_feed, self.symbols, self.exchange, self.start_time, self.end_time)
+            self.timer.count("tick数", tick_count(ticks))
+            if self.profile_file:
+                self.log_buffer.write(f"性能分析结果已保存至 {self.profile_file}")
             self.finished.emit(ticks)
         except Exception as e:
             self.error.emit(str(e))
 
+    def report_progress(self, done, total, speed, eta):
+        self.progress.emit(int(done * 100 / total), format_progress("加载", done, total, speed, eta, "天"))
+
 
 class BacktestWorker(QThread):
     update_progress = Signal(int, str)
     finished = Signal(object)
-    log_message = Signal(str)
 
-    def __init__(self, engine, strategies):
+    def __init__(self, engine, strategies, log_buffer, ticks=None, timer=None, profile_file=None, chart_width=0,
+                 result_cache=None):
         super().__init__()
         self.engine = engine
+        # 不为 None 时先按策略、参数、引擎设置和数据查找已有的回测结果，未命中时回放并保存结果
+        self.result_cache = result_cache
+        # 图表数据在回测线程中按画布宽度准备好，界面线程只负责更新图元
+        self.chart_width = chart_width
+        self.timer = timer or StageTimer()
+        self.profile_file = profile_file
+        # 日志先写入缓冲区，由界面定时批量刷新，避免每条消息一次跨线程信号
+        self.log_buffer = log_buffer
         self.strategies = strategies
+        # ticks 为 None 时回放 engine.history_data，否则逐条消费传入的 tick 流
+        self.ticks = ticks
+        # 流式回放时 tick 总数未知，用数据源的逐日进度估算完成比例和剩余时间
+        self.day_progress = None
+
+    def report_day_progress(self, done, total, speed, eta):
+        self.day_progress = (done, total, eta)
+
+    def report_progress(self, done, total, speed, eta):
+        if total:
+            percent = int(done * 100 / total)
+            text = format_progress("回放", done, total, speed, eta)
+        elif self.day_progress:
+            days_done, days_total, days_eta = self.day_progress
+            percent = int(days_done * 100 / days_total)
+            text = f"{format_progress('回放', done, None, speed, None)} | 第 {days_done}/{days_total} 天 | 剩余 {format_eta(days_eta)}"
+        else:
+            percent = -1
+            text = format_progress("回放", done, None, speed, None)
+        self.update_progress.emit(percent, text)
 
     def run(self):
         try:
+            from chart_data import chart_points, prepare_chart_data
+            from intraday_equity import calculate_intraday
+            from result_cache import result_key
+            from tick_backtest_runner import run_backtesting
+
             # 重定向 output
-            self.engine.output = lambda msg: self.log_message.emit(str(msg))
+            self.engine.output = lambda msg: self.log_buffer.write(str(msg))
+            # 策略 write_log 也进入缓冲区（DEBUG 级别），不再堆积在 engine.logs 中
+            self.engine.write_log = lambda msg, strategy=None: self.log_buffer.write(
+                f"{self.engine.datetime}\t{msg}", logging.DEBUG
+            )
             self.engine.clear_data()
             for strategy_cls, params in self.strategies:
                 self.engine.add_strategy(strategy_cls, params)
 
-            self.engine.run_backtesting()
-            df = self.engine.calculate_result()
-            stats = self.engine.calculate_statistics()
-            # fig = self.engine.show_chart()
-            self.finished.emit((df, stats))
+            # 流式回放的 tick 流没有内容摘要，不使用结果缓存
+            key = None
+            if self.result_cache is not None and self.ticks is None:
+                begin = time.perf_counter()
+                with self.timer.stage("结果缓存"):
+                    key = result_key(self.strategies, self.engine, self.engine.history_data)
+                    cached = self.result_cache.get(key) if key else None
+                if cached is not None:
+                    self.emit_cached(cached, time.perf_counter() - begin)
+                    return
+
+            ticks = self.engine.history_data if self.ticks is None else self.ticks
+            with profiled(self.profile_file):
+                # 流式回放时逐日加载发生在回放过程中，耗时同时计入回放
+                with self.timer.stage("回放"):
+                    self.timer.count("回放tick数", run_backtesting(self.engine, ticks, progress=self.report_progress))
+                with self.timer.stage("逐日盯市"):
+                    df = self.engine.calculate_result()
+                with self.timer.stage("统计指标"):
+                    stats = self.engine.calculate_statistics()
+                # 逐 tick 盯市需要 tick 价格数组，只有回放预先加载的 TickStore 时计算（流式回放不保留 tick）
+                intraday = None
+                if self.ticks is None:
+                    with self.timer.stage("逐tick盯市"):
+                        intraday = calculate_intraday(self.engine, points=chart_points(self.chart_width))
+                    if intraday:
+                        stats.update(intraday[0])
+                with self.timer.stage("图表数据"):
+                    chart = prepare_chart_data(df, self.chart_width, intraday[1] if intraday else None)
+            tca = self.engine.calculate_tca() if hasattr(self.engine, "calculate_tca") else None
+            if tca is not None:
+                write_tca(self.log_buffer, tca)
+            if key:
+                with self.timer.stage("写入结果缓存"):
+                    self.result_cache.put(key, {
+                        "df": df,
+                        "statistics": stats,
+                        "trades": self.engine.get_all_trades(),
+                        "intraday": intraday[1] if intraday else None,
+                        "tca": tca,
+                    })
+            if self.profile_file:
+                self.log_buffer.write(f"性能分析结果已保存至 {self.profile_file}")
+            self.finished.emit((df, stats, chart))
+        except Exception as e:
+            self.finished.emit(e)
+
+    def emit_cached(self, cached, seconds):
+        from chart_data import prepare_chart_data
+
+        self.log_buffer.write(f"命中回测结果缓存，跳过回放，耗时 {seconds * 1000:.1f}ms")
+        # 成交记录和逐日结果放回引擎，与回放后的引擎状态一致
+        self.engine.trades = {trade.vt_tradeid: trade for trade in cached["trades"]}
+        self.engine.daily_df = cached["df"]
+        with self.timer.stage("图表数据"):
+            chart = prepare_chart_data(cached["df"], self.chart_width, cached["intraday"])
+        if cached["tca"] is not None:
+            write_tca(self.log_buffer, cached["tca"])
+        self.finished.emit((cached["df"], cached["statistics"], chart))
+
+
+class PortfolioWorker(QThread):
+    # 组合回测：各合约 tick 按时间归并后一次回放，驱动每个合约上的策略实例；结果为组合汇总，各策略结果写入日志
+    update_progress = Signal(int, str)
+    finished = Signal(object)
+
+    def __init__(self, legs, stores, engine_settings, log_buffer, timer=None, profile_file=None, chart_width=0):
+        super().__init__()
+        self.legs = legs
+        self.chart_width = chart_width
+        self.stores = stores
+        self.engine_settings = engine_settings
+        self.log_buffer = log_buffer
+        self.timer = timer or StageTimer()
+        self.profile_file = profile_file
+
+    def report_progress(self, done, total, speed, eta):
+        self.update_progress.emit(int(done * 100 / total) if total else -1, format_progress("回放", done, total, speed, eta))
+
+    def run(self):
+        try:
+            from chart_data import prepare_chart_data
+            from portfolio import create_portfolio_engines, portfolio_results, run_portfolio
+
+            engines = create_portfolio_engines(
+                self.legs,
+                output=lambda msg: self.log_buffer.write(str(msg)),
+                **self.engine_settings
+            )
+            for name, engine in engines:
+                engine.write_log = lambda msg, strategy=None, engine=engine, name=name: self.log_buffer.write(
+                    f"{engine.datetime}\t[{name}] {msg}", logging.DEBUG
+                )
+
+            streams = [self.stores[symbol] for symbol in dict.fromkeys(symbol for symbol, _, _ in self.legs)]
+            with profiled(self.profile_file):
+                with self.timer.stage("回放"):
+                    count = run_portfolio(engines, streams, sum(len(s) for s in streams), self.report_progress)
+                    self.timer.count("回放tick数", count)
+                results, df, stats = portfolio_results(engines, self.timer)
+                # 组合回测所选区间内没有任何行情时没有逐日结果
+                with self.timer.stage("图表数据"):
+                    chart = prepare_chart_data(df, self.chart_width) if df is not None else None
+            for name, engine in engines:
+                leg_stats = results[name][1]
+                self.log_buffer.write(
+                    f"{name}: 总净收益 {leg_stats.get('total_net_pnl', 0):,.2f}，总收益率 {leg_stats.get('total_return', 0):.2f}%，"
+                    f"最大回撤 {leg_stats.get('max_ddpercent', 0):.2f}%，成交 {leg_stats.get('total_trade_count', 0)} 笔"
+                )
+                log_tca(self.log_buffer, engine, name)
+            if self.profile_file:
+                self.log_buffer.write(f"性能分析结果已保存至 {self.profile_file}")
+            self.finished.emit((df, stats, chart))
+        except Exception as e:
+            self.finished.emit(e)
+
+
+class OptimizationWorker(QThread):
+    progress = Signal(int, int)
+    finished = Signal(object)
+
+    def __init__(self, strategy_class, settings, history_data, engine_settings, target_name, max_workers,
+                 vectorized=False):
+        super().__init__()
+        self.vectorized = vectorized
+        self.strategy_class = strategy_class
+        self.settings = settings
+        self.history_data = history_data
+        self.engine_settings = engine_settings
+        self.target_name = target_name
+        self.max_workers = max_workers
+
+    def run(self):
+        try:
+            from optimizer import run_optimization
+
+            results = run_optimization(
+                self.strategy_class,
+                self.settings,
+                self.history_data,
+                self.engine_settings,
+                self.target_name,
+                max_workers=self.max_workers,
+                callback=self.progress.emit,
+                vectorized=self.vectorized
+            )
+            self.finished.emit(results)
         except Exception as e:
             self.finished.emit(e)
 
 
+class OptimizationDialog(QDialog):
+    # 参数优化：网格/随机搜索，多进程并行回测，结果表格可按任意列排序
+    result_columns = ["total_return", "sharpe_ratio", "max_ddpercent", "total_trade_count"]
+
+    def __init__(self, strategy_class, params, history_data, engine_settings, parent=None):
+        super().__init__(parent)
+        self.strategy_class = strategy_class
+        self.params = params
+        self.history_data = history_data
+        self.engine_settings = engine_settings
+        self.worker = None
+        self.init_ui()
+
+    def init_ui(self):
+        from optimizer import OPTIMIZATION_TARGETS, fast_backtest
+
+        self.setWindowTitle(f"参数优化 - {self.strategy_class.__name__}")
+        self.resize(900, 700)
+
+        # 参数范围：结束值和步长留空表示固定参数
+        self.param_table = QTableWidget(len(self.params), 4)
+        self.param_table.setHorizontalHeaderLabels(["参数", "起始值", "结束值", "步长"])
+        self.param_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for row, (name, value) in enumerate(self.params.items()):
+            name_item = QTableWidgetItem(name)
+            name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
+            self.param_table.setItem(row, 0, name_item)
+            self.param_table.setItem(row, 1, QTableWidgetItem(str(value)))
+            self.param_table.setItem(row, 2, QTableWidgetItem(""))
+            self.param_table.setItem(row, 3, QTableWidgetItem(""))
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["网格搜索", "随机搜索"])
+        self.sample_edit = QLineEdit("50")
+        self.sample_edit.setValidator(QIntValidator(1, 1_000_000))
+
+        self.target_combo = QComboBox()
+        for target in OPTIMIZATION_TARGETS:
+            self.target_combo.addItem(STAT_TRANSLATIONS.get(target, target), target)
+
+        self.workers_edit = QLineEdit(str(os.cpu_count()))
+        self.workers_edit.setValidator(QIntValidator(1, 1024))
+
+        form = QFormLayout()
+        form.addRow("搜索方式", self.mode_combo)
+        form.addRow("随机抽样组数", self.sample_edit)
+        form.addRow("优化目标", self.target_combo)
+        form.addRow("进程数", self.workers_edit)
+
+        # 快速筛选：向量化回测或编译内核，结果与事件驱动回测一致
+        self.vector_check = QCheckBox("快速回测（向量化/编译内核）")
+        # 快速回测按对价全部成交，开启盘口成交模型时不可用
+        self.vector_check.setEnabled(
+            fast_backtest(self.strategy_class) is not None and self.engine_settings.get("fill_model") is None
+        )
+        form.addRow("", self.vector_check)
+
+        self.run_btn = QPushButton("开始优化")
+        self.run_btn.clicked.connect(self.start_optimization)
+        self.progress_bar = QProgressBar()
+
+        self.result_table = QTableWidget()
+        self.result_table.setSortingEnabled(True)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.param_table)
+        layout.addLayout(form)
+        layout.addWidget(self.run_btn)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.result_table)
+        self.setLayout(layout)
+
+    def get_optimization_setting(self):
+        from vnpy.trader.optimize import OptimizationSetting
+
+        setting = OptimizationSetting()
+        for row, (name, value) in enumerate(self.params.items()):
+            param_type = type(value)
+            start, end, step = (self.param_table.item(row, col).text().strip() for col in (1, 2, 3))
+            if end and step:
+                ok, msg = setting.add_parameter(name, param_type(start), param_type(end), param_type(step))
+            else:
+                ok, msg = setting.add_parameter(name, param_type(start) if start else value)
+            if not ok:
+                raise ValueError(f"{name}: {msg}")
+        return setting
+
+    def start_optimization(self):
+        from optimizer import grid_settings, random_settings
+
+        try:
+            optimization_setting = self.get_optimization_setting()
+        except ValueError as e:
+            self.progress_bar.setFormat(f"参数格式错误: {e}")
+            return
+
+        if self.mode_combo.currentIndex() == 0:
+            settings = grid_settings(optimization_setting)
+        else:
+            settings = random_settings(optimization_setting, int(self.sample_edit.text() or 1))
+        self.swept_params = [name for name, values in optimization_setting.params.items() if len(values) > 1]
+        self.target_name = self.target_combo.currentData()
+
+        self.run_btn.setEnabled(False)
+        self.progress_bar.setRange(0, len(settings))
+        self.progress_bar.setValue(0)
+
+        self.worker = OptimizationWorker(
+            self.strategy_class,
+            settings,
+            self.history_data,
+            self.engine_settings,
+            self.target_name,
+            int(self.workers_edit.text() or 1),
+            self.vector_check.isChecked()
+        )
+        self.worker.progress.connect(lambda done, total: self.progress_bar.setValue(done))
+        self.worker.finished.connect(self.handle_result)
+        self.worker.start()
+
+    def handle_result(self, results):
+        self.run_btn.setEnabled(True)
+        if isinstance(results, Exception):
+            self.progress_bar.setFormat(f"优化失败: {results}")
+            return
+
+        stat_keys = [self.target_name] + [key for key in self.result_columns if key != self.target_name]
+        headers = self.swept_params + [STAT_TRANSLATIONS.get(key, key) for key in stat_keys]
+
+        # 填充期间关闭排序，避免行在写入过程中被重排
+        self.result_table.setSortingEnabled(False)
+        self.result_table.clear()
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.setRowCount(len(results))
+        for row, (setting, _, statistics) in enumerate(results):
+            values = [setting[name] for name in self.swept_params] + [statistics[key] for key in stat_keys]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                # 以数值写入，表头点击排序时按大小而不是字符串排序
+                item.setData(Qt.DisplayRole, float(value))
+                self.result_table.setItem(row, col, item)
+        self.result_table.setSortingEnabled(True)
+
+
 class StrategyConfigWidget(QWidget):
     def __init__(self, strategy_class, parent=None):
         super().__init__(parent)
@@ -216,11 +609,34 @@ class BacktestGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.history_data = []
+        self.log_buffer = LogBuffer.for_session()
+        self.log_lines = deque(maxlen=MAX_LOG_LINES)
+        self.log_level = logging.INFO
+        # 最近一次加载和回测的分阶段耗时
+        self.load_timer = None
+        self.run_timer = StageTimer()
         self.init_ui()
         self.loader = None
         self.worker = None
-        # 延迟最大化，确保布局完成
+        self.result_cache = None
+        self.strategy_classes = None
+        # 延迟最大化，确保布局完成；策略模块（连带 vnpy、pandas）在窗口显示后再导入
         QTimer.singleShot(0, self.showMaximized)
+        QTimer.singleShot(0, self.init_strategies)
+
+    def init_strategies(self):
+        if self.strategy_classes is not None:
+            return
+        self.strategy_classes = load_strategies()
+        placeholder = self.strategy_stack.widget(0)
+        self.strategy_stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        for index, strategy_class in enumerate(self.strategy_classes):
+            self.strategy_widgets[index] = StrategyConfigWidget(strategy_class)
+            self.strategy_stack.addWidget(self.strategy_widgets[index])
+        self.strategy_stack.setCurrentIndex(self.strategy_combo.currentIndex())
+        self.start_btn.setEnabled(True)
+        self.optimize_btn.setEnabled(True)
 
     def init_ui(self):
         self.setFont(QFont("Arial", 11))
@@ -234,6 +650,7 @@ class BacktestGUI(QMainWindow):
         data_group = QGroupBox("数据配置")
         data_layout = QFormLayout()
         self.symbol_edit = QLineEdit("AL2401")
+        self.symbol_edit.setPlaceholderText("多个合约用逗号分隔，如 AL2401,CU2401,ZN2401")
 
         default_start = QDateTime(2024, 4, 1, 0, 0, 0)
         default_end = QDateTime(2024, 5, 1, 0, 0, 0)
@@ -242,6 +659,12 @@ class BacktestGUI(QMainWindow):
         self.start_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
         self.end_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
 
+        self.workers_edit = QLineEdit("4")
+        self.workers_edit.setValidator(QIntValidator(1, 64))
+
+        self.cache_check = QCheckBox("使用本地缓存")
+        self.cache_check.setChecked(True)
+
         self.load_btn = QPushButton("加载数据")
         self.load_btn.clicked.connect(self.load_data)
         self.data_progress = QProgressBar()
@@ -249,6 +672,8 @@ class BacktestGUI(QMainWindow):
         data_layout.addRow("合约代码", self.symbol_edit)
         data_layout.addRow("开始时间", self.start_edit)
         data_layout.addRow("结束时间", self.end_edit)
+        data_layout.addRow("并发查询数", self.workers_edit)
+        data_layout.addRow(self.cache_check)
         data_layout.addRow(self.load_btn)
         data_layout.addRow(self.data_progress)
         data_group.setLayout(data_layout)
@@ -257,21 +682,12 @@ class BacktestGUI(QMainWindow):
         strategy_group = QGroupBox("策略配置")
         strategy_layout = QVBoxLayout()
         self.strategy_combo = QComboBox()
-        self.strategy_combo.addItems([
-            "动态双均线策略",
-            "MACD背离策略",
-            "布林通道策略"
-        ])
+        self.strategy_combo.addItems(STRATEGY_NAMES)
         self.strategy_stack = QStackedWidget()
 
-        # 创建策略配置部件
-        self.strategy_widgets = {
-            0: StrategyConfigWidget(DynamicTickDoubleMaStrategy),
-            1: StrategyConfigWidget(MacdDivergenceTickStrategy),
-            2: StrategyConfigWidget(TickDynamicBollChannelStrategy)
-        }
-        for widget in self.strategy_widgets.values():
-            self.strategy_stack.addWidget(widget)
+        # 策略配置部件在窗口显示后由 init_strategies 创建
+        self.strategy_widgets = {}
+        self.strategy_stack.addWidget(QLabel("正在加载策略…"))
 
         strategy_layout.addWidget(QLabel("选择策略："))
         strategy_layout.addWidget(self.strategy_combo)
@@ -279,13 +695,35 @@ class BacktestGUI(QMainWindow):
         strategy_group.setLayout(strategy_layout)
 
         # 将回测按钮和进度条移动到策略下方
+        self.stream_check = QCheckBox("逐日流式回放（无需预先加载数据）")
+        self.profile_check = QCheckBox("cProfile性能分析（结果保存到 logs/）")
+        # 盘口成交模型：按买卖一档挂单量部分成交，可设委托延迟
+        self.fill_model_check = QCheckBox("盘口成交模型（按一档挂单量部分成交）")
+        # 相同策略代码、参数、引擎设置和数据的回测直接读取磁盘上的结果
+        self.result_cache_check = QCheckBox("回测结果缓存（相同回测跳过回放）")
+        self.result_cache_check.setChecked(True)
+        self.latency_edit = QLineEdit("0")
+        self.latency_edit.setValidator(QIntValidator(0, 60_000))
+        latency_layout = QHBoxLayout()
+        latency_layout.addWidget(QLabel("委托延迟(ms)"))
+        latency_layout.addWidget(self.latency_edit)
         self.start_btn = QPushButton("开始回测")
+        self.optimize_btn = QPushButton("参数优化")
         self.progress_bar = QProgressBar()
         control_layout = QVBoxLayout()
+        control_layout.addWidget(self.stream_check)
+        control_layout.addWidget(self.profile_check)
+        control_layout.addWidget(self.fill_model_check)
+        control_layout.addWidget(self.result_cache_check)
+        control_layout.addLayout(latency_layout)
         control_layout.addWidget(self.start_btn)
+        control_layout.addWidget(self.optimize_btn)
         control_layout.addWidget(self.progress_bar)
         strategy_layout.addLayout(control_layout)
         self.start_btn.clicked.connect(self.start_backtest)
+        self.optimize_btn.clicked.connect(self.open_optimization)
+        self.start_btn.setEnabled(False)
+        self.optimize_btn.setEnabled(False)
 
         left_panel.addWidget(data_group)
         left_panel.addWidget(strategy_group)
@@ -308,7 +746,21 @@ class BacktestGUI(QMainWindow):
         log_group = QGroupBox("运行日志")
         self.log_view = QTextEdit()
         self.log_view.setReadOnly(True)
+        # 视图按行数封顶，超出后自动丢弃最早的行
+        self.log_view.document().setMaximumBlockCount(MAX_LOG_LINES)
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItems(list(LOG_LEVELS))
+        self.log_level_combo.setCurrentText("INFO")
+        self.log_level_combo.currentTextChanged.connect(self.set_log_level)
+        level_layout = QHBoxLayout()
+        level_layout.addWidget(QLabel("日志级别"))
+        level_layout.addWidget(self.log_level_combo)
+        level_layout.addStretch()
+        self.export_timing_btn = QPushButton("导出耗时分解")
+        self.export_timing_btn.clicked.connect(self.export_timings)
+        level_layout.addWidget(self.export_timing_btn)
         log_layout = QVBoxLayout()
+        log_layout.addLayout(level_layout)
         log_layout.addWidget(self.log_view)
         log_group.setLayout(log_layout)
 
@@ -322,13 +774,9 @@ class BacktestGUI(QMainWindow):
         chart_group = QGroupBox("分析图表")
         chart_splitter = QSplitter(Qt.Vertical)
 
-        # 右侧：四个 Matplotlib 画布
+        # 右侧：四个 Matplotlib 画布，第一次出图时才创建（见 init_charts）
+        self.chart_splitter = chart_splitter
         self.canvases = []
-        for _ in range(4):
-            fig = Figure(figsize=(4, 3))
-            canvas = FigureCanvas(fig)
-            chart_splitter.addWidget(canvas)
-            self.canvases.append((fig, canvas))
 
         chart_layout = QVBoxLayout()
         chart_layout.addWidget(chart_splitter)
@@ -346,136 +794,358 @@ class BacktestGUI(QMainWindow):
         # 信号连接
         self.strategy_combo.currentIndexChanged.connect(self.strategy_stack.setCurrentIndex)
 
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_logs)
+        self.log_timer.start(LOG_FLUSH_INTERVAL_MS)
+        self.write_log(f"完整日志写入 {self.log_buffer.path}")
+
+    def write_log(self, msg, level=logging.INFO):
+        self.log_buffer.write(f"[{datetime.now()}] {msg}", level)
+
+    def flush_logs(self):
+        lines = self.log_buffer.drain()
+        if not lines:
+            return
+        self.log_lines.extend(lines)
+        visible = [line for level, line in lines if level >= self.log_level]
+        if visible:
+            self.log_view.append("\n".join(visible[-MAX_LOG_LINES:]))
+
+    def set_log_level(self, name):
+        self.log_level = LOG_LEVELS[name]
+        self.log_view.setPlainText("\n".join(line for level, line in self.log_lines if level >= self.log_level))
+        self.log_view.moveCursor(QTextCursor.End)
+
+    def export_timings(self):
+        # 导出最近一次回测的耗时；还没有回测时导出数据加载的耗时
+        timer = self.run_timer if self.run_timer.stages else self.load_timer
+        if timer is None:
+            self.write_log("还没有可导出的耗时记录", logging.WARNING)
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出耗时分解", "timings.csv", "CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+        timer.export(path)
+        self.write_log(f"耗时分解已导出至 {path}")
+
+    def closeEvent(self, event):
+        self.flush_logs()
+        self.log_buffer.close()
+        super().closeEvent(event)
+
     def load_config(self):
         pass
 
+    def current_symbols(self):
+        # 合约代码同时决定 DolphinDB 查询的合约过滤条件和回测的 vt_symbol；多个合约时做组合回测
+        from tick_backtest_runner import parse_symbols
+
+        return parse_symbols(self.symbol_edit.text())
+
+    def current_symbol(self):
+        symbols = self.current_symbols()
+        return symbols[0] if symbols else ""
+
+    def create_data_feed(self):
+        from dolphindb_tick_feed import DolphinDBTickFeed
+        from tick_cache import TickCache
+
+        return DolphinDBTickFeed(host=DB_IP,
+                                 port=DB_PORT,
+                                 user=DB_USER,
+                                 password=DB_PASSWORD,
+                                 cache=TickCache() if self.cache_check.isChecked() else None,
+                                 max_workers=int(self.workers_edit.text() or 1))
+
     def load_data(self):
-        self.data_progress.setRange(0, 0)
+        self.data_progress.setRange(0, 100)
+        self.data_progress.setValue(0)
+        self.data_progress.setFormat("%p%")
         self.load_btn.setEnabled(False)
 
-        data_feed = DolphinDBTickFeed(host=DB_IP,
-                                      port=DB_PORT,
-                                      user=DB_USER,
-                                      password=DB_PASSWORD)
+        self.load_timer = StageTimer()
         self.loader = DataLoader(
-            data_feed=data_feed,
-            symbol=self.symbol_edit.text(),
+            data_feed=self.create_data_feed(),
+            symbols=self.current_symbols(),
             exchange=Exchange.SHFE,
             start=self.start_edit.dateTime().toPython(),
-            end=self.end_edit.dateTime().toPython()
+            end=self.end_edit.dateTime().toPython(),
+            log_buffer=self.log_buffer,
+            timer=self.load_timer,
+            profile_file=profile_path("load") if self.profile_check.isChecked() else None
         )
 
+        self.loader.progress.connect(self.update_data_progress)
         self.loader.finished.connect(self.handle_data_loaded)
         self.loader.error.connect(self.handle_data_error)
         self.loader.start()
 
+    def update_data_progress(self, percent, text):
+        self.data_progress.setValue(percent)
+        self.data_progress.setFormat(text)
+
+    def update_backtest_progress(self, percent, text):
+        # percent 为 -1 表示总量未知，只更新文字
+        if percent >= 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(text)
+
     def handle_data_loaded(self, ticks):
         self.history_data = ticks
         self.data_progress.setRange(0, 1)
         self.data_progress.setFormat("已成功加载！")
         self.load_btn.setEnabled(True)
-        self.log_view.append(f"[{datetime.now()}] 成功加载 {len(ticks)} 条tick数据")
+        if isinstance(ticks, dict):
+            self.write_log("成功加载 " + "，".join(f"{symbol} {len(store)} 条" for symbol, store in ticks.items()) + " tick数据")
+        else:
+            self.write_log(f"成功加载 {len(ticks)} 条tick数据")
+        self.write_log(f"数据加载耗时分解:\n{self.load_timer.report()}")
 
     def handle_data_error(self, error_msg):
         self.data_progress.setRange(0, 1)
         self.data_progress.setFormat("加载失败！")
         self.load_btn.setEnabled(True)
-        self.log_view.append(f"[{datetime.now()}] 数据加载错误: {error_msg}")
+        self.write_log(f"数据加载错误: {error_msg}", logging.ERROR)
 
-    def start_backtest(self):
+    def selected_strategy(self):
+        # 窗口显示后的延迟加载还没执行时（如脚本直接调用）立即加载
+        self.init_strategies()
         selected_index = self.strategy_combo.currentIndex()
-        strategy_cls = [
-            DynamicTickDoubleMaStrategy,
-            MacdDivergenceTickStrategy,
-            TickDynamicBollChannelStrategy
-        ][selected_index]
+        strategy_cls = self.strategy_classes[selected_index]
 
         params = self.strategy_widgets[selected_index].get_params()
+        return strategy_cls, params
 
-        engine = BacktestingEngine()
-        engine.set_parameters(
-            vt_symbol=f"{self.symbol_edit.text()}.SHFE",
-            interval=Interval.TICK,
-            start=self.start_edit.dateTime().toPython(),
-            end=self.end_edit.dateTime().toPython(),
-            rate=0.0002,
-            slippage=2.5,
-            size=5,
-            pricetick=5,
-            capital=1_000_000,
-            mode=BacktestingMode.TICK
-        )
-        engine.history_data = self.history_data
+    def engine_settings(self):
+        settings = {
+            "vt_symbol": f"{self.current_symbol()}.{Exchange.SHFE.value}",
+            "start": self.start_edit.dateTime().toPython(),
+            "end": self.end_edit.dateTime().toPython(),
+        }
+        if self.fill_model_check.isChecked():
+            settings["fill_model"] = {"latency_ms": int(self.latency_edit.text() or 0)}
+        return settings
 
-        self.worker = BacktestWorker(engine, [(strategy_cls, params)])
-        self.worker.log_message.connect(self.log_view.append)
+    def open_optimization(self):
+        if not self.history_data:
+            self.write_log("参数优化需要先加载数据", logging.WARNING)
+            return
+        if isinstance(self.history_data, dict):
+            self.write_log("参数优化只支持单个合约，请只填写一个合约代码并重新加载数据", logging.WARNING)
+            return
+
+        strategy_cls, params = self.selected_strategy()
+        dialog = OptimizationDialog(strategy_cls, params, self.history_data, self.engine_settings(), self)
+        dialog.show()
+
+    def start_backtest(self):
+        strategy_cls, params = self.selected_strategy()
+        if len(self.current_symbols()) > 1:
+            self.start_portfolio_backtest(strategy_cls, params)
+            return
+        if isinstance(self.history_data, dict) and not self.stream_check.isChecked():
+            self.write_log("已加载的是组合数据，请重新加载单个合约的数据", logging.WARNING)
+            return
+
+        from tick_backtest_runner import create_engine
+
+        engine = create_engine(**self.engine_settings())
+        data_feed = None
+        ticks = None
+        if self.stream_check.isChecked():
+            # 流式回放：回测线程中逐日查询并消费，内存只保留一天的数据
+            data_feed = self.create_data_feed()
+            ticks = data_feed.iter_tick_data(
+                symbol=self.current_symbol(),
+                exchange=Exchange.SHFE,
+                start=self.start_edit.dateTime().toPython(),
+                end=self.end_edit.dateTime().toPython()
+            )
+        else:
+            engine.history_data = self.history_data
+
+        # 本次回测的耗时分解：预先加载的数据计入加载阶段的耗时
+        self.run_timer = StageTimer()
+        if data_feed is None and self.load_timer is not None:
+            self.run_timer.merge(self.load_timer)
+
+        # 性能分析需要实际回放，不读取缓存
+        result_cache = None
+        if self.result_cache_check.isChecked() and not self.profile_check.isChecked():
+            if self.result_cache is None:
+                from result_cache import ResultCache
+                self.result_cache = ResultCache()
+            result_cache = self.result_cache
+
+        self.worker = BacktestWorker(
+            engine,
+            [(strategy_cls, params)],
+            self.log_buffer,
+            ticks,
+            timer=self.run_timer,
+            profile_file=profile_path("backtest") if self.profile_check.isChecked() else None,
+            chart_width=self.chart_width(),
+            result_cache=result_cache
+        )
+        if data_feed is not None:
+            data_feed.output = self.log_buffer.write
+            data_feed.progress = self.worker.report_day_progress
+            data_feed.timer = self.run_timer
+        self.worker.update_progress.connect(self.update_backtest_progress)
+        self.worker.finished.connect(self.handle_backtest_result)
+        self.worker.start()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFormat("%p%")
+
+    def start_portfolio_backtest(self, strategy_cls, params):
+        # 每个合约运行同一策略的一个实例，共用一次归并回放
+        symbols = self.current_symbols()
+        stores = self.history_data
+        if not isinstance(stores, dict) or set(stores) != set(symbols):
+            self.write_log("组合回测需要先加载所填全部合约的数据", logging.WARNING)
+            return
+        if self.stream_check.isChecked():
+            self.write_log("组合回测不支持逐日流式回放，使用已加载的数据")
+
+        settings = self.engine_settings()
+        del settings["vt_symbol"]
+        self.run_timer = StageTimer()
+        if self.load_timer is not None:
+            self.run_timer.merge(self.load_timer)
+
+        self.worker = PortfolioWorker(
+            [(symbol, strategy_cls, params) for symbol in symbols],
+            stores,
+            settings,
+            self.log_buffer,
+            timer=self.run_timer,
+            profile_file=profile_path("portfolio") if self.profile_check.isChecked() else None,
+            chart_width=self.chart_width()
+        )
+        self.worker.update_progress.connect(self.update_backtest_progress)
         self.worker.finished.connect(self.handle_backtest_result)
         self.worker.start()
         self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFormat("%p%")
 
     def handle_backtest_result(self, result):
         self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(1)
         if isinstance(result, Exception):
-            self.log_view.append(f"[{datetime.now()}] 回测失败: {str(result)}")
+            self.write_log(f"回测失败: {str(result)}", logging.ERROR)
             return
 
-        df, stats = result
+        df, stats, chart = result
 
         # 更新统计表格，确保两列
-        self.stats_table.setRowCount(len(stats))
-        for row, (key, value) in enumerate(stats.items()):
-            # 翻译第一列
-            cn_key = STAT_TRANSLATIONS.get(key, key)
-            self.stats_table.setItem(row, 0, QTableWidgetItem(cn_key))
-            self.stats_table.setItem(row, 1, QTableWidgetItem(str(value)))
+        with self.run_timer.stage("统计表格"):
+            self.stats_table.setRowCount(len(stats))
+            for row, (key, value) in enumerate(stats.items()):
+                # 翻译第一列
+                cn_key = STAT_TRANSLATIONS.get(key, key)
+                self.stats_table.setItem(row, 0, QTableWidgetItem(cn_key))
+                self.stats_table.setItem(row, 1, QTableWidgetItem(str(value)))
+
+        if chart is not None:
+            with self.run_timer.stage("图表渲染"):
+                self.draw_charts(chart)
+
+        self.write_log(f"本次回测耗时分解:\n{self.run_timer.report()}")
+
+    def chart_width(self):
+        # 图表画布的像素宽度，决定降采样后的点数；画布还没创建时用图表区域的宽度
+        if self.canvases:
+            return self.canvases[0][1].width()
+        return self.chart_splitter.width()
+
+    def init_charts(self):
+        # 第一次出图时才导入 matplotlib，创建画布和各图的图元（线、填充、线段集合、阶梯直方图），之后只更新数据
+        import matplotlib
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.figure import Figure
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 黑体
+        matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+
+        axes = []
+        for title, xlabel, ylabel in [('账户净值', '日期', '资金'), ('净值回撤', '日期', '回撤'),
+                                      ('每日盈亏', '日期', '盈亏'), ('盈亏分布', '盈亏金额', '频次')]:
+            fig = Figure(figsize=(4, 3))
+            canvas = FigureCanvas(fig)
+            self.chart_splitter.addWidget(canvas)
+            self.canvases.append((fig, canvas))
+            ax = fig.add_subplot(111)
+            ax.set_title(title)
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            axes.append(ax)
+
+        # 前三个图横轴为日期，优化 x 轴日期显示，不要太密集
+        for ax in axes[:3]:
+            ax.xaxis_date()
+            ax.tick_params(axis='x', labelrotation=30)
+            ax.figure.subplots_adjust(bottom=0.2)
+
+        self.balance_line, = axes[0].plot([], [], label='逐日')
+        self.intraday_balance_line, = axes[0].plot([], [], linewidth=0.8, label='逐tick')
+        self.intraday_drawdown_line, = axes[1].plot([], [], color='darkred', linewidth=0.8)
+        self.drawdown_fill = axes[1].add_collection(PolyCollection([], facecolor='red', alpha=0.3))
+        self.pnl_bars = axes[2].add_collection(LineCollection([]))
+        self.pnl_hist = axes[3].stairs([0], [0, 1], fill=True)
+        self.chart_axes = axes
+
+    def draw_charts(self, chart):
+        # chart 由 prepare_chart_data 在回测线程中准备，这里只替换图元数据、调整坐标范围并延迟重绘
+        if not self.canvases:
+            self.init_charts()
+        balance_ax, drawdown_ax, pnl_ax, hist_ax = self.chart_axes
+        xlim = padded(*chart["xlim"])
+        balance_x, balance_y = chart["balance"]
+        balance_range = (balance_y.min(), balance_y.max())
+        drawdown_range = chart["drawdown_range"]
+
+        # 逐 tick 盯市的资金和回撤（没有时清空）
+        intraday = "intraday_balance" in chart
+        self.intraday_balance_line.set_data(*chart.get("intraday_balance", ([], [])))
+        self.intraday_drawdown_line.set_data(*chart.get("intraday_drawdown", ([], [])))
+        if intraday:
+            intraday_x, intraday_balance = chart["intraday_balance"]
+            intraday_drawdown = chart["intraday_drawdown"][1]
+            xlim = padded(min(chart["xlim"][0], intraday_x[0]), max(chart["xlim"][1], intraday_x[-1]))
+            balance_range = (min(balance_range[0], intraday_balance.min()), max(balance_range[1], intraday_balance.max()))
+            drawdown_range = (min(drawdown_range[0], intraday_drawdown.min()), 0.0)
+            balance_ax.legend(loc='upper left')
+        elif balance_ax.get_legend():
+            balance_ax.get_legend().remove()
 
         # 图1: 账户净值
-        fig, canvas = self.canvases[0]
-        fig.clear()
-        ax = fig.add_subplot(111)
-        ax.plot(df.index, df['balance'])
-        ax.set_title('账户净值')
-        ax.set_xlabel('日期')  # x轴标注
-        ax.set_ylabel('资金')  # y轴标注
-        # 优化 x 轴日期显示，不要太密集
-        fig.autofmt_xdate(rotation=30)
-        canvas.draw()
+        self.balance_line.set_data(balance_x, balance_y)
+        balance_ax.set_xlim(xlim)
+        balance_ax.set_ylim(padded(*balance_range))
 
         # 图2: 净值回撤
-        fig, canvas = self.canvases[1]
-        fig.clear()
-        ax = fig.add_subplot(111)
-        ax.fill_between(df.index, df['drawdown'], color='red', alpha=0.3)
-        ax.set_title('净值回撤')
-        ax.set_xlabel('日期')
-        ax.set_ylabel('回撤')
-        fig.autofmt_xdate(rotation=30)
-        canvas.draw()
-
-        # 图3: 每日盈亏
-        fig, canvas = self.canvases[2]
-        fig.clear()
-        ax = fig.add_subplot(111)
-        colors = ['g' if x >= 0 else 'r' for x in df['net_pnl']]
-        ax.bar(df.index, df['net_pnl'], color=colors)
-        ax.set_title('每日盈亏')
-        ax.set_xlabel('日期')
-        ax.set_ylabel('盈亏')
-        fig.autofmt_xdate(rotation=30)
-        canvas.draw()
+        self.drawdown_fill.set_verts([chart["drawdown"]])
+        drawdown_ax.set_xlim(xlim)
+        drawdown_ax.set_ylim(padded(*drawdown_range))
+
+        # 图3: 每日盈亏，线宽按每根柱子可占的像素换算成磅
+        segments = chart["pnl_segments"]
+        self.pnl_bars.set_segments(segments)
+        self.pnl_bars.set_color(chart["pnl_colors"])
+        pixels = pnl_ax.bbox.width / max(len(segments), 1)
+        self.pnl_bars.set_linewidth(max(pixels * 0.8 * 72 / pnl_ax.figure.dpi, 0.5))
+        pnl_ax.set_xlim(xlim)
+        pnl_ax.set_ylim(padded(*chart["pnl_range"]))
 
         # 图4: 盈亏分布
-        fig, canvas = self.canvases[3]
-        fig.clear()
-        ax = fig.add_subplot(111)
-        ax.hist(df['net_pnl'], bins=50)
-        ax.set_title('盈亏分布')
-        ax.set_xlabel('盈亏金额')
-        ax.set_ylabel('频次')
-        canvas.draw()
-
-        # 更新统计表格
-        self.stats_table.setRowCount(len(stats))
+        counts, edges = chart["hist"]
+        self.pnl_hist.set_data(counts, edges)
+        hist_ax.set_xlim(padded(edges[0], edges[-1]))
+        hist_ax.set_ylim(0, max(counts.max(), 1) * 1.05)
+
+        for _, canvas in self.canvases:
+            canvas.draw_idle()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,422 @@
+# 无界面回测入口：命令行/批处理/服务器上运行，不导入任何 GUI 模块（PySide6、matplotlib）
+import argparse
+import json
+import sys
+import traceback
+from datetime import date, datetime
+from pathlib import Path
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+from vnpy_ctastrategy.base import BacktestingMode
+
+from dolphindb_tick_feed import DolphinDBTickFeed, symbols_condition
+from fill_model import TCA_TRANSLATIONS, OrderBookBacktestingEngine
+from intraday_equity import calculate_intraday
+from mmap_tick_feed import MmapTickFeed
+from profiling import StageTimer, load_stage, profiled
+from progress import ProgressTracker
+from tick_bars import BAR_RESOLUTIONS, load_bars
+from tick_cache import TickCache
+from strategies import DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy
+
+STRATEGIES = {
+    cls.__name__: cls
+    for cls in (DynamicTickDoubleMaStrategy, MacdDivergenceTickStrategy, TickDynamicBollChannelStrategy)
+}
+
+# 上期所铝期货的默认回测参数，GUI 与参数优化共用
+ENGINE_SETTINGS = {
+    "interval": Interval.TICK,
+    "rate": 0.0002,
+    "slippage": 2.5,
+    "size": 5,
+    "pricetick": 5,
+    "capital": 1_000_000,
+    "mode": BacktestingMode.TICK,
+}
+
+# K 线模式回测（--interval）覆盖的引擎参数；vnpy 没有秒级 Interval，周期只影响数据加载，这里不使用
+BAR_ENGINE_SETTINGS = {
+    "interval": Interval.MINUTE,
+    "mode": BacktestingMode.BAR,
+}
+
+
+def create_engine(vt_symbol: str, start: datetime, end: datetime, fill_model: dict = None, **settings) -> BacktestingEngine:
+    # fill_model 不为 None 时使用盘口成交模型，内容为 OrderBookBacktestingEngine 的参数（延迟、可吃单比例）
+    engine = BacktestingEngine() if fill_model is None else OrderBookBacktestingEngine(**fill_model)
+    engine.set_parameters(vt_symbol=vt_symbol, start=start, end=end, **{**ENGINE_SETTINGS, **settings})
+    return engine
+
+
+def run_backtesting(engine, ticks, total: int = None, progress=None, check_every: int = 10_000) -> int:
+    # 与 BacktestingEngine.run_backtesting 相同的回放流程，但接受任意 tick 可迭代对象（如逐日加载的生成器），
+    # 不要求数据事先全部放入 engine.history_data；K 线模式的引擎回放 BarData 列表
+    # progress(done, total, speed, eta)：每 check_every 条 tick 才检查一次时间并按间隔节流回调，热循环中只多一次整数比较
+    # 返回实际回放的 tick 数
+    engine.strategy.on_init()
+    engine.strategy.inited = True
+    engine.output("策略初始化完成")
+
+    engine.strategy.on_start()
+    engine.strategy.trading = True
+    engine.output("开始回放历史数据")
+
+    if total is None and hasattr(ticks, "__len__"):
+        total = len(ticks)
+    tracker = ProgressTracker(total, progress) if progress else None
+
+    bar_mode = engine.mode == BacktestingMode.BAR
+    new_tick = engine.new_bar if bar_mode else engine.new_tick
+    count = 0
+    next_check = check_every
+    for tick in ticks:
+        try:
+            new_tick(tick)
+        except Exception:
+            engine.output("触发异常，回测终止")
+            engine.output(traceback.format_exc())
+            return count
+        count += 1
+        if count == next_check:
+            next_check += check_every
+            if tracker:
+                tracker.update(count)
+
+    if tracker:
+        tracker.update(count, force=True)
+    engine.strategy.on_stop()
+    engine.output(f"历史数据回放结束，共回放 {count} {'根K线' if bar_mode else '条tick'}")
+    return count
+
+
+def parse_symbols(text: str) -> list:
+    # "AL2401, CU2401 ZN2401" -> ["AL2401", "CU2401", "ZN2401"]，去重并保持顺序
+    symbols = []
+    for symbol in text.replace("，", ",").replace(",", " ").split():
+        symbol = symbol.upper()
+        if symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+def parse_setting(strategy_class, params: dict) -> dict:
+    # 按策略类上参数默认值的类型转换，与 GUI 的 StrategyConfigWidget 一致
+    setting = {}
+    for name, value in params.items():
+        if name not in strategy_class.parameters:
+            raise ValueError(f"{strategy_class.__name__} 没有参数 {name}")
+        setting[name] = type(getattr(strategy_class, name))(value)
+    return setting
+
+
+def run_backtest(
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    strategy_class,
+    setting: dict,
+    exchange: Exchange = Exchange.SHFE,
+    data_feed: DolphinDBTickFeed = None,
+    history_data=None,
+    stream: bool = False,
+    output=print,
+    timer: StageTimer = None,
+    interval: str = None,
+    **engine_settings
+):
+    # 加载数据 -> 回放 -> 逐日盯市 -> 统计指标，返回 (engine, daily_df, statistics)；各阶段耗时记入 timer
+    # interval 为 K 线周期（如 "1m"）时加载聚合后的 K 线，以 K 线模式回测
+    timer = timer or StageTimer()
+    if interval:
+        engine_settings = {**engine_settings, **BAR_ENGINE_SETTINGS}
+    engine = create_engine(f"{symbol}.{exchange.value}", start, end, **engine_settings)
+    engine.output = output
+    engine.add_strategy(strategy_class, setting)
+
+    if history_data is None:
+        if interval:
+            with load_stage(timer, data_feed):
+                history_data = load_bars(data_feed, symbol, exchange, start, end, interval)
+            output(f"成功加载 {len(history_data)} 根{interval}K线")
+        elif stream:
+            history_data = data_feed.iter_tick_data(symbol, exchange, start, end)
+        else:
+            with load_stage(timer, data_feed):
+                history_data = data_feed.load_tick_store(symbol, exchange, start, end)
+            output(f"成功加载 {len(history_data)} 条tick数据")
+    # 一次加载的数据（TickStore、K 线列表）与 BacktestingEngine.load_data 一样留在 engine.history_data 中，供逐 tick 盯市使用
+    if hasattr(history_data, "__len__"):
+        engine.history_data = history_data
+
+    # 流式回放时逐日加载发生在回放过程中，耗时同时计入回放
+    with timer.stage("回放"):
+        timer.count("回放K线数" if interval else "回放tick数", run_backtesting(engine, history_data))
+    with timer.stage("逐日盯市"):
+        df = engine.calculate_result()
+    with timer.stage("统计指标"):
+        statistics = engine.calculate_statistics(output=False)
+    return engine, df, statistics
+
+
+def to_builtin(value):
+    # 统计结果中的 numpy 数值、日期转换为可 JSON 序列化的类型
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def save_results(output_dir, statistics: dict, df, trades: list) -> None:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(output_dir / "statistics.json", "w", encoding="utf-8") as f:
+        json.dump({key: to_builtin(value) for key, value in statistics.items()}, f, ensure_ascii=False, indent=2)
+
+    if df is not None:
+        df.drop(columns=["trades"], errors="ignore").to_csv(output_dir / "daily_results.csv")
+
+    with open(output_dir / "trades.csv", "w", encoding="utf-8") as f:
+        f.write("datetime,direction,offset,price,volume\n")
+        for trade in trades:
+            f.write(f"{trade.datetime},{trade.direction.value},{trade.offset.value},{trade.price},{trade.volume}\n")
+
+
+def save_tca(output_dir, tca: dict) -> None:
+    with open(Path(output_dir) / "tca.json", "w", encoding="utf-8") as f:
+        json.dump(tca, f, ensure_ascii=False, indent=2)
+    print("\n".join(f"{TCA_TRANSLATIONS[key]}: {value:,.4g}" for key, value in tca.items()))
+
+
+def default_db_settings() -> dict:
+    # 数据库连接默认取自 config.py（与 GUI 相同），不存在时使用 DolphinDBTickFeed 的默认值
+    try:
+        import config
+    except ImportError:
+        return {}
+    return {
+        "host": config.DB_IP,
+        "port": config.DB_PORT,
+        "user": config.DB_USER,
+        "password": config.DB_PASSWORD,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tick级无界面回测")
+    parser.add_argument("--config", help="JSON 配置文件，命令行参数优先")
+    parser.add_argument("--symbol", help="合约代码，如 AL2401；多个合约用逗号分隔时做组合回测")
+    parser.add_argument("--exchange", help="交易所，默认 SHFE")
+    parser.add_argument("--start", help="开始日期，如 2024-04-01")
+    parser.add_argument("--end", help="结束日期（含），如 2024-04-30")
+    parser.add_argument("--strategy", help="策略类名：" + ", ".join(STRATEGIES))
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="策略参数，可重复")
+    parser.add_argument("--output", help="结果输出目录，默认 results/<合约>_<策略>")
+    parser.add_argument("--stream", action="store_true", default=None, help="逐日流式回放")
+    parser.add_argument("--interval", choices=list(BAR_RESOLUTIONS),
+                        help="由 tick 聚合为该周期的 K 线后以 K 线模式回测（策略按收盘价运行），默认逐 tick 回测")
+    parser.add_argument("--no-cache", action="store_true", default=None, help="不使用本地 tick 缓存")
+    parser.add_argument("--cache-dir", help="本地 tick 缓存目录")
+    parser.add_argument("--workers", type=int, help="并发查询的交易日数")
+    parser.add_argument("--tick-file", help="从导出的 tick 文件（内存映射）读取数据，不连接数据库")
+    parser.add_argument("--export-tick-file", help="把所选区间的 tick 导出为内存映射文件后退出")
+    parser.add_argument("--profile", help="用 cProfile 分析本次回测，结果写入该文件（.prof）")
+    parser.add_argument("--fill-model", action="store_true", default=None, help="按买卖一档挂单量部分成交（盘口成交模型）")
+    parser.add_argument("--latency-ms", type=float, help="盘口成交模型的委托延迟（毫秒）")
+    parser.add_argument("--latency-ticks", type=int, help="盘口成交模型的委托延迟（tick 数）")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    return parser.parse_args(argv)
+
+
+def load_run_config(args) -> dict:
+    # 合并配置文件与命令行参数
+    run_config = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            run_config = json.load(f)
+
+    for key in ("symbol", "exchange", "start", "end", "strategy", "output", "stream", "workers", "cache_dir",
+                "tick_file", "interval"):
+        value = getattr(args, key)
+        if value is not None:
+            run_config[key] = value
+    if args.no_cache:
+        run_config["cache"] = False
+
+    # 盘口成交模型的参数放在 engine.fill_model 中，与其他引擎参数一起传给 create_engine
+    engine = dict(run_config.get("engine", {}))
+    fill_model = engine.get("fill_model")
+    if args.fill_model or args.latency_ms is not None or args.latency_ticks is not None:
+        fill_model = dict(fill_model or {})
+        if args.latency_ms is not None:
+            fill_model["latency_ms"] = args.latency_ms
+        if args.latency_ticks is not None:
+            fill_model["latency_ticks"] = args.latency_ticks
+    if fill_model is not None:
+        engine["fill_model"] = fill_model
+    run_config["engine"] = engine
+    interval = run_config.get("interval")
+    if interval and interval not in BAR_RESOLUTIONS:
+        raise ValueError(f"未知 K 线周期 {interval}，可选：{', '.join(BAR_RESOLUTIONS)}")
+    if interval and fill_model is not None:
+        raise ValueError("盘口成交模型按买卖一档撮合，需要逐 tick 回测，不能与 interval 同时使用")
+
+    params = dict(run_config.get("params", {}))
+    for item in args.param:
+        name, _, value = item.partition("=")
+        params[name.strip()] = value.strip()
+    run_config["params"] = params
+
+    db = {**default_db_settings(), **run_config.get("db", {})}
+    for key in ("host", "port", "user", "password"):
+        value = getattr(args, key)
+        if value is not None:
+            db[key] = value
+    run_config["db"] = db
+
+    required = ("symbol", "start", "end") if args.export_tick_file else ("symbol", "start", "end", "strategy")
+    for key in required:
+        if not run_config.get(key):
+            raise ValueError(f"缺少必需参数 {key}")
+    return run_config
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        run_config = load_run_config(args)
+        exchange = Exchange(run_config.get("exchange", "SHFE"))
+        start = datetime.fromisoformat(run_config["start"])
+        end = datetime.fromisoformat(run_config["end"])
+        if not args.export_tick_file:
+            if run_config["strategy"] not in STRATEGIES:
+                raise ValueError(f"未知策略 {run_config['strategy']}，可选：{', '.join(STRATEGIES)}")
+            strategy_class = STRATEGIES[run_config["strategy"]]
+            setting = parse_setting(strategy_class, run_config["params"])
+    except ValueError as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 2
+
+    # 多个合约（逗号分隔）时对每个合约运行同一策略，做组合回测
+    symbols = parse_symbols(run_config["symbol"])
+    symbol = symbols[0]
+    if len(symbols) > 1 and (args.export_tick_file or run_config.get("tick_file")):
+        print("参数错误: tick 文件只能包含单个合约", file=sys.stderr)
+        return 2
+    if args.export_tick_file and run_config.get("tick_file"):
+        print("参数错误: --export-tick-file 从 DolphinDB 导出数据，不能与 --tick-file 同时使用", file=sys.stderr)
+        return 2
+    interval = run_config.get("interval")
+    if len(symbols) > 1 and interval:
+        print("参数错误: 组合回测只支持逐 tick 回测", file=sys.stderr)
+        return 2
+
+    if run_config.get("tick_file"):
+        data_feed = MmapTickFeed(run_config["tick_file"])
+    else:
+        # 合约代码和交易所要拼进查询脚本，连接数据库前先检查
+        try:
+            symbols_condition(symbols, exchange)
+        except ValueError as e:
+            print(f"参数错误: {e}", file=sys.stderr)
+            return 2
+
+        cache = None
+        if run_config.get("cache", True):
+            cache = TickCache(run_config["cache_dir"]) if run_config.get("cache_dir") else TickCache()
+
+        data_feed = DolphinDBTickFeed(
+            **run_config["db"],
+            cache=cache,
+            max_workers=run_config.get("workers", 1),
+            output=print
+        )
+
+    if args.export_tick_file:
+        path = data_feed.export_tick_file(symbol, exchange, start, end, args.export_tick_file)
+        print(f"tick 数据已导出至 {path}")
+        return 0
+
+    timer = data_feed.timer if isinstance(data_feed, DolphinDBTickFeed) else StageTimer()
+    if len(symbols) > 1:
+        return run_portfolio_main(args, run_config, symbols, exchange, start, end, strategy_class, setting,
+                                  data_feed, timer)
+
+    if interval and run_config.get("stream"):
+        print("K 线模式回测一次加载聚合后的 K 线，不使用逐日流式回放")
+    with profiled(args.profile):
+        engine, df, statistics = run_backtest(
+            symbol, start, end, strategy_class, setting,
+            exchange=exchange,
+            data_feed=data_feed,
+            stream=run_config.get("stream", False),
+            timer=timer,
+            interval=interval,
+            **run_config.get("engine", {})
+        )
+
+    name = f"{symbol}_{strategy_class.__name__}" + (f"_{interval}" if interval else "")
+    output_dir = run_config.get("output") or Path("results") / name
+    # 逐 tick 盯市的回撤等指标并入统计结果，降采样后的逐 tick 资金曲线另存为 intraday_equity.csv
+    intraday = None
+    if not interval and not run_config.get("stream"):
+        with timer.stage("逐tick盯市"):
+            intraday = calculate_intraday(engine)
+    if intraday:
+        statistics.update(intraday[0])
+    save_results(output_dir, statistics, df, engine.get_all_trades())
+    if intraday:
+        intraday[1].to_csv(Path(output_dir) / "intraday_equity.csv", index=False)
+    if isinstance(engine, OrderBookBacktestingEngine):
+        save_tca(output_dir, engine.calculate_tca())
+    timer.export(Path(output_dir) / "timings.csv")
+    print(f"耗时分解:\n{timer.report()}")
+    if args.profile:
+        print(f"性能分析结果已保存至 {args.profile}")
+    print(f"回测结果已保存至 {output_dir}")
+    return 0
+
+
+def run_portfolio_main(args, run_config, symbols, exchange, start, end, strategy_class, setting, data_feed, timer) -> int:
+    # 局部导入：portfolio 依赖本模块的 create_engine
+    from portfolio import run_portfolio_backtest
+
+    if run_config.get("stream"):
+        print("组合回测不支持逐日流式回放，改为一次加载")
+    with profiled(args.profile):
+        engines, results, df, statistics = run_portfolio_backtest(
+            [(symbol, strategy_class, setting) for symbol in symbols],
+            start, end,
+            exchange=exchange,
+            data_feed=data_feed,
+            timer=timer,
+            **run_config.get("engine", {})
+        )
+
+    # 组合结果在输出目录下，各策略的结果在以策略名命名的子目录中
+    output_dir = Path(run_config.get("output") or Path("results") / f"{'_'.join(symbols)}_{strategy_class.__name__}")
+    trades = [trade for _, engine in engines for trade in engine.get_all_trades()]
+    save_results(output_dir, statistics, df, sorted(trades, key=lambda trade: trade.datetime))
+    for name, engine in engines:
+        leg_df, leg_statistics = results[name]
+        save_results(output_dir / name, leg_statistics, leg_df, engine.get_all_trades())
+        if isinstance(engine, OrderBookBacktestingEngine):
+            save_tca(output_dir / name, engine.calculate_tca())
+        print(f"{name}: 总净收益 {leg_statistics.get('total_net_pnl', 0):,.2f}，"
+              f"成交 {leg_statistics.get('total_trade_count', 0)} 笔")
+    timer.export(output_dir / "timings.csv")
+    print(f"耗时分解:\n{timer.report()}")
+    if args.profile:
+        print(f"性能分析结果已保存至 {args.profile}")
+    print(f"组合回测结果已保存至 {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# tick 聚合为 K 线（1s/1m/5m OHLCV）：本地按时间分桶向量化聚合，结果与 DolphinDBTickFeed.build_bar_query
+# 在服务端 group by bar(time, 周期) 的聚合规则一致；K 线按周期缓存，可直接用于 K 线模式（BacktestingMode.BAR）回测
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+# 支持的 K 线周期 -> 秒数
+BAR_RESOLUTIONS = {"1s": 1, "1m": 60, "5m": 300}
+
+# K 线 DataFrame 的列，time 为 K 线起始时间（与 vnpy BarGenerator 一致）
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "volume", "money"]
+
+
+def bar_cache_key(key: str, resolution: str) -> str:
+    # 与 tick 缓存共用同一个 TickCache（共享容量上限和 LRU 淘汰），K 线放在按周期区分的子目录中
+    return f"bars_{resolution}/{key}"
+
+
+def bar_interval(resolution: str):
+    # vnpy 没有秒级 Interval，秒级 K 线不标注周期
+    return Interval.MINUTE if BAR_RESOLUTIONS[resolution] % 60 == 0 else None
+
+
+def empty_bars() -> pd.DataFrame:
+    return pd.DataFrame({
+        column: np.array([], dtype="datetime64[ns]" if column == "time" else float) for column in BAR_COLUMNS
+    })
+
+
+def aggregate_bars(times: np.ndarray, price: np.ndarray, volume: np.ndarray, money: np.ndarray,
+                   resolution: str) -> pd.DataFrame:
+    # times 已按时间排序；最新价为 0 的 tick 不参与聚合
+    # 成交量、成交额为当日累计值，逐笔取增量：每个自然日第一笔为 0，累计值回落（新交易时段重新累计）时取累计值本身
+    valid = price > 0
+    times = np.asarray(times, dtype="datetime64[ns]")[valid]
+    price, volume, money = price[valid], volume[valid], money[valid]
+    if not len(times):
+        return empty_bars()
+
+    new_day = np.empty(len(times), dtype=bool)
+    new_day[0] = True
+    days = times.astype("datetime64[D]")
+    new_day[1:] = days[1:] != days[:-1]
+    delta_volume = incremental(volume, new_day)
+    delta_money = incremental(money, new_day)
+
+    # 时间向下取整到周期起点，相邻 tick 桶号变化处即新 K 线的第一笔
+    step = np.timedelta64(BAR_RESOLUTIONS[resolution], "s")
+    buckets = times - (times - np.datetime64(0, "ns")) % step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    return pd.DataFrame({
+        "time": buckets[starts],
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": np.add.reduceat(delta_volume, starts),
+        "money": np.add.reduceat(delta_money, starts),
+    })
+
+
+def incremental(cumulative: np.ndarray, new_day: np.ndarray) -> np.ndarray:
+    delta = np.diff(cumulative, prepend=cumulative[0])
+    delta = np.where(delta < 0, cumulative, delta)
+    delta[new_day] = 0
+    return delta
+
+
+def bars_from_tick_dataframe(df: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    return aggregate_bars(
+        df["time"].to_numpy(dtype="datetime64[ns]"),
+        df["current"].to_numpy(dtype=float),
+        df["volume"].to_numpy(dtype=float),
+        df["money"].to_numpy(dtype=float),
+        resolution
+    )
+
+
+def bars_from_store(store, resolution: str) -> pd.DataFrame:
+    # 直接在已加载的 TickStore（或 tick 文件映射）上聚合，不经过 TickData
+    return aggregate_bars(store.datetime, store.last_price, store.volume, store.turnover, resolution)
+
+
+def df_to_bars(df: pd.DataFrame, symbol: str, exchange: Exchange, resolution: str, gateway_name: str = "DDB") -> list:
+    # 与 TickStore.iter_ticks 相同的做法：模板对象的属性字典逐条复制，只覆盖行情字段
+    template = BarData(
+        symbol=symbol,
+        exchange=exchange,
+        datetime=datetime.min,
+        interval=bar_interval(resolution),
+        gateway_name=gateway_name
+    ).__dict__
+    new_bar = object.__new__
+    times = df["time"].to_numpy(dtype="datetime64[us]").astype(object)
+    columns = [df[column].to_numpy(dtype=float).tolist() for column in BAR_COLUMNS[1:]]
+
+    bars = []
+    for dt, open_price, high, low, close, volume, money in zip(times, *columns):
+        bar = new_bar(BarData)
+        bar.__dict__.update(template)
+        bar.datetime = dt
+        bar.open_price = open_price
+        bar.high_price = high
+        bar.low_price = low
+        bar.close_price = close
+        bar.volume = volume
+        bar.turnover = money
+        bars.append(bar)
+    return bars
+
+
+def load_bars(data_feed, symbol: str, exchange: Exchange, start: datetime, end: datetime, resolution: str) -> list:
+    # DolphinDBTickFeed 按周期缓存并可在服务端聚合；其他数据源（如 MmapTickFeed）加载 tick 后在本地聚合
+    if hasattr(data_feed, "load_bars"):
+        return data_feed.load_bars(symbol, exchange, start, end, resolution)
+    store = data_feed.load_tick_store(symbol, exchange, start, end)
+    return df_to_bars(bars_from_store(store, resolution), symbol, exchange, resolution, store.gateway_name)
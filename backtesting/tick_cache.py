@@ -0,0 +1,86 @@
+import os
+import threading
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "tick_cache"
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3  # 默认缓存上限 10GB
+# 超过上限时一次淘汰到上限的 90%，之后若干次写入都不必再扫描目录
+EVICT_RATIO = 0.9
+
+
+def evict_lru(root: Path, max_bytes: int, pattern: str = "*.parquet") -> int:
+    # 按最近访问时间（mtime）从旧到新删除文件，直到目录总大小不超过上限；返回淘汰后的总大小
+    files = []
+    for path in root.rglob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    return total
+
+
+class TickCache:
+    # 本地 tick 缓存：每个合约每个交易日一个 Parquet 文件，按文件大小做 LRU 淘汰
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # 缓存总大小只在创建时扫描一次，之后随写入累加，超过上限时才扫描目录淘汰（并校正累计值）；
+        # 预取时多个线程同时写入，累加和淘汰需要加锁
+        self.lock = threading.Lock()
+        self.total = self.size()
+
+    def path(self, key: str, day: date) -> Path:
+        return self.root / key / f"{day:%Y%m%d}.parquet"
+
+    def get(self, key: str, day: date):
+        path = self.path(key, day)
+        try:
+            df = pd.read_parquet(path)
+            # 读取即视为访问，刷新 mtime 供 LRU 淘汰使用
+            os.utime(path)
+        except FileNotFoundError:
+            # 不存在，或刚被其他线程的写入淘汰，视为未命中
+            return None
+        return df
+
+    def put(self, key: str, day: date, df: pd.DataFrame) -> None:
+        path = self.path(key, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先写临时文件再改名，避免中断后留下损坏的缓存
+        tmp_path = path.with_suffix(".tmp")
+        df.to_parquet(tmp_path, index=False)
+        size = tmp_path.stat().st_size
+
+        with self.lock:
+            try:
+                # 覆盖已有文件时扣除旧文件大小
+                size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self.total += size
+            if self.total > self.max_bytes:
+                self.total = evict_lru(self.root, int(self.max_bytes * EVICT_RATIO))
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.root.rglob("*.parquet"))
+
+    def clear(self) -> None:
+        with self.lock:
+            for path in self.root.rglob("*.parquet"):
+                path.unlink(missing_ok=True)
+            self.total = 0
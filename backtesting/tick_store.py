@@ -0,0 +1,123 @@
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+
+# TickData 行情字段 <- future_ticks 表的列名
+FIELD_COLUMNS = {
+    "last_price": "current",
+    "high_price": "high",
+    "low_price": "low",
+    "volume": "volume",
+    "turnover": "money",
+    "ask_price_1": "a1_p",
+    "ask_volume_1": "a1_v",
+    "bid_price_1": "b1_p",
+    "bid_volume_1": "b1_v",
+}
+TICK_FIELDS = tuple(FIELD_COLUMNS)
+
+# 回放时每次把多少条 tick 的列数据转换为 python 对象
+CHUNK_SIZE = 65_536
+
+
+class TickStore:
+    # 列式 tick 容器：每个字段一个 NumPy 数组（时间为 datetime64[us]，其余为 float64），
+    # 回放时才按块生成 TickData，用完即可回收；切片返回共享底层数组的视图，可直接作为 engine.history_data
+    def __init__(self, symbol: str, exchange: Exchange, datetime, gateway_name: str = "DDB", **fields):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.gateway_name = gateway_name
+        self.datetime = np.asarray(datetime, dtype="datetime64[us]")
+        for name in TICK_FIELDS:
+            setattr(self, name, np.asarray(fields[name], dtype=float))
+        self._fingerprint = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, symbol: str, exchange: Exchange) -> "TickStore":
+        return cls(
+            symbol,
+            exchange,
+            df["time"].to_numpy(dtype="datetime64[us]", copy=True),
+            # 复制出独立数组，不引用 DataFrame 的内部数据块，DataFrame 随后可整体释放
+            **{name: df[column].to_numpy(dtype=float, copy=True) for name, column in FIELD_COLUMNS.items()}
+        )
+
+    def columns(self) -> dict:
+        return {name: getattr(self, name) for name in TICK_FIELDS}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({"datetime": self.datetime, **self.columns()})
+
+    @property
+    def nbytes(self) -> int:
+        return self.datetime.nbytes + sum(array.nbytes for array in self.columns().values())
+
+    def fingerprint(self) -> str:
+        # 数据内容摘要（合约 + 全部列的字节），用作回测结果缓存键的一部分；数组不会原地修改，同一对象只计算一次
+        if self._fingerprint is None:
+            digest = hashlib.sha256(f"{self.symbol}.{self.exchange.value}".encode())
+            for array in (self.datetime, *self.columns().values()):
+                digest.update(np.ascontiguousarray(array).view(np.uint8))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def __len__(self) -> int:
+        return len(self.datetime)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TickStore(
+                self.symbol,
+                self.exchange,
+                self.datetime[index],
+                self.gateway_name,
+                **{name: array[index] for name, array in self.columns().items()}
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tick index out of range")
+        return next(self.iter_ticks(index, index + 1))
+
+    def __iter__(self):
+        return self.iter_ticks()
+
+    def template(self) -> dict:
+        # 模板 tick 的属性字典，生成 tick 时逐条只覆盖行情字段，跳过 dataclass 的全字段初始化
+        return TickData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=datetime.min,
+            name=self.symbol,
+            gateway_name=self.gateway_name
+        ).__dict__
+
+    def iter_ticks(self, start: int = 0, stop: int = None):
+        # 按块把数组转换为 python 列表（批量转换比逐元素取值快得多），块内逐条生成 TickData
+        template = self.template()
+        new_tick = object.__new__
+        length = len(self)
+        start, stop, _ = slice(start, stop).indices(length)
+
+        for begin in range(start, stop, CHUNK_SIZE):
+            end = min(begin + CHUNK_SIZE, stop)
+            times = self.datetime[begin:end].astype(object)
+            columns = [getattr(self, name)[begin:end].tolist() for name in TICK_FIELDS]
+            for dt, last, high, low, volume, turnover, a1_p, a1_v, b1_p, b1_v in zip(times, *columns):
+                tick = new_tick(TickData)
+                tick.__dict__.update(template)
+                tick.datetime = dt
+                tick.last_price = last
+                tick.high_price = high
+                tick.low_price = low
+                tick.volume = volume
+                tick.turnover = turnover
+                tick.ask_price_1 = a1_p
+                tick.ask_volume_1 = a1_v
+                tick.bid_price_1 = b1_p
+                tick.bid_volume_1 = b1_v
+                yield tick
@@ -0,0 +1,308 @@
+# 向量化快速回测：信号只依赖价格序列和时间/价格过滤的策略，指标整列计算，
+# 只在下单、成交处逐笔推进策略状态，撮合规则与 BacktestingEngine 的 tick 模式一致（限价单挂到对价可成交为止）
+import heapq
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from vnpy.trader.constant import Direction, Offset
+from vnpy.trader.object import TradeData
+from vnpy.trader.utility import round_to
+
+from tick_backtest_runner import create_engine
+from strategies import DynamicTickDoubleMaStrategy, TickDynamicBollChannelStrategy
+
+# 向前查找信号或成交时首次扫描的 tick 数，未命中则加倍，命中较近时不必生成整段掩码
+SCAN_CHUNK = 4096
+
+
+def find_first(condition, start: int, stop: int) -> int:
+    # condition(begin, end) 返回 [begin, end) 区间的布尔数组；返回第一个为 True 的下标，没有则返回 stop
+    size = SCAN_CHUNK
+    while start < stop:
+        end = min(start + size, stop)
+        mask = condition(start, end)
+        if mask.any():
+            return start + int(mask.argmax())
+        start = end
+        size *= 2
+    return stop
+
+
+def rolling_sum(values: np.ndarray, window: int, partial: bool = False) -> np.ndarray:
+    # 窗口未满的位置为 nan；partial 为 True 时为从头开始的累计和（与窗口未满时的 RollingSum.total 一致）
+    csum = np.cumsum(values)
+    result = csum.copy() if partial else np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = csum[window - 1:] - np.concatenate(([0.0], csum[:-window]))
+    return result
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    # 总体标准差（除以 n），与 RollingVariance 一致；先减去首个值再求平方和，降低大数相减的精度损失
+    if not len(values):
+        return np.array([])
+    shifted = values - values[0]
+    total = rolling_sum(shifted, window)
+    squares = rolling_sum(shifted * shifted, window)
+    return np.sqrt(np.maximum(squares - total * total / window, 0.0) / window)
+
+
+class VectorStrategy:
+    # 子类实现 next_order(start, stop)：在 [start, stop) 内（持仓等状态不变）找下一个下单的 tick，
+    # 返回 (index, direction, offset, price, volume) 并更新自身状态，没有则返回 None
+    strategy_class = None
+
+    def __init__(self, store, setting: dict):
+        for name in self.strategy_class.parameters:
+            setattr(self, name, setting.get(name, getattr(self.strategy_class, name)))
+
+        self.price = store.last_price
+        self.times = store.datetime.astype("datetime64[us]").astype(np.int64)
+        self.pos = 0
+        self.last_trade_time = None
+        self.current_capital = self.capital
+
+    def allowed_start(self, start: int) -> int:
+        # 频率控制：距上次下单不足 min_trade_interval 秒的 tick 直接跳过
+        if self.last_trade_time is None:
+            return start
+        earliest = self.last_trade_time + int(round(self.min_trade_interval * 1_000_000))
+        return max(start, int(np.searchsorted(self.times, earliest)))
+
+    def max_lots(self, price):
+        margin_per = price * self.contract_size * self.margin_rate
+        return np.trunc(self.current_capital / margin_per)
+
+    def on_trade(self, direction: Direction, price: float, volume: float) -> None:
+        pass
+
+
+class VectorDoubleMa(VectorStrategy):
+    strategy_class = DynamicTickDoubleMaStrategy
+
+    def __init__(self, store, setting: dict):
+        super().__init__(store, setting)
+        # 交易从慢均线窗口填满开始；快均线窗口更长时，事件驱动策略用未满窗口的累计和除以 fast_window
+        self.fast_ma = rolling_sum(self.price, self.fast_window, partial=True) / self.fast_window
+        self.slow_ma = rolling_sum(self.price, self.slow_window) / self.slow_window
+        self.last_entry_price = 0
+
+    def next_order(self, start: int, stop: int):
+        start = max(self.allowed_start(start), self.slow_window - 1)
+        price, fast, slow = self.price, self.fast_ma, self.slow_ma
+        pos, entry, move = self.pos, self.last_entry_price, self.min_price_move
+
+        def condition(a, b):
+            p = price[a:b]
+            up = fast[a:b] > slow[a:b]
+            down = fast[a:b] < slow[a:b]
+            if pos <= 0:
+                # 金叉开多；空仓时死叉开空
+                signal = up & ((p - entry) >= move) if entry else up
+                if pos == 0:
+                    signal |= down & ((entry - p) >= move) if entry else down
+            else:
+                # 持多时死叉且回撤足够才平多
+                signal = down & ((entry - p) >= move)
+            return signal & (self.max_lots(p) > 0)
+
+        index = find_first(condition, start, stop)
+        if index >= stop:
+            return None
+
+        p = float(price[index])
+        self.last_trade_time = int(self.times[index])
+        if pos > 0:
+            return index, Direction.SHORT, Offset.CLOSE, p, pos
+
+        volume = int(self.max_lots(p))
+        self.last_entry_price = p
+        if fast[index] > slow[index]:
+            return index, Direction.LONG, Offset.OPEN, p, volume
+        return index, Direction.SHORT, Offset.OPEN, p, volume
+
+    def on_trade(self, direction: Direction, price: float, volume: float) -> None:
+        pnl = price * volume * self.contract_size
+        if direction == Direction.SHORT:
+            pnl = -pnl
+        self.current_capital += pnl
+
+
+class VectorBoll(VectorStrategy):
+    strategy_class = TickDynamicBollChannelStrategy
+
+    def __init__(self, store, setting: dict):
+        super().__init__(store, setting)
+        mean = rolling_sum(self.price, self.window) / self.window
+        std = rolling_std(self.price, self.window)
+        self.upper = mean + self.dev_multiplier * std
+        self.lower = mean - self.dev_multiplier * std
+
+    def next_order(self, start: int, stop: int):
+        start = max(self.allowed_start(start), self.window - 1)
+        price, upper, lower, pos = self.price, self.upper, self.lower, self.pos
+
+        def condition(a, b):
+            p = price[a:b]
+            if pos < 0:
+                signal = p > upper[a:b]
+            elif pos > 0:
+                signal = p < lower[a:b]
+            else:
+                signal = (p > upper[a:b]) | (p < lower[a:b])
+            return signal & (self.max_lots(p) > 0)
+
+        index = find_first(condition, start, stop)
+        if index >= stop:
+            return None
+
+        p = float(price[index])
+        self.last_trade_time = int(self.times[index])
+        volume = int(self.max_lots(p))
+        if pos <= 0 and p > upper[index]:
+            return index, Direction.LONG, Offset.OPEN, p, volume
+        return index, Direction.SHORT, Offset.OPEN, p, volume
+
+    def on_trade(self, direction: Direction, price: float, volume: float) -> None:
+        self.current_capital = self.capital
+
+
+VECTOR_STRATEGIES = {
+    DynamicTickDoubleMaStrategy: VectorDoubleMa,
+    TickDynamicBollChannelStrategy: VectorBoll,
+}
+
+
+def fill_index(store, index: int, direction: Direction, price: float) -> tuple:
+    # 限价单从下单后的下一个 tick 起，对价（卖一/买一）到达委托价即全部成交，成交价取委托价与对价中更优者
+    if direction == Direction.LONG:
+        ask = store.ask_price_1
+        fill = find_first(lambda a, b: (ask[a:b] <= price) & (ask[a:b] > 0), index + 1, len(store))
+        trade_price = min(price, float(ask[fill])) if fill < len(store) else price
+    else:
+        bid = store.bid_price_1
+        fill = find_first(lambda a, b: (bid[a:b] >= price) & (bid[a:b] > 0), index + 1, len(store))
+        trade_price = max(price, float(bid[fill])) if fill < len(store) else price
+    return fill, trade_price
+
+
+def simulate(strategy: VectorStrategy, store, pricetick: float) -> list:
+    # 事件推进：在下一笔成交之前找下一个信号；没有信号则处理该 tick 上的成交（先于同一 tick 的信号判断）
+    # 返回 [(tick_index, direction, offset, price, volume)]
+    n = len(store)
+    pending = []
+    trades = []
+    order_count = 0
+    current = 0
+
+    while current < n:
+        next_fill = pending[0][0] if pending else n
+        order = strategy.next_order(current, next_fill)
+        if order:
+            index, direction, offset, price, volume = order
+            price = round_to(price, pricetick)
+            fill, trade_price = fill_index(store, index, direction, price)
+            if fill < n:
+                heapq.heappush(pending, (fill, order_count, direction, offset, trade_price, volume))
+            order_count += 1
+            current = index + 1
+            continue
+
+        if next_fill >= n:
+            break
+        # 同一 tick 上的多笔成交按下单顺序处理
+        while pending and pending[0][0] == next_fill:
+            fill, _, direction, offset, trade_price, volume = heapq.heappop(pending)
+            strategy.pos += volume if direction == Direction.LONG else -volume
+            strategy.on_trade(direction, trade_price, volume)
+            trades.append((fill, direction, offset, trade_price, volume))
+        current = next_fill
+
+    return trades
+
+
+def daily_results(store, trades: list, size: float, rate: float, slippage: float) -> pd.DataFrame:
+    # 与 BacktestingEngine.calculate_result 相同的逐日盯市，按交易日整列计算；收盘价取当日最后一个 tick
+    days = store.datetime.astype("datetime64[D]")
+    starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+    ends = np.concatenate((starts[1:], [len(days)])) - 1
+    close = store.last_price[ends]
+    n_days = len(starts)
+
+    if trades:
+        trade_index = np.array([t[0] for t in trades])
+        trade_day = np.searchsorted(starts, trade_index, side="right") - 1
+        trade_price = np.array([t[3] for t in trades], dtype=float)
+        volume = np.array([t[4] for t in trades], dtype=float)
+        pos_change = np.where([t[1] == Direction.LONG for t in trades], volume, -volume)
+        turnover = volume * size * trade_price
+    else:
+        trade_day = np.array([], dtype=int)
+        trade_price = volume = pos_change = turnover = np.array([])
+
+    def per_day(weights):
+        return np.bincount(trade_day, weights=weights, minlength=n_days)
+
+    end_pos = np.cumsum(per_day(pos_change))
+    start_pos = np.concatenate(([0.0], end_pos[:-1]))
+    pre_close = np.concatenate(([1.0], close[:-1]))
+    holding_pnl = start_pos * (close - pre_close) * size
+    trading_pnl = per_day(pos_change * (close[trade_day] - trade_price) * size)
+    commission = per_day(turnover * rate)
+    slippage_cost = per_day(volume * size * slippage)
+    total_pnl = trading_pnl + holding_pnl
+
+    return pd.DataFrame({
+        "date": [day.item() for day in days[starts]],
+        "close_price": close,
+        "pre_close": pre_close,
+        "trade_count": np.bincount(trade_day, minlength=n_days),
+        "start_pos": start_pos,
+        "end_pos": end_pos,
+        "turnover": per_day(turnover),
+        "commission": commission,
+        "slippage": slippage_cost,
+        "trading_pnl": trading_pnl,
+        "holding_pnl": holding_pnl,
+        "total_pnl": total_pnl,
+        "net_pnl": total_pnl - commission - slippage_cost,
+    }).set_index("date")
+
+
+def run_vector_backtest(strategy_class, setting: dict, store, engine_settings: dict):
+    # 返回 (engine, daily_df, statistics)，统计指标复用 BacktestingEngine.calculate_statistics，键与事件驱动回测一致
+    if strategy_class not in VECTOR_STRATEGIES:
+        raise ValueError(f"{strategy_class.__name__} 不支持向量化回测")
+
+    engine = create_engine(**engine_settings)
+    engine.output = lambda msg: None
+    strategy = VECTOR_STRATEGIES[strategy_class](store, setting)
+    trades = simulate(strategy, store, engine.pricetick)
+    return backtest_results(engine, store, trades)
+
+
+def backtest_results(engine, store, trades: list):
+    # 成交 [(tick_index, direction, offset, price, volume)] 写回 engine.trades，再逐日盯市、计算统计指标
+    for i, (index, direction, offset, price, volume) in enumerate(trades):
+        trade = TradeData(
+            symbol=engine.symbol,
+            exchange=engine.exchange,
+            orderid=str(i + 1),
+            tradeid=str(i + 1),
+            direction=direction,
+            offset=offset,
+            price=price,
+            volume=volume,
+            datetime=store.datetime[index].astype(datetime),
+            gateway_name="BACKTESTING"
+        )
+        engine.trades[trade.vt_tradeid] = trade
+
+    if len(store):
+        df = daily_results(store, trades, engine.size, engine.rate, engine.slippage)
+    else:
+        df = None
+    engine.daily_df = df
+    statistics = engine.calculate_statistics(df, output=False)
+    return engine, df, statistics
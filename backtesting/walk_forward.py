@@ -0,0 +1,259 @@
+# 滚动窗口（walk-forward）评估：在一份已加载的 tick 数据上按交易日切出训练/测试窗口（TickStore 切片，共享底层数组，不复制），
+# 训练窗口上做参数优化，最优参数在紧随其后的测试窗口上回测，最后把各测试窗口的逐日结果拼接为一条样本外净值曲线
+import argparse
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+import pandas as pd
+from vnpy.trader.constant import Exchange
+from vnpy.trader.optimize import OptimizationSetting
+
+import optimizer
+from kernels import day_bounds
+from mmap_tick_feed import open_tick_file
+from optimizer import OPTIMIZATION_TARGETS, backtest, evaluate, init_worker
+from tick_backtest_runner import STRATEGIES, create_engine, default_db_settings, parse_setting, save_results
+
+
+def walk_forward_windows(store, train_days: int, test_days: int, step_days: int = None, anchored: bool = False) -> list:
+    # 返回 [(train_begin, train_end, test_begin, test_end)] tick 下标区间（左闭右开）；按有行情的交易日计数
+    # anchored 为 True 时训练窗口起点固定在第一天，逐步扩大；最后一个测试窗口可以不足 test_days 天
+    step_days = step_days or test_days
+    if step_days < test_days:
+        raise ValueError("滚动步长小于测试窗口，样本外区间会重叠，无法拼接")
+
+    bounds = day_bounds(store)
+    windows = []
+    day = train_days
+    while day < len(bounds):
+        first = 0 if anchored else day - train_days
+        last = min(day + test_days, len(bounds))
+        windows.append((bounds[first][0], bounds[day - 1][1], bounds[day][0], bounds[last - 1][1]))
+        day += step_days
+    return windows
+
+
+def evaluate_slice(strategy_class, setting: dict, begin: int, end: int, engine_settings: dict, target_name: str,
+                   vectorized: bool) -> tuple:
+    # 工作进程中对共享数据的切片回测，只传回目标值，不传回统计结果
+    setting, target, _ = evaluate(
+        strategy_class, setting, engine_settings, target_name, vectorized, optimizer._history_data[begin:end]
+    )
+    return setting, target
+
+
+def backtest_slice(strategy_class, setting: dict, begin: int, end: int, engine_settings: dict, vectorized: bool):
+    engine, df, statistics = backtest(
+        strategy_class, setting, engine_settings, vectorized, optimizer._history_data[begin:end]
+    )
+    if df is not None:
+        # 成交记录另行传回，逐日结果中的 trades 列不必序列化
+        df = df.drop(columns=["trades"], errors="ignore")
+    return df, statistics, engine.get_all_trades()
+
+
+def run_walk_forward(
+    strategy_class,
+    settings: list,
+    history_data,
+    engine_settings: dict,
+    target_name: str,
+    train_days: int,
+    test_days: int,
+    step_days: int = None,
+    anchored: bool = False,
+    max_workers: int = None,
+    callback=None,
+    vectorized: bool = False
+):
+    # history_data 为 TickStore 或导出的 tick 文件路径（各进程只读映射同一个文件）
+    # 所有窗口的全部参数组合一起提交到进程池，某个窗口的训练全部完成后立即提交它的测试回测
+    # callback(done, total)：已完成的任务数
+    # 返回 (各窗口结果列表, 拼接后的样本外 daily_df, 样本外 statistics)
+    store = open_tick_file(history_data) if isinstance(history_data, (str, Path)) else history_data
+    windows = walk_forward_windows(store, train_days, test_days, step_days, anchored)
+    if not windows or not settings:
+        return [], None, out_of_sample_statistics(None, engine_settings)
+
+    max_workers = max_workers or os.cpu_count()
+    total = len(windows) * (len(settings) + 1)
+    best = [None] * len(windows)
+    remaining = [len(settings)] * len(windows)
+    tests = [None] * len(windows)
+    done = 0
+
+    with ProcessPoolExecutor(
+        max_workers,
+        mp_context=get_context("spawn"),
+        initializer=init_worker,
+        initargs=(history_data,)
+    ) as executor:
+        pending = {}
+        for i, (train_begin, train_end, _, _) in enumerate(windows):
+            for j, setting in enumerate(settings):
+                future = executor.submit(
+                    evaluate_slice, strategy_class, setting, train_begin, train_end, engine_settings, target_name,
+                    vectorized
+                )
+                pending[future] = ("train", i, j)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, i, j = pending.pop(future)
+                done += 1
+                if kind == "test":
+                    tests[i] = future.result()
+                else:
+                    setting, target = future.result()
+                    # 目标值为 nan（如训练窗口内没有成交）的参数不参与比较；目标值相同时取 settings 中靠前的参数，
+                    # 结果与各任务完成的先后无关
+                    if target == target and (best[i] is None or (target, -j) > (best[i][1], -best[i][2])):
+                        best[i] = (setting, target, j)
+                    remaining[i] -= 1
+                    if not remaining[i]:
+                        setting = best[i][0] if best[i] else settings[0]
+                        _, _, test_begin, test_end = windows[i]
+                        future = executor.submit(
+                            backtest_slice, strategy_class, setting, test_begin, test_end, engine_settings, vectorized
+                        )
+                        pending[future] = ("test", i, None)
+                if callback:
+                    callback(done, total)
+
+    results = []
+    frames = []
+    for i, (train_begin, train_end, test_begin, test_end) in enumerate(windows):
+        df, statistics, trades = tests[i]
+        results.append({
+            "train_start": store.datetime[train_begin].astype(datetime),
+            "train_end": store.datetime[train_end - 1].astype(datetime),
+            "test_start": store.datetime[test_begin].astype(datetime),
+            "test_end": store.datetime[test_end - 1].astype(datetime),
+            "setting": best[i][0] if best[i] else settings[0],
+            "train_target": best[i][1] if best[i] else float("nan"),
+            "test_target": statistics[target_name],
+            "statistics": statistics,
+            "trades": trades,
+        })
+        if df is not None:
+            frames.append(df)
+
+    # 测试窗口互不重叠，逐日结果直接拼接；滚动步长大于测试窗口时窗口之间的交易日不在样本外结果中
+    df = pd.concat(frames) if frames else None
+    return results, df, out_of_sample_statistics(df, engine_settings)
+
+
+def out_of_sample_statistics(df, engine_settings: dict) -> dict:
+    # 拼接后的逐日结果视为同一账户连续运行，统计指标重新计算
+    engine = create_engine(**engine_settings)
+    engine.output = lambda msg: None
+    return engine.calculate_statistics(df, output=False)
+
+
+def parse_range(text: str) -> tuple:
+    # NAME=START:END:STEP 或 NAME=VALUE
+    name, _, value = text.partition("=")
+    parts = value.split(":")
+    if len(parts) == 1:
+        return name.strip(), float(parts[0]), None, None
+    if len(parts) != 3:
+        raise ValueError(f"参数范围格式应为 NAME=START:END:STEP：{text}")
+    return name.strip(), float(parts[0]), float(parts[1]), float(parts[2])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="滚动窗口（walk-forward）样本外评估")
+    parser.add_argument("--symbol", required=True, help="合约代码，如 AL2401")
+    parser.add_argument("--exchange", default="SHFE")
+    parser.add_argument("--start", help="开始日期，如 2024-01-01（使用 --tick-file 时可省略）")
+    parser.add_argument("--end", help="结束日期（含）")
+    parser.add_argument("--tick-file", help="从导出的 tick 文件（内存映射）读取数据，不连接数据库")
+    parser.add_argument("--strategy", required=True, help="策略类名：" + ", ".join(STRATEGIES))
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=START:END:STEP",
+                        help="参与优化的参数范围，或固定参数 NAME=VALUE，可重复")
+    parser.add_argument("--target", default="sharpe_ratio", choices=OPTIMIZATION_TARGETS)
+    parser.add_argument("--train-days", type=int, required=True, help="训练窗口交易日数")
+    parser.add_argument("--test-days", type=int, required=True, help="测试窗口交易日数")
+    parser.add_argument("--step-days", type=int, help="窗口滚动步长，默认等于测试窗口")
+    parser.add_argument("--anchored", action="store_true", help="训练窗口起点固定，逐步扩大")
+    parser.add_argument("--workers", type=int, help="进程数，默认 CPU 核数")
+    parser.add_argument("--vectorized", action="store_true", help="使用快速回测（向量化/编译内核）")
+    parser.add_argument("--output", help="结果输出目录，默认 results/<合约>_<策略>_wf")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.strategy not in STRATEGIES:
+            raise ValueError(f"未知策略 {args.strategy}，可选：{', '.join(STRATEGIES)}")
+        strategy_class = STRATEGIES[args.strategy]
+        optimization_setting = OptimizationSetting()
+        for text in args.param:
+            name, start, end, step = parse_range(text)
+            value_type = type(getattr(strategy_class, name))
+            ok, msg = optimization_setting.add_parameter(
+                name, value_type(start),
+                None if end is None else value_type(end),
+                None if step is None else value_type(step)
+            )
+            if not ok:
+                raise ValueError(f"{name}: {msg}")
+        settings = [parse_setting(strategy_class, setting) for setting in optimization_setting.generate_settings()]
+        if not args.tick_file and not (args.start and args.end):
+            raise ValueError("不使用 --tick-file 时需要 --start 和 --end")
+    except (ValueError, AttributeError) as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 2
+
+    symbol = args.symbol.strip().upper()
+    exchange = Exchange(args.exchange)
+    if args.tick_file:
+        history_data = args.tick_file
+        store = open_tick_file(args.tick_file)
+    else:
+        # 局部导入：只使用 tick 文件时不需要 dolphindb
+        from dolphindb_tick_feed import DolphinDBTickFeed
+        from tick_cache import TickCache
+
+        data_feed = DolphinDBTickFeed(**default_db_settings(), cache=TickCache(), output=print)
+        store = history_data = data_feed.load_tick_store(
+            symbol, exchange, datetime.fromisoformat(args.start), datetime.fromisoformat(args.end)
+        )
+    if not len(store):
+        print("所选区间没有 tick 数据", file=sys.stderr)
+        return 1
+
+    engine_settings = {
+        "vt_symbol": f"{symbol}.{exchange.value}",
+        "start": store.datetime[0].astype(datetime),
+        "end": store.datetime[-1].astype(datetime),
+    }
+    results, df, statistics = run_walk_forward(
+        strategy_class, settings, history_data, engine_settings, args.target,
+        args.train_days, args.test_days, args.step_days, args.anchored,
+        max_workers=args.workers,
+        callback=lambda done, total: print(f"\r已完成 {done}/{total}", end="", flush=True),
+        vectorized=args.vectorized
+    )
+    print()
+
+    output_dir = Path(args.output or Path("results") / f"{symbol}_{strategy_class.__name__}_wf")
+    trades = [trade for result in results for trade in result["trades"]]
+    save_results(output_dir, statistics, df, trades)
+    rows = []
+    for result in results:
+        print(f"训练 {result['train_start']:%Y-%m-%d}~{result['train_end']:%Y-%m-%d} "
+              f"测试 {result['test_start']:%Y-%m-%d}~{result['test_end']:%Y-%m-%d} "
+              f"{args.target}: 训练 {result['train_target']:.3f} 测试 {result['test_target']:.3f} 参数 {result['setting']}")
+        rows.append({key: value for key, value in result.items() if key not in ("statistics", "trades")})
+    pd.DataFrame(rows).to_csv(output_dir / "windows.csv", index=False)
+    print(f"样本外 {args.target}: {statistics.get(args.target)}，总净收益 {statistics.get('total_net_pnl')}")
+    print(f"结果已保存至 {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())